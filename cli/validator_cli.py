@@ -2,6 +2,8 @@
 
 import argparse
 
+from utils.cache_policies import compare_policies, load_trace
+
 
 def create_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(description="Validator CLI")
@@ -9,6 +11,12 @@ def create_parser() -> argparse.ArgumentParser:
     sub.add_parser("stats", help="Show validator stats")
     sub.add_parser("manage", help="Manage validator")
     sub.add_parser("export", help="Export data")
+    simulate = sub.add_parser(
+        "simulate-cache", help="Replay a key,size trace through each eviction policy"
+    )
+    simulate.add_argument("trace", help="CSV file of key,size accesses")
+    simulate.add_argument("--capacity", type=int, required=True, help="Cache size in bytes")
+    simulate.add_argument("--policy", action="append", help="Policy to run (default: all)")
     return parser
 
 
@@ -21,6 +29,11 @@ def main(argv: list[str] | None = None) -> None:
         print("Managing validator")
     elif args.command == "export":
         print("Exporting data")
+    elif args.command == "simulate-cache":
+        results = compare_policies(load_trace(args.trace), args.capacity, args.policy)
+        print(f"{'policy':<12}{'hit ratio':>12}{'byte hit ratio':>16}")
+        for name, result in results.items():
+            print(f"{name:<12}{result['hit_ratio']:>12.4f}{result['byte_hit_ratio']:>16.4f}")
     else:
         parser.print_help()
 
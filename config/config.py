@@ -30,10 +30,29 @@ class Config:
 
     # IPFS configuration
     IPFS_GATEWAY = os.environ.get("IPFS_GATEWAY", "http://localhost:5001")
+    IPFS_GATEWAYS = [
+        url for url in os.environ.get("IPFS_GATEWAYS", IPFS_GATEWAY).split(",") if url
+    ]
+    IPFS_HEDGE_PERCENTILE = float(os.environ.get("IPFS_HEDGE_PERCENTILE", 95))
+    IPFS_MAX_CONNECTIONS = int(os.environ.get("IPFS_MAX_CONNECTIONS", 100))
+    IPFS_MAX_CONNECTIONS_PER_HOST = int(os.environ.get("IPFS_MAX_CONNECTIONS_PER_HOST", 16))
+    IPFS_CONCURRENCY = int(os.environ.get("IPFS_CONCURRENCY", 8))
+    IPFS_DOWNLOAD_SEGMENTS = int(os.environ.get("IPFS_DOWNLOAD_SEGMENTS", 4))
+    IPFS_RETRY_ATTEMPTS = int(os.environ.get("IPFS_RETRY_ATTEMPTS", 3))
+    IPFS_RETRY_BASE_DELAY = float(os.environ.get("IPFS_RETRY_BASE_DELAY", 0.5))
+    IPFS_RETRY_MAX_DELAY = float(os.environ.get("IPFS_RETRY_MAX_DELAY", 30))
+    IPFS_BREAKER_THRESHOLD = int(os.environ.get("IPFS_BREAKER_THRESHOLD", 5))
+    IPFS_BREAKER_RESET = float(os.environ.get("IPFS_BREAKER_RESET", 30))
 
     # Video limits
     MAX_VIDEO_SIZE = int(os.environ.get("MAX_VIDEO_SIZE", 1024 * 1024 * 1024))  # 1GB
     SUPPORTED_VIDEO_FORMATS = os.environ.get("SUPPORTED_VIDEO_FORMATS", "mp4,mov,mkv").split(",")
+    FFPROBE_TIMEOUT = float(os.environ.get("FFPROBE_TIMEOUT", 30))
+
+    # Near-duplicate detection
+    FINGERPRINT_FRAMES = int(os.environ.get("FINGERPRINT_FRAMES", 16))
+    FINGERPRINT_RADIUS = int(os.environ.get("FINGERPRINT_RADIUS", 10))  # bits per frame
+    FINGERPRINT_MATCH_FRACTION = float(os.environ.get("FINGERPRINT_MATCH_FRACTION", 0.5))
 
     # Social platform API keys
     YOUTUBE_API_KEY = os.environ.get("YOUTUBE_API_KEY", "")
@@ -47,6 +66,25 @@ class Config:
 
     # Storage configuration
     MAX_STORAGE_SIZE = int(os.environ.get("MAX_STORAGE_SIZE", 500 * 1024 ** 3))
+    # Store each distinct file once under objects/<aa>/<bb>/<sha256>
+    CONTENT_ADDRESSED_STORAGE = os.environ.get("CONTENT_ADDRESSED_STORAGE", "1").lower() in (
+        "1",
+        "true",
+        "yes",
+    )
+    # Eviction policy: lru, size-lru, lfu, arc or w-tinylfu
+    STORAGE_POLICY = os.environ.get("STORAGE_POLICY", "lru")
+    # Background integrity scrubbing of stored files
+    SCRUB_BYTES_PER_SECOND = int(os.environ.get("SCRUB_BYTES_PER_SECOND", 50 * 1024 ** 2))
+    SCRUB_FILES_PER_TICK = int(os.environ.get("SCRUB_FILES_PER_TICK", 100))
+    SCRUB_INTERVAL = float(os.environ.get("SCRUB_INTERVAL", 1))
+    # Files not read for this many seconds are expired (0 = never)
+    SCRUB_MAX_AGE = float(os.environ.get("SCRUB_MAX_AGE", 7 * 24 * 3600))
+    METADATA_CACHE_PATH = os.environ.get("METADATA_CACHE_PATH", "metadata_cache.db")
+    METADATA_CACHE_MAX_ENTRIES = int(os.environ.get("METADATA_CACHE_MAX_ENTRIES", 100_000))
+    # First-submitter claims on CIDs, pruned after this many seconds
+    VALIDATOR_DB_PATH = os.environ.get("VALIDATOR_DB_PATH", "validator.db")
+    SUBMITTER_CLAIM_MAX_AGE = float(os.environ.get("SUBMITTER_CLAIM_MAX_AGE", 30 * 24 * 3600))
 
     # Validation thresholds
     VALIDATION_SCORE_THRESHOLD = float(os.environ.get("VALIDATION_SCORE_THRESHOLD", 0.5))
@@ -96,10 +134,28 @@ class Config:
                 "dir": cls.LOG_DIR,
                 "levels": cls.LOG_LEVELS,
             },
-            "ipfs": {"gateway": cls.IPFS_GATEWAY},
+            "ipfs": {
+                "gateway": cls.IPFS_GATEWAY,
+                "gateways": cls.IPFS_GATEWAYS,
+                "hedge_percentile": cls.IPFS_HEDGE_PERCENTILE,
+                "max_connections": cls.IPFS_MAX_CONNECTIONS,
+                "max_connections_per_host": cls.IPFS_MAX_CONNECTIONS_PER_HOST,
+                "concurrency": cls.IPFS_CONCURRENCY,
+                "download_segments": cls.IPFS_DOWNLOAD_SEGMENTS,
+                "retry": {
+                    "attempts": cls.IPFS_RETRY_ATTEMPTS,
+                    "base_delay": cls.IPFS_RETRY_BASE_DELAY,
+                    "max_delay": cls.IPFS_RETRY_MAX_DELAY,
+                },
+                "breaker": {
+                    "threshold": cls.IPFS_BREAKER_THRESHOLD,
+                    "reset": cls.IPFS_BREAKER_RESET,
+                },
+            },
             "video": {
                 "max_size": cls.MAX_VIDEO_SIZE,
                 "formats": cls.SUPPORTED_VIDEO_FORMATS,
+                "ffprobe_timeout": cls.FFPROBE_TIMEOUT,
             },
             "api_keys": {
                 "youtube": cls.YOUTUBE_API_KEY,
@@ -111,7 +167,24 @@ class Config:
                 "quality": cls.QUALITY_MODEL_PATH,
                 "classification": cls.CLASSIFICATION_MODEL_PATH,
             },
-            "storage": {"max_size": cls.MAX_STORAGE_SIZE},
+            "fingerprint": {
+                "frames": cls.FINGERPRINT_FRAMES,
+                "radius": cls.FINGERPRINT_RADIUS,
+                "match_fraction": cls.FINGERPRINT_MATCH_FRACTION,
+            },
+            "storage": {
+                "max_size": cls.MAX_STORAGE_SIZE,
+                "content_addressed": cls.CONTENT_ADDRESSED_STORAGE,
+                "policy": cls.STORAGE_POLICY,
+                "scrub_bytes_per_second": cls.SCRUB_BYTES_PER_SECOND,
+                "scrub_files_per_tick": cls.SCRUB_FILES_PER_TICK,
+                "scrub_interval": cls.SCRUB_INTERVAL,
+                "scrub_max_age": cls.SCRUB_MAX_AGE,
+                "metadata_cache": cls.METADATA_CACHE_PATH,
+                "metadata_cache_max_entries": cls.METADATA_CACHE_MAX_ENTRIES,
+                "validator_db": cls.VALIDATOR_DB_PATH,
+                "submitter_claim_max_age": cls.SUBMITTER_CLAIM_MAX_AGE,
+            },
             "validation": {"score_threshold": cls.VALIDATION_SCORE_THRESHOLD},
             "rate_limit": {
                 "requests": cls.RATE_LIMIT_REQUESTS,
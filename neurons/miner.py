@@ -1,13 +1,17 @@
 # The MIT License (MIT)
 # Copyright © 2024 Your Organization
 
+import os
 import time
 import typing
 import asyncio
 from collections import deque
 import bittensor as bt
 from template.protocol import QuerySynapse, DataSynapse
-from utils.ipfs_client import IPFSClient
+from config.config import Config
+from utils.fingerprint_index import FingerprintIndex
+from utils.ipfs_client import AsyncIPFSClient, is_cidv0
+from utils.retry import RetryPolicy
 from utils.video_processor import VideoProcessor
 from utils.storage_manager import StorageManager
 
@@ -24,8 +28,21 @@ class Miner:
         self.setup_axon()
 
         # IPFS client and helpers
-        gateway = getattr(self.config, "ipfs_gateway", "http://localhost:5001")
-        self.ipfs = IPFSClient(gateway)
+        gateway = getattr(self.config, "ipfs_gateway", None) or Config.IPFS_GATEWAYS
+        self.ipfs = AsyncIPFSClient(
+            gateway,
+            max_connections=Config.IPFS_MAX_CONNECTIONS,
+            max_connections_per_host=Config.IPFS_MAX_CONNECTIONS_PER_HOST,
+            concurrency=Config.IPFS_CONCURRENCY,
+            hedge_percentile=Config.IPFS_HEDGE_PERCENTILE,
+            retry_policy=RetryPolicy(
+                attempts=Config.IPFS_RETRY_ATTEMPTS,
+                base_delay=Config.IPFS_RETRY_BASE_DELAY,
+                max_delay=Config.IPFS_RETRY_MAX_DELAY,
+            ),
+            breaker_threshold=Config.IPFS_BREAKER_THRESHOLD,
+            breaker_reset=Config.IPFS_BREAKER_RESET,
+        )
         self.video_processor = VideoProcessor()
         self.storage = StorageManager("miner_storage")
 
@@ -33,6 +50,13 @@ class Miner:
         self.submission_queue: asyncio.Queue[str] = asyncio.Queue()
         self.submissions: dict[str, dict] = {}
         self.recent_hashes: set[str] = set()
+        self.fingerprints = FingerprintIndex.load(
+            "miner_fingerprints.npz",
+            radius=Config.FINGERPRINT_RADIUS,
+            match_fraction=Config.FINGERPRINT_MATCH_FRACTION,
+        )
+        # (path, size, mtime) -> locally computed CID and sha256 of the file
+        self.known_uploads: dict[tuple, dict] = {}
         self.last_submission_time = 0.0
         
     def get_config(self):
@@ -147,12 +171,45 @@ class Miner:
         ):
             raise ValueError("Invalid video")
 
-        file_hash = self.video_processor.calculate_hash(file_path)
-        if file_hash in self.recent_hashes:
-            raise ValueError("Duplicate submission")
+        # Catch re-encodes of earlier submissions before uploading them.
+        try:
+            fingerprint = await self.video_processor.fingerprint_async(
+                file_path, Config.FINGERPRINT_FRAMES, timeout=Config.FFPROBE_TIMEOUT
+            )
+        except (ValueError, OSError, asyncio.TimeoutError) as e:
+            bt.logging.warning(f"Could not fingerprint {file_path}: {e}")
+            fingerprint = []
+        duplicate = self.fingerprints.find_duplicate(fingerprint)
+        if duplicate is not None:
+            raise ValueError(f"Near-duplicate of submission {duplicate}")
+
+        # Hash and compute the CID while uploading (once per file version);
+        # a file seen before is only re-uploaded if the gateway lost it.
+        stat = os.stat(file_path)
+        identity = (os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns)
+        known = self.known_uploads.get(identity)
+        if known is not None:
+            if known["sha256"] in self.recent_hashes:
+                raise ValueError("Duplicate submission")
+            if await self.ipfs.has_content(known["cid"]):
+                ipfs_hash = known["cid"]
+            else:
+                ipfs_hash = await self.ipfs.upload_file(file_path)
+        else:
+            ipfs_hash, digests = await self.ipfs.upload_file_with_digests(
+                file_path, ("sha256", "cid")
+            )
+            known = {"cid": digests["cid"], "sha256": digests["sha256"], "time": time.time()}
+            self.known_uploads[identity] = known
+            if known["sha256"] in self.recent_hashes:
+                raise ValueError("Duplicate submission")
+        if is_cidv0(ipfs_hash) and ipfs_hash != known["cid"]:
+            bt.logging.warning(f"Gateway CID {ipfs_hash} differs from local CID {known['cid']}")
+        file_hash = known["sha256"]
 
-        ipfs_hash = self.ipfs.upload_file(file_path)
         self.recent_hashes.add(file_hash)
+        if fingerprint:
+            self.fingerprints.add(ipfs_hash, fingerprint)
         self.submissions[ipfs_hash] = {"status": "uploaded", "time": time.time()}
         self.last_submission_time = time.time()
         return ipfs_hash
@@ -175,6 +232,9 @@ class Miner:
         for key in list(self.submissions.keys()):
             if self.submissions[key]["time"] < cutoff:
                 self.submissions.pop(key, None)
+        for key in list(self.known_uploads.keys()):
+            if self.known_uploads[key]["time"] < cutoff:
+                self.known_uploads.pop(key, None)
         
     async def run_loop(self):
         """Main loop for the miner."""
@@ -223,6 +283,8 @@ class Miner:
                 
         # Clean up
 
+        self.fingerprints.save("miner_fingerprints.npz")
+        await self.ipfs.close()
         self.axon.stop()
         bt.logging.info("Miner stopped")
 
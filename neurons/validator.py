@@ -6,14 +6,27 @@ import torch
 import asyncio
 import random
 import bittensor as bt
-from typing import List, Dict
+from typing import List, Dict, Optional
 from template.protocol import QuerySynapse, DataSynapse
-from utils.ipfs_client import IPFSClient
+from config.config import Config
+from utils.ipfs_client import AsyncIPFSClient, matches_cid
+from utils.retry import RetryPolicy
+from utils.database import Database
+from utils.fingerprint_index import FingerprintIndex
+from utils.ipfs_cache import IPFSCache
+from utils.metadata_cache import MetadataCache
 from utils.storage_manager import StorageManager
+from utils.storage_scrubber import StorageScrubber
 from utils.video_processor import VideoProcessor
 from utils.ai_models import ModelManager
 from utils.social_api import PLATFORMS
 
+
+def _other_miner(first: Optional[str], submitter: Optional[str]) -> bool:
+    """True if a CID claimed by ``first`` was submitted by a different miner."""
+    return first is not None and submitter is not None and first != submitter
+
+
 class Validator:
     """
     Basic validator class for Subnet 89.
@@ -25,10 +38,44 @@ class Validator:
         self.setup_logging()
         self.setup_bittensor()
 
-        gateway = getattr(self.config, "ipfs_gateway", "http://localhost:5001")
-        self.ipfs = IPFSClient(gateway)
-        self.storage = StorageManager("validator_storage")
-        self.video_processor = VideoProcessor()
+        gateway = getattr(self.config, "ipfs_gateway", None) or Config.IPFS_GATEWAYS
+        self.ipfs = AsyncIPFSClient(
+            gateway,
+            max_connections=Config.IPFS_MAX_CONNECTIONS,
+            max_connections_per_host=Config.IPFS_MAX_CONNECTIONS_PER_HOST,
+            concurrency=Config.IPFS_CONCURRENCY,
+            hedge_percentile=Config.IPFS_HEDGE_PERCENTILE,
+            retry_policy=RetryPolicy(
+                attempts=Config.IPFS_RETRY_ATTEMPTS,
+                base_delay=Config.IPFS_RETRY_BASE_DELAY,
+                max_delay=Config.IPFS_RETRY_MAX_DELAY,
+            ),
+            breaker_threshold=Config.IPFS_BREAKER_THRESHOLD,
+            breaker_reset=Config.IPFS_BREAKER_RESET,
+        )
+        self.storage = StorageManager(
+            "validator_storage", content_addressed=Config.CONTENT_ADDRESSED_STORAGE
+        )
+        self.ipfs_cache = IPFSCache(
+            self.ipfs, self.storage, suffix=".mp4", verifier=matches_cid
+        )
+        self.scrubber = StorageScrubber(
+            self.storage,
+            bytes_per_second=Config.SCRUB_BYTES_PER_SECOND,
+            max_files=Config.SCRUB_FILES_PER_TICK,
+            max_age=Config.SCRUB_MAX_AGE or None,
+        )
+        self.metadata_cache = MetadataCache(
+            Config.METADATA_CACHE_PATH, max_entries=Config.METADATA_CACHE_MAX_ENTRIES
+        )
+        self.video_processor = VideoProcessor(cache=self.metadata_cache)
+        self.fingerprints = FingerprintIndex.load(
+            "validator_fingerprints.npz",
+            radius=Config.FINGERPRINT_RADIUS,
+            match_fraction=Config.FINGERPRINT_MATCH_FRACTION,
+        )
+        # First miner to submit each CID, pruned after SUBMITTER_CLAIM_MAX_AGE
+        self.db = Database(Config.VALIDATOR_DB_PATH)
         self.models = ModelManager()
 
         self.download_queue: asyncio.Queue[dict] = asyncio.Queue()
@@ -159,13 +206,81 @@ class Validator:
     async def handle_submission(self, submission: Dict) -> None:
         """Download and validate a video submission."""
         ipfs_hash = submission.get("ipfs_hash")
-        local_path = self.storage.get_storage_path(f"{ipfs_hash}.mp4")
-        self.ipfs.download_file(ipfs_hash, local_path)
+        async with self.ipfs_cache.open(
+            ipfs_hash, segments=Config.IPFS_DOWNLOAD_SEGMENTS, verify=True
+        ) as local_path:
+            await self.validate_submission(submission, local_path)
 
-        meta = self.video_processor.get_video_metadata(local_path)
-        deepfake_score = self.models.deepfake_detect(local_path)
-        quality = self.models.quality_score(local_path)
+    async def handle_submissions(self, submissions: List[Dict]) -> None:
+        """Download a batch of submissions concurrently, then validate each."""
+        results = await self.ipfs_cache.fetch_many(
+            [s.get("ipfs_hash") for s in submissions],
+            segments=Config.IPFS_DOWNLOAD_SEGMENTS,
+            verify=True,
+        )
+        for submission, result in zip(submissions, results):
+            if isinstance(result, BaseException):
+                bt.logging.error(f"Download error for {submission.get('ipfs_hash')}: {result}")
+                submission["status"] = "failed"
+                continue
+            try:
+                # Lease the cached copy so it cannot be evicted mid-read.
+                async with self.ipfs_cache.open(
+                    submission.get("ipfs_hash"),
+                    segments=Config.IPFS_DOWNLOAD_SEGMENTS,
+                    verify=True,
+                ) as local_path:
+                    await self.validate_submission(submission, local_path)
+            except Exception as e:
+                bt.logging.error(f"Validation error: {e}")
+        bt.logging.debug(f"IPFS cache stats: {self.ipfs_cache.stats()}")
+        bt.logging.debug(f"IPFS client stats: {self.ipfs.stats()}")
+        bt.logging.debug(f"Metadata cache stats: {self.metadata_cache.stats()}")
 
+    async def validate_submission(self, submission: Dict, local_path: str) -> None:
+        """Score a downloaded submission and record the results."""
+        ipfs_hash = submission.get("ipfs_hash")
+        submitter = submission.get("hotkey")
+        # Byte-identical content: a repeat is only allowed as a re-validation
+        # of the original miner's own submission. Unknown hotkeys never
+        # count as a different miner.
+        revalidation, first = await asyncio.to_thread(self.db.get_submission_claim, ipfs_hash)
+        if _other_miner(first, submitter):
+            submission.update({"status": "duplicate", "duplicate_of": ipfs_hash})
+            return
+        meta = await self.video_processor.get_video_metadata_async(
+            local_path, timeout=Config.FFPROBE_TIMEOUT
+        )
+        # Reject re-encoded content before spending model inference on it.
+        try:
+            fingerprint = await self.video_processor.fingerprint_async(
+                local_path, Config.FINGERPRINT_FRAMES, timeout=Config.FFPROBE_TIMEOUT
+            )
+        except (ValueError, OSError, asyncio.TimeoutError) as e:
+            bt.logging.warning(f"Could not fingerprint {ipfs_hash}: {e}")
+            fingerprint = []
+        duplicate = self.fingerprints.find_duplicate(
+            fingerprint, exclude=ipfs_hash if revalidation else None
+        )
+        if duplicate is not None:
+            submission.update(
+                {"metadata": meta, "status": "duplicate", "duplicate_of": duplicate}
+            )
+            return
+        if fingerprint:
+            self.fingerprints.add(ipfs_hash, fingerprint)
+        deepfake_score = self.metadata_cache.get_or_compute(
+            local_path, "deepfake_score", lambda: self.models.deepfake_detect(local_path)
+        )
+        quality = self.metadata_cache.get_or_compute(
+            local_path, "quality_score", lambda: self.models.quality_score(local_path)
+        )
+
+        # Claim only once validated; a concurrent claim by another miner wins.
+        first = await asyncio.to_thread(self.db.claim_submission, ipfs_hash, submitter)
+        if _other_miner(first, submitter):
+            submission.update({"status": "duplicate", "duplicate_of": ipfs_hash})
+            return
         submission.update(
             {
                 "metadata": meta,
@@ -189,6 +304,7 @@ class Validator:
     async def run_validation_loop(self):
         """Main validation loop."""
         step = 0
+        scrub_task = asyncio.create_task(self.scrubber.run(Config.SCRUB_INTERVAL))
         while True:
             try:
                 # Sync metagraph periodically
@@ -218,15 +334,20 @@ class Validator:
                     
                 step += 1
                 # Process queued submissions
-                if not self.download_queue.empty():
-                    submission = await self.download_queue.get()
+                batch = []
+                while not self.download_queue.empty():
+                    batch.append(self.download_queue.get_nowait())
+                if batch:
                     try:
-                        await self.handle_submission(submission)
+                        await self.handle_submissions(batch)
                     except Exception as e:
                         bt.logging.error(f"Validation error: {e}")
 
                 if step % 100 == 0:
                     self.set_weights()
+                    await asyncio.to_thread(
+                        self.db.cleanup_old_records, Config.SUBMITTER_CLAIM_MAX_AGE
+                    )
 
                 await asyncio.sleep(12)  # Sleep for one block
                 
@@ -236,6 +357,12 @@ class Validator:
             except Exception as e:
                 bt.logging.error(f"Error in validation loop: {e}")
                 await asyncio.sleep(12)
+
+        scrub_task.cancel()
+        bt.logging.info(f"Storage scrub progress: {self.scrubber.progress()}")
+        self.fingerprints.save("validator_fingerprints.npz")
+        self.db.close_all()
+        await self.ipfs.close()
                 
     def run(self):
         """Main entry point for the validator."""
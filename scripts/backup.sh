@@ -1,2 +1,14 @@
 #!/bin/bash
+# Archive the code, then take incremental snapshots of each video store.
+set -e
+BACKUP_DIR=${BACKUP_DIR:-backups}
+BACKUP_KEEP=${BACKUP_KEEP:-7}
+BACKUP_WORKERS=${BACKUP_WORKERS:-4}
+
 tar czf backup.tgz neurons utils
+for store in miner_storage validator_storage api_storage; do
+    if [ -d "$store" ]; then
+        python -m utils.storage_backup backup "$store" "$BACKUP_DIR/$store" \
+            --workers "$BACKUP_WORKERS" --keep "$BACKUP_KEEP"
+    fi
+done
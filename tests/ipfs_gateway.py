@@ -0,0 +1,225 @@
+"""In-process stand-in for an IPFS HTTP gateway used by tests and benchmarks.
+
+Implements ``/api/v0/add``, ``/ipfs/<cid>`` (with single-range support),
+``/api/v0/object/stat`` and ``/api/v0/version``. Latency, a bandwidth cap
+and failure injection can be tuned per instance, or changed while the
+server is running.
+"""
+
+from __future__ import annotations
+
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import parse_qs, urlparse
+
+from utils.ipfs_client import CIDBuilder
+
+_WRITE_CHUNK = 64 * 1024
+
+
+class _GatewayHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):  # noqa: A002 - silence test output
+        pass
+
+    @property
+    def gateway(self) -> "LocalIPFSGateway":
+        return self.server.gateway  # type: ignore[attr-defined]
+
+    def _read_body(self) -> bytes:
+        started = time.monotonic()
+        if self.headers.get("transfer-encoding", "").lower() == "chunked":
+            body = bytearray()
+            while True:
+                size = int(self.rfile.readline().split(b";")[0].strip(), 16)
+                if size == 0:
+                    self.rfile.readline()
+                    break
+                body += self.rfile.read(size)
+                self.rfile.readline()
+        else:
+            body = self.rfile.read(int(self.headers.get("content-length", 0)))
+        self.gateway.throttle(len(body), started)
+        return bytes(body)
+
+    def _write_body(self, data: bytes) -> None:
+        started = time.monotonic()
+        view = memoryview(data)
+        for offset in range(0, len(view), _WRITE_CHUNK):
+            piece = view[offset : offset + _WRITE_CHUNK]
+            self.wfile.write(piece)
+            self.gateway.throttle(offset + len(piece), started)
+
+    def _send_json(self, payload: dict, status: int = 200) -> None:
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_error(self, status: int) -> None:
+        self.send_response(status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def _before_response(self) -> bool:
+        """Apply latency and failure injection; return False if failed."""
+        time.sleep(self.gateway.latency)
+        if self.gateway.should_fail():
+            self._send_error(503)
+            return False
+        return True
+
+    def do_POST(self) -> None:
+        url = urlparse(self.path)
+        body = self._read_body()
+        if not self._before_response():
+            return
+        if url.path == "/api/v0/add":
+            data = _multipart_file(body, self.headers.get("content-type", ""))
+            cid = self.gateway.add(data)
+            self._send_json({"Name": cid, "Hash": cid, "Size": str(len(data))})
+        elif url.path == "/api/v0/object/stat":
+            cid = parse_qs(url.query).get("arg", [""])[0]
+            data = self.gateway.blocks.get(cid)
+            if data is None:
+                self._send_error(500)
+                return
+            self._send_json({"Hash": cid, "CumulativeSize": len(data)})
+        elif url.path == "/api/v0/version":
+            self._send_json({"Version": "0.0.0-test"})
+        else:
+            self._send_error(404)
+
+    def do_HEAD(self) -> None:
+        url = urlparse(self.path)
+        if not self._before_response():
+            return
+        data = self.gateway.blocks.get(url.path[len("/ipfs/"):])
+        if not url.path.startswith("/ipfs/") or data is None:
+            self._send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+
+    def do_GET(self) -> None:
+        url = urlparse(self.path)
+        if not self._before_response():
+            return
+        if not url.path.startswith("/ipfs/"):
+            self._send_error(404)
+            return
+        data = self.gateway.blocks.get(url.path[len("/ipfs/"):])
+        if data is None:
+            self._send_error(404)
+            return
+        byte_range = self.headers.get("range")
+        self.gateway.ranges.append(byte_range)
+        if byte_range and byte_range.startswith("bytes="):
+            first, _, last = byte_range[len("bytes="):].partition("-")
+            start = int(first)
+            end = min(int(last) if last else len(data) - 1, len(data) - 1)
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{end}/{len(data)}")
+            data = data[start : end + 1]
+        else:
+            self.send_response(200)
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self._write_body(data)
+
+
+def _multipart_file(body: bytes, content_type: str) -> bytes:
+    """Return the payload of the first part of a multipart body."""
+    boundary = content_type.split("boundary=")[-1].strip('"').encode()
+    part = body.split(b"--" + boundary)[1]
+    payload = part.split(b"\r\n\r\n", 1)[1]
+    return payload[: -len(b"\r\n")]
+
+
+class LocalIPFSGateway:
+    """Serve a minimal IPFS HTTP API from a background thread.
+
+    Args:
+        latency: Seconds to wait before answering each request
+        bandwidth: Per-connection cap in bytes/second for request and
+            response bodies (``None`` for unlimited)
+        failure_rate: Probability that a request is answered with 503
+        fail_next: Number of upcoming requests to answer with 503
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0,
+        bandwidth: Optional[float] = None,
+        failure_rate: float = 0.0,
+        fail_next: int = 0,
+        seed: Optional[int] = None,
+    ) -> None:
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.failure_rate = failure_rate
+        self.fail_next = fail_next
+        self.failures_injected = 0
+        self.blocks: dict[str, bytes] = {}
+        self.ranges: list[str | None] = []
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), _GatewayHandler)
+        self._server.daemon_threads = True
+        self._server.gateway = self  # type: ignore[attr-defined]
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def add(self, data: bytes) -> str:
+        builder = CIDBuilder()
+        builder.update(data)
+        cid = builder.cid()
+        self.blocks[cid] = data
+        return cid
+
+    def should_fail(self) -> bool:
+        with self._lock:
+            if self.fail_next > 0:
+                self.fail_next -= 1
+            elif not (self.failure_rate and self._random.random() < self.failure_rate):
+                return False
+            self.failures_injected += 1
+            return True
+
+    def throttle(self, transferred: int, started: float) -> None:
+        """Sleep until ``transferred`` bytes fit under the bandwidth cap."""
+        if not self.bandwidth:
+            return
+        wait = transferred / self.bandwidth - (time.monotonic() - started)
+        if wait > 0:
+            time.sleep(wait)
+
+    def start(self) -> "LocalIPFSGateway":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "LocalIPFSGateway":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
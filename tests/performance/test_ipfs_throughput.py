@@ -0,0 +1,172 @@
+"""IPFS transfer throughput benchmarks against the local gateway stand-in.
+
+Run the full matrix with::
+
+    python tests/performance/test_ipfs_throughput.py --sizes 1,16,64 --concurrency 1,4,16
+
+Under pytest a small smoke configuration runs so regressions in the
+transfer path (e.g. lost concurrency or broken range downloads) show up
+as a failure or a visible drop in the printed report.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from tests.ipfs_gateway import LocalIPFSGateway
+from utils.ipfs_client import AsyncIPFSClient
+
+MB = 1024 * 1024
+
+
+def percentile(values, q):
+    """Return the ``q``-th percentile of ``values`` (nearest rank)."""
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(q / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def _summarize(op, size, concurrency, latencies, elapsed, segments=1):
+    total_bytes = size * len(latencies)
+    return {
+        "op": op,
+        "size": size,
+        "concurrency": concurrency,
+        "segments": segments,
+        "ops": len(latencies),
+        "mb_s": total_bytes / MB / elapsed if elapsed else 0.0,
+        "p50": percentile(latencies, 50),
+        "p99": percentile(latencies, 99),
+    }
+
+
+async def _timed(semaphore, coro_fn, latencies):
+    async with semaphore:
+        start = time.perf_counter()
+        await coro_fn()
+        latencies.append(time.perf_counter() - start)
+
+
+async def bench_size(client, workdir, size, concurrency, ops, segments=1):
+    """Upload then download ``ops`` files of ``size`` bytes."""
+    sources = []
+    for i in range(ops):
+        path = os.path.join(workdir, f"src_{size}_{i}.bin")
+        with open(path, "wb") as f:
+            f.write(os.urandom(size))
+        sources.append(path)
+
+    semaphore = asyncio.Semaphore(concurrency)
+    hashes = {}
+    latencies = []
+
+    async def _upload(path):
+        hashes[path] = await client.upload_file(path)
+
+    start = time.perf_counter()
+    await asyncio.gather(
+        *(_timed(semaphore, lambda p=p: _upload(p), latencies) for p in sources)
+    )
+    rows = [_summarize("upload", size, concurrency, latencies, time.perf_counter() - start)]
+
+    latencies = []
+    dests = [f"{p}.out" for p in sources]
+    start = time.perf_counter()
+    await asyncio.gather(
+        *(
+            _timed(
+                semaphore,
+                lambda p=p, d=d: client.download_file(
+                    hashes[p], d, segments=segments, segment_size=max(size // segments, 1)
+                ),
+                latencies,
+            )
+            for p, d in zip(sources, dests)
+        )
+    )
+    rows.append(
+        _summarize(
+            "download", size, concurrency, latencies, time.perf_counter() - start, segments
+        )
+    )
+
+    for path in sources + dests:
+        os.remove(path)
+    return rows
+
+
+def run_suite(sizes, concurrency_levels, ops=8, segments=1, **gateway_kwargs):
+    """Run every size/concurrency combination and return report rows."""
+
+    async def _run(gateway, workdir):
+        rows = []
+        async with AsyncIPFSClient(gateway.url, max_connections_per_host=64) as client:
+            for size in sizes:
+                for concurrency in concurrency_levels:
+                    rows.extend(
+                        await bench_size(client, workdir, size, concurrency, ops, segments)
+                    )
+        return rows
+
+    with LocalIPFSGateway(**gateway_kwargs) as gateway, tempfile.TemporaryDirectory() as workdir:
+        return asyncio.run(_run(gateway, workdir))
+
+
+def format_report(rows):
+    lines = [
+        f"{'op':<9}{'size':>10}{'conc':>6}{'segs':>6}{'ops':>5}"
+        f"{'MB/s':>10}{'p50 ms':>10}{'p99 ms':>10}"
+    ]
+    for row in rows:
+        lines.append(
+            f"{row['op']:<9}{row['size'] // 1024:>8}KB{row['concurrency']:>6}"
+            f"{row['segments']:>6}{row['ops']:>5}{row['mb_s']:>10.1f}"
+            f"{row['p50'] * 1000:>10.1f}{row['p99'] * 1000:>10.1f}"
+        )
+    return "\n".join(lines)
+
+
+def test_ipfs_throughput_smoke():
+    rows = run_suite([64 * 1024, MB], [1, 4], ops=4)
+    rows += run_suite([MB], [2], ops=2, segments=4)
+    print("\n" + format_report(rows))
+    assert len(rows) == 10
+    assert all(row["mb_s"] > 0 and row["p99"] >= row["p50"] for row in rows)
+
+
+def test_bandwidth_cap_limits_throughput():
+    rows = run_suite([256 * 1024], [1], ops=2, bandwidth=2 * MB)
+    download = next(r for r in rows if r["op"] == "download")
+    assert download["mb_s"] < 4
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1,16,64", help="File sizes in MB")
+    parser.add_argument("--concurrency", default="1,4,16")
+    parser.add_argument("--ops", type=int, default=16, help="Transfers per combination")
+    parser.add_argument("--segments", type=int, default=1)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds per request")
+    parser.add_argument("--bandwidth", type=float, default=None, help="MB/s per connection")
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    args = parser.parse_args(argv)
+
+    rows = run_suite(
+        [int(float(s) * MB) for s in args.sizes.split(",")],
+        [int(c) for c in args.concurrency.split(",")],
+        ops=args.ops,
+        segments=args.segments,
+        latency=args.latency,
+        bandwidth=args.bandwidth * MB if args.bandwidth else None,
+        failure_rate=args.failure_rate,
+    )
+    print(format_report(rows))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+import asyncio
+import json
+import os
+
+import pytest
+
+from tests.test_media_probe import make_mp4
+from tests.test_video_processor import fake_ffmpeg  # noqa: F401 - fixture
+from utils.abr_packager import ABRPackager, ladder_for
+from utils.storage_manager import StorageManager
+
+
+def test_ladder_never_upscales():
+    assert [r["name"] for r in ladder_for(1280, 720)] == ["720p", "480p", "360p"]
+    assert ladder_for(1280, 720)[1]["width"] == 854
+    small = ladder_for(320, 240)
+    assert [(r["width"], r["height"]) for r in small] == [(320, 240)]
+
+
+def test_package_hls_into_storage(fake_ffmpeg, tmp_path):
+    src = tmp_path / "clip.mp4"
+    make_mp4(src, duration=8.0, width=1280, height=720)
+    storage = StorageManager(str(tmp_path / "storage"))
+    packager = ABRPackager(storage, segment_duration=4)
+
+    manifest = asyncio.run(packager.package(str(src), "clip", audio=True))
+
+    # One ffmpeg run decodes once and encodes every rendition.
+    runs = (fake_ffmpeg / "ffmpeg.pid.args").read_text().splitlines()
+    assert len(runs) == 1 and "split=3" in runs[0]
+    assert [r["name"] for r in manifest["renditions"]] == ["720p", "480p", "360p"]
+    assert manifest["renditions"][0]["segments"] == [
+        "720p/segment_00000.ts",
+        "720p/segment_00001.ts",
+    ]
+    assert storage.get_file("clip/master.m3u8") is not None
+    assert storage.get_file("clip/480p/index.m3u8") is not None
+    with open(storage.get_file("clip/manifest.json")) as f:
+        assert json.load(f)["renditions"] == manifest["renditions"]
+    # The scratch directory is gone.
+    assert [f for f in os.listdir(storage.root) if not f.startswith(".")] == ["clip"]
+
+
+def test_packager_requires_unbounded_store(tmp_path):
+    with pytest.raises(ValueError):
+        ABRPackager(StorageManager(str(tmp_path), max_size=1024))
+    with pytest.raises(ValueError):
+        ABRPackager(StorageManager(str(tmp_path), content_addressed=True))
@@ -0,0 +1,63 @@
+import random
+
+import pytest
+
+from utils.cache_policies import POLICIES, compare_policies, load_trace, make_policy, simulate
+from utils.storage_manager import StorageManager
+
+
+def _viral_trace(requests=3000, seed=1):
+    """A small hot set read constantly, interleaved with large one-off uploads."""
+    rng = random.Random(seed)
+    hot = [(f"hot{i}", 50) for i in range(20)]
+    return [
+        rng.choice(hot) if rng.random() < 0.7 else (f"upload{i}", 400)
+        for i in range(requests)
+    ]
+
+
+@pytest.mark.parametrize("name", sorted(POLICIES))
+def test_policy_tracks_cache_contents(name):
+    capacity = 2000
+    policy = make_policy(name, capacity)
+    sizes = {}
+    for key, size in _viral_trace(500):
+        if key in sizes:
+            policy.access(key)
+            continue
+        policy.insert(key, size)
+        sizes[key] = size
+        while sum(sizes.values()) > capacity:
+            sizes.pop(policy.evict())
+        assert len(policy) == len(sizes)
+        assert all(key in policy for key in sizes)
+
+
+def test_frequency_aware_policies_beat_lru_on_viral_trace():
+    results = compare_policies(_viral_trace(), 2000)
+    lru = results["lru"]["byte_hit_ratio"]
+    for name in ("size-lru", "lfu", "arc", "w-tinylfu"):
+        assert results[name]["byte_hit_ratio"] > 1.5 * lru
+
+
+def test_load_trace(tmp_path):
+    trace = tmp_path / "trace.csv"
+    trace.write_text("# key,size\na,10\nb,20,1700000000\na,10\n")
+    assert load_trace(str(trace)) == [("a", 10), ("b", 20), ("a", 10)]
+    result = simulate(load_trace(str(trace)), make_policy("lru", 100), 100)
+    assert result["hit_ratio"] == pytest.approx(1 / 3)
+    assert result["byte_hit_ratio"] == pytest.approx(10 / 40)
+
+
+def test_storage_manager_tinylfu_rejects_one_off_upload(tmp_path):
+    sm = StorageManager(str(tmp_path / "storage"), max_size=300, policy="w-tinylfu")
+    src = tmp_path / "src"
+    for name in ("a", "b"):
+        src.write_bytes(b"x" * 100)
+        sm.store_file(str(src), name=name)
+        for _ in range(3):
+            sm.get_file(name)
+    src.write_bytes(b"y" * 200)
+    sm.store_file(str(src), name="upload")
+    assert sorted(sm.metadata) == ["a", "b"]
+    assert sm.storage_size() == 200
@@ -0,0 +1,112 @@
+import asyncio
+import sqlite3
+import threading
+
+import pytest
+
+from utils.database import Database
+
+
+def test_file_database_uses_wal_and_pool(tmp_path):
+    db = Database(str(tmp_path / "test.db"), pool_size=2, timeout=0.2)
+    with db.reader() as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+        assert conn.execute("PRAGMA cache_size").fetchone()[0] == -16 * 1024
+
+    first = db.connect()
+    second = db.connect()
+    with pytest.raises(TimeoutError):
+        db.connect()
+    db.release(first)
+    assert db.connect() is first
+    db.release(first)
+    db.release(second)
+    assert db.stats()["open"] == 2
+    db.close_all()
+
+
+def test_readers_do_not_wait_for_writer(tmp_path):
+    db = Database(str(tmp_path / "test.db"), pool_size=2, timeout=0.2)
+    db.insert_submission("s1", "h1")
+    with db.writer() as conn:
+        conn.execute("UPDATE submissions SET status = 'done'")
+        # Uncommitted, so readers still see the old row and are not blocked.
+        assert db.get_pending_submissions() == [("s1", "h1")]
+        with pytest.raises(TimeoutError):
+            with db.writer(timeout=0.05):
+                pass
+    assert db.get_pending_submissions() == []
+
+    with pytest.raises(RuntimeError):
+        with db.writer() as conn:
+            conn.execute("UPDATE submissions SET status = 'pending'")
+            raise RuntimeError("boom")
+    assert db.get_pending_submissions() == []
+    db.close_all()
+
+
+def test_concurrent_threads(tmp_path):
+    db = Database(str(tmp_path / "test.db"), pool_size=3)
+    errors = []
+
+    def worker(n: int) -> None:
+        try:
+            for i in range(20):
+                db.insert_submission(f"s{n}-{i}", "h")
+                db.get_submission_history(5)
+        except Exception as exc:  # pragma: no cover - reported below
+            errors.append(exc)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert not errors
+    assert len(db.get_submission_history(1000)) == 120
+    assert db.stats()["open"] <= 3
+    db.close_all()
+
+
+def test_async_checkout(tmp_path):
+    db = Database(str(tmp_path / "test.db"), pool_size=1, timeout=0.2)
+
+    async def main():
+        async with db.awriter() as conn:
+            conn.execute(
+                "INSERT INTO submissions (submission_id, status) VALUES ('a', 'pending')"
+            )
+        async with db.areader() as conn:
+            rows = conn.execute("SELECT submission_id FROM submissions").fetchall()
+            with pytest.raises(TimeoutError):
+                await db.aconnect(timeout=0.05)
+        return rows
+
+    assert asyncio.run(main()) == [("a",)]
+    db.close_all()
+
+
+def test_memory_database_and_backup(tmp_path):
+    db = Database(":memory:", pool_size=1)
+    db.insert_submission("s1", "h1")
+    conn = db.connect()
+    assert conn.execute("SELECT COUNT(*) FROM submissions").fetchone()[0] == 1
+    db.release(conn)
+
+    db.backup(str(tmp_path / "copy.db"))
+    with sqlite3.connect(str(tmp_path / "copy.db")) as copy:
+        assert copy.execute("SELECT submission_id FROM submissions").fetchall() == [("s1",)]
+    db.close_all()
+
+
+def test_submission_claims_keep_the_first_known_hotkey(tmp_path):
+    db = Database(str(tmp_path / "test.db"))
+    assert db.get_submission_claim("cid") == (False, None)
+    assert db.claim_submission("cid", None) is None
+    assert db.claim_submission("cid", "alice") == "alice"
+    assert db.claim_submission("cid", "bob") == "alice"
+    assert db.get_submission_claim("cid") == (True, "alice")
+    db.cleanup_old_records(-1)
+    assert db.get_submission_claim("cid") == (False, None)
+    db.close_all()
@@ -0,0 +1,62 @@
+import random
+
+import numpy as np
+
+from utils.fingerprint_index import FingerprintIndex, hamming
+from utils.video_processor import dhash
+
+
+def _video(rng, frames=16):
+    return [rng.getrandbits(64) for _ in range(frames)]
+
+
+def _perturb(rng, hashes, bits):
+    out = []
+    for value in hashes:
+        for bit in rng.sample(range(64), bits):
+            value ^= 1 << bit
+        out.append(value)
+    return out
+
+
+def test_dhash_is_stable_under_noise_and_scale():
+    rng = np.random.default_rng(0)
+    frames = rng.integers(0, 256, size=(4, 72, 90, 3)).astype(np.uint8)
+    base = dhash(frames)
+    assert base.dtype == np.uint64 and base.shape == (4,)
+    noisy = np.clip(frames.astype(int) + rng.integers(-4, 5, size=frames.shape), 0, 255)
+    assert all(hamming(int(a), int(b)) <= 8 for a, b in zip(base, dhash(noisy.astype(np.uint8))))
+    # Same content at the 9x8 hashing resolution hashes identically.
+    small = frames.reshape(4, 8, 9, 9, 10, 3).mean(axis=(2, 4)).round().astype(np.uint8)
+    assert all(hamming(int(a), int(b)) <= 2 for a, b in zip(base, dhash(small)))
+
+
+def test_index_finds_near_duplicates_only(tmp_path):
+    rng = random.Random(1)
+    index = FingerprintIndex(radius=10, match_fraction=0.5)
+    videos = {f"v{i}": _video(rng) for i in range(2000)}
+    for key, hashes in videos.items():
+        index.add(key, hashes)
+
+    reencoded = _perturb(rng, videos["v42"], bits=4)
+    assert index.find_duplicate(reencoded) == "v42"
+    assert index.find_duplicate(reencoded, exclude="v42") is None
+    assert index.find_duplicate(_video(rng)) is None
+    # A few shared frames are not enough for a match.
+    assert index.find_duplicate(videos["v7"][:4] + _video(rng, 12)) is None
+
+    index.remove("v42")
+    path = str(tmp_path / "fingerprints.npz")
+    index.save(path)
+    loaded = FingerprintIndex.load(path, radius=10)
+    assert len(loaded) == 1999
+    assert loaded.find_duplicate(reencoded) is None
+    assert loaded.find_duplicate(_perturb(rng, videos["v3"], bits=3)) == "v3"
+
+
+def test_flat_frames_are_ignored():
+    index = FingerprintIndex()
+    index.add("black", [0] * 16)
+    index.add("mixed", [0] * 8 + [0x0123456789ABCDEF] * 8)
+    assert index.find_duplicate([0] * 16) is None
+    assert index.find_duplicate([0x0123456789ABCDEF] * 4) == "mixed"
@@ -0,0 +1,107 @@
+import asyncio
+import os
+import importlib.util
+import pytest
+
+aiohttp_missing = importlib.util.find_spec("aiohttp") is None
+if aiohttp_missing:
+    pytest.skip("aiohttp not installed", allow_module_level=True)
+
+from tests.ipfs_gateway import LocalIPFSGateway
+from utils.ipfs_cache import IPFSCache
+from utils.ipfs_client import AsyncIPFSClient
+from utils.storage_manager import StorageManager
+
+
+def test_cache_hits_and_collapses_concurrent_fetches(tmp_path):
+    with LocalIPFSGateway() as gateway:
+        data = b"x" * 20_000
+        cid = gateway.add(data)
+
+        async def _run():
+            async with AsyncIPFSClient(gateway.url) as client:
+                cache = IPFSCache(client, StorageManager(str(tmp_path)), suffix=".mp4")
+                paths = await asyncio.gather(*(cache.fetch(cid) for _ in range(5)))
+                again = await cache.fetch(cid)
+                return cache, paths, again
+
+        cache, paths, again = asyncio.run(_run())
+
+    assert len(set(paths)) == 1 and again == paths[0]
+    assert open(again, "rb").read() == data
+    assert len(gateway.ranges) == 1
+    stats = cache.stats()
+    assert stats["misses"] == 1
+    assert stats["coalesced"] == 4
+    assert stats["hits"] == 1
+    assert stats["bytes_saved"] == 5 * len(data)
+
+
+def test_cache_rejects_unverified_leftover(tmp_path):
+    with LocalIPFSGateway() as gateway:
+        cid = gateway.add(b"good")
+        (tmp_path / f"{cid}.mp4").write_bytes(b"partial")
+
+        async def _run():
+            async with AsyncIPFSClient(gateway.url) as client:
+                cache = IPFSCache(
+                    client,
+                    StorageManager(str(tmp_path)),
+                    suffix=".mp4",
+                    verifier=lambda h, p: open(p, "rb").read() == b"good",
+                )
+                return await cache.fetch(cid), cache
+
+        path, cache = asyncio.run(_run())
+
+    assert open(path, "rb").read() == b"good"
+    assert cache.misses == 1
+
+
+def test_cache_returns_object_paths_in_content_addressed_store(tmp_path):
+    with LocalIPFSGateway() as gateway:
+        data = b"y" * 5_000
+        cid = gateway.add(data)
+
+        async def _run():
+            async with AsyncIPFSClient(gateway.url) as client:
+                storage = StorageManager(str(tmp_path), content_addressed=True)
+                cache = IPFSCache(client, storage, suffix=".mp4")
+                paths = await asyncio.gather(*(cache.fetch(cid) for _ in range(3)))
+                return cache, paths, await cache.fetch(cid)
+
+        cache, paths, again = asyncio.run(_run())
+
+    assert len(set(paths)) == 1 and again == paths[0]
+    assert "objects" in paths[0]
+    assert open(paths[0], "rb").read() == data
+    assert cache.stats()["bytes_downloaded"] == len(data)
+    assert not any(name.endswith(".part") for name in os.listdir(tmp_path))
+
+
+def test_open_leases_the_file_against_eviction(tmp_path):
+    with LocalIPFSGateway() as gateway:
+        first = gateway.add(b"a" * 20_000)
+        second = gateway.add(b"b" * 20_000)
+        third = gateway.add(b"c" * 15_000)
+
+        async def _run():
+            async with AsyncIPFSClient(gateway.url) as client:
+                storage = StorageManager(str(tmp_path), max_size=30_000)
+                cache = IPFSCache(client, storage, suffix=".mp4")
+                async with cache.open(first) as path:
+                    # With the first file leased, the second cannot stay.
+                    await cache.fetch(second)
+                    with pytest.raises(OSError):
+                        async with cache.open(second):
+                            pass
+                    held = open(path, "rb").read(1) == b"a"
+                # Storing the third evicts the first once its lease ends.
+                await cache.fetch(third)
+                return storage, path, held
+
+        storage, path, held = asyncio.run(_run())
+
+    assert held
+    assert not os.path.exists(path)
+    assert storage.get_file(f"{first}.mp4") is None
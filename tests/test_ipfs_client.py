@@ -1,4 +1,6 @@
+import asyncio
 import importlib.util
+import os
 import pytest
 
 requests_missing = importlib.util.find_spec("requests") is None
@@ -21,3 +23,275 @@ def test_ipfs_client_cleanup(tmp_path):
 def test_ipfs_connection_fail():
     client = IPFSClient("http://localhost:1234")
     assert client.test_connection() is False
+
+
+@pytest.fixture
+def gateway():
+    from tests.ipfs_gateway import LocalIPFSGateway
+
+    with LocalIPFSGateway() as gw:
+        yield gw
+
+
+def test_ipfs_upload_download_roundtrip(tmp_path, gateway):
+    src = tmp_path / "video.mp4"
+    src.write_bytes(b"video-bytes" * 1000)
+    client = IPFSClient(gateway.url)
+    ipfs_hash = client.upload_file(str(src))
+    dest = tmp_path / "out.mp4"
+    client.download_file(ipfs_hash, str(dest))
+    assert dest.read_bytes() == src.read_bytes()
+    client.close()
+
+
+def test_async_ipfs_upload_many_download_many(tmp_path, gateway):
+    from utils.ipfs_client import AsyncIPFSClient
+
+    sources = []
+    for i in range(5):
+        src = tmp_path / f"video{i}.mp4"
+        src.write_bytes(bytes([i]) * (4096 + i))
+        sources.append(src)
+
+    async def _run():
+        async with AsyncIPFSClient(gateway.url, concurrency=2) as client:
+            hashes = await client.upload_many([str(s) for s in sources])
+            dests = [tmp_path / f"out{i}.mp4" for i in range(len(sources))]
+            errors = await client.download_many(
+                [(h, str(d)) for h, d in zip(hashes, dests)]
+            )
+            missing = await client.download_many([("missing", str(tmp_path / "x"))])
+            return dests, errors, missing
+
+    dests, errors, missing = asyncio.run(_run())
+    assert errors == [None] * len(sources)
+    assert all(d.read_bytes() == s.read_bytes() for d, s in zip(dests, sources))
+    assert isinstance(missing[0], Exception)
+
+
+def test_segmented_download_resumes_from_progress(tmp_path, gateway):
+    import json
+
+    data = os.urandom(10_000)
+    cid = gateway.add(data)
+    dest = tmp_path / "video.mp4"
+
+    # Simulate a transfer that stopped after the first 4 KB segment
+    dest.write_bytes(data[:4096] + b"\0" * (len(data) - 4096))
+    (tmp_path / "video.mp4.progress").write_text(
+        json.dumps({"hash": cid, "size": len(data), "segment_size": 4096, "done": [0]})
+    )
+
+    client = IPFSClient(gateway.url)
+    client.download_file(cid, str(dest), segments=3, segment_size=4096)
+    assert dest.read_bytes() == data
+    assert not (tmp_path / "video.mp4.progress").exists()
+    assert "bytes=0-4095" not in gateway.ranges
+    assert "bytes=4096-8191" in gateway.ranges
+
+
+def test_async_segmented_download(tmp_path, gateway):
+    from utils.ipfs_client import AsyncIPFSClient
+
+    data = os.urandom(50_000)
+    cid = gateway.add(data)
+    dest = tmp_path / "video.mp4"
+
+    async def _run():
+        async with AsyncIPFSClient(gateway.url) as client:
+            await client.download_file(cid, str(dest), segments=4, segment_size=8192)
+
+    asyncio.run(_run())
+    assert dest.read_bytes() == data
+
+
+def test_async_segment_failure_cancels_the_others(tmp_path, gateway):
+    from utils.ipfs_client import AsyncIPFSClient
+    from utils.retry import RetryPolicy
+
+    cid = gateway.add(os.urandom(50_000))
+    finished = []
+
+    async def _write_stream(response, f, builder, on_chunk):
+        if f.tell() == 0:
+            raise RuntimeError("disk full")
+        await asyncio.sleep(30)
+        finished.append(f.tell())
+
+    async def _run():
+        async with AsyncIPFSClient(gateway.url, retry_policy=RetryPolicy(attempts=1)) as client:
+            client._write_stream = _write_stream
+            with pytest.raises(RuntimeError, match="disk full"):
+                await client.download_file(
+                    cid, str(tmp_path / "video.mp4"), segments=4, segment_size=8192
+                )
+            return [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+
+    # Every other segment was cancelled rather than left writing.
+    assert asyncio.run(_run()) == []
+    assert finished == []
+
+
+def test_upload_with_digests_single_pass(tmp_path, gateway):
+    import hashlib
+    from utils.ipfs_client import AsyncIPFSClient
+
+    data = os.urandom(3 * 1024 * 1024 + 17)
+    src = tmp_path / "video.mp4"
+    src.write_bytes(data)
+
+    client = IPFSClient(gateway.url)
+    ipfs_hash, digests = client.upload_file_with_digests(str(src), ("sha256", "md5"))
+    assert gateway.blocks[ipfs_hash] == data
+    assert digests["sha256"] == hashlib.sha256(data).hexdigest()
+    assert digests["md5"] == hashlib.md5(data).hexdigest()
+
+    async def _run():
+        async with AsyncIPFSClient(gateway.url, chunk_size=65536) as aclient:
+            return await aclient.upload_file_with_digests(str(src))
+
+    async_hash, async_digests = asyncio.run(_run())
+    assert async_hash == ipfs_hash
+    assert async_digests == {"sha256": digests["sha256"]}
+
+
+def test_local_cid_checks_presence_before_upload(tmp_path, gateway):
+    import hashlib
+    from utils.ipfs_client import AsyncIPFSClient, file_digests
+
+    data = os.urandom(300_000)
+    src = tmp_path / "video.mp4"
+    src.write_bytes(data)
+    digests = file_digests(str(src))
+    assert digests["sha256"] == hashlib.sha256(data).hexdigest()
+
+    client = IPFSClient(gateway.url)
+    assert client.has_content(digests["cid"]) is False
+    assert client.upload_file(str(src)) == digests["cid"]
+    assert client.has_content(digests["cid"]) is True
+    client.close()
+
+    async def _run():
+        async with AsyncIPFSClient(gateway.url) as aclient:
+            uploaded = await aclient.upload_file_with_digests(str(src), ("sha256", "cid"))
+            return uploaded, await aclient.has_content("Qmnope")
+
+    assert asyncio.run(_run()) == ((digests["cid"], digests), False)
+
+
+def test_async_client_hedges_slow_gateway(tmp_path):
+    from tests.ipfs_gateway import LocalIPFSGateway
+    from utils.ipfs_client import AsyncIPFSClient
+
+    data = b"hedged" * 100
+    with LocalIPFSGateway(latency=2.0) as slow, LocalIPFSGateway() as fast:
+        cid = slow.add(data)
+        fast.add(data)
+
+        async def _run():
+            async with AsyncIPFSClient([slow.url, fast.url], hedge_delay=0.05) as client:
+                await client.download_file(cid, str(tmp_path / "out.mp4"))
+                info = await client.get_file_info(cid)
+                return client, info
+
+        client, info = asyncio.run(_run())
+
+    assert (tmp_path / "out.mp4").read_bytes() == data
+    assert info["Hash"] == cid
+    assert client.hedged_requests >= 1
+    # The fast gateway answered and is now preferred.
+    assert client.ranked_gateways()[0] == fast.url
+
+
+def test_async_hedged_request_cancels_primary_with_caller():
+    from tests.ipfs_gateway import LocalIPFSGateway
+    from utils.ipfs_client import AsyncIPFSClient
+
+    with LocalIPFSGateway(latency=2.0) as slow, LocalIPFSGateway() as other:
+
+        async def _run():
+            async with AsyncIPFSClient([slow.url, other.url], hedge_delay=5.0) as client:
+                request = asyncio.ensure_future(client._request("GET", "/", hedge=True))
+                await asyncio.sleep(0.1)
+                request.cancel()
+                with pytest.raises(asyncio.CancelledError):
+                    await request
+                await asyncio.sleep(0)
+                return [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+
+        assert asyncio.run(_run()) == []
+
+
+def test_async_client_retries_injected_failures(tmp_path):
+    from tests.ipfs_gateway import LocalIPFSGateway
+    from utils.ipfs_client import AsyncIPFSClient
+    from utils.retry import RetryPolicy
+
+    with LocalIPFSGateway(fail_next=2) as gw:
+        cid = gw.add(b"payload")
+
+        async def _run():
+            policy = RetryPolicy(attempts=3, base_delay=0.0)
+            async with AsyncIPFSClient(gw.url, retry_policy=policy) as client:
+                await client.download_file(cid, str(tmp_path / "out"))
+                return policy.stats()
+
+        stats = asyncio.run(_run())
+
+    assert (tmp_path / "out").read_bytes() == b"payload"
+    assert gw.failures_injected == 2
+    assert stats["retries"] == 2
+
+
+def test_cid_matches_ipfs_add_vectors(tmp_path):
+    from utils.ipfs_client import CIDBuilder, compute_cid
+
+    empty = CIDBuilder()
+    assert empty.cid() == "QmbFMke1KXqnYyBBWxB74N4c5SBnJMVAiMNRcGu6x1AwQH"
+    f = tmp_path / "hello.txt"
+    f.write_bytes(b"hello world\n")
+    assert compute_cid(str(f)) == "QmT78zSuBmuS4z925WZfrqQ1qHaJ56DQaTfyMUF7F8ff5o"
+
+
+def test_cid_segments_join_to_whole_file_cid():
+    from utils.ipfs_client import CID_CHUNK_SIZE, CIDBuilder
+
+    data = os.urandom(CID_CHUNK_SIZE * 5 + 123)
+    whole = CIDBuilder()
+    for i in range(0, len(data), 100_000):
+        whole.update(data[i : i + 100_000])
+
+    joined = CIDBuilder()
+    for start in range(0, len(data), CID_CHUNK_SIZE * 2):
+        part = CIDBuilder()
+        part.update(data[start : start + CID_CHUNK_SIZE * 2])
+        joined.extend(part)
+    assert joined.cid() == whole.cid()
+    assert len(whole.leaves) == 6
+
+
+def test_download_verify_detects_tampering(tmp_path, gateway):
+    from utils.ipfs_client import AsyncIPFSClient, CID_CHUNK_SIZE
+
+    data = os.urandom(CID_CHUNK_SIZE * 3)
+    cid = gateway.add(data)
+    client = IPFSClient(gateway.url)
+    client.download_file(cid, str(tmp_path / "ok"), verify=True, segments=2)
+
+    src = tmp_path / "src"
+    src.write_bytes(data)
+    uploaded, digests = client.upload_file_with_digests(str(src), ("cid",))
+    assert digests["cid"] == uploaded == cid
+
+    gateway.blocks[cid] = data[:-1] + b"\0"
+
+    async def _run():
+        async with AsyncIPFSClient(gateway.url) as aclient:
+            await aclient.download_file(cid, str(tmp_path / "bad"), verify=True)
+
+    with pytest.raises(ValueError):
+        asyncio.run(_run())
+    with pytest.raises(ValueError):
+        client.download_file(
+            cid, str(tmp_path / "bad2"), verify=True, segments=2, segment_size=1
+        )
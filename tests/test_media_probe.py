@@ -0,0 +1,85 @@
+import struct
+
+from utils.media_probe import probe_container
+from utils.video_processor import VideoProcessor
+
+
+def _box(kind: bytes, payload: bytes) -> bytes:
+    return struct.pack(">I4s", 8 + len(payload), kind) + payload
+
+
+def make_mp4(path, duration=5.0, width=640, height=360, codec=b"avc1"):
+    """Write a minimal MP4 with ``mdat`` ahead of ``moov``."""
+    mvhd = _box(b"mvhd", struct.pack(">IIIII", 0, 0, 0, 1000, int(duration * 1000)) + bytes(80))
+    hdlr = _box(b"hdlr", bytes(8) + b"vide" + bytes(13))
+    entry = _box(codec, bytes(24) + struct.pack(">HH", width, height) + bytes(50))
+    stsd = _box(b"stsd", struct.pack(">II", 0, 1) + entry)
+    minf = _box(b"minf", _box(b"stbl", stsd))
+    trak = _box(b"trak", _box(b"tkhd", bytes(84)) + _box(b"mdia", hdlr + minf))
+    with open(path, "wb") as f:
+        f.write(_box(b"ftyp", b"isom\0\0\0\0isom"))
+        f.write(_box(b"mdat", bytes(4096)))
+        f.write(_box(b"moov", mvhd + trak))
+
+
+def _element(element_id: int, payload: bytes) -> bytes:
+    id_bytes = element_id.to_bytes((element_id.bit_length() + 7) // 8, "big")
+    return id_bytes + (0x01 << 56 | len(payload)).to_bytes(8, "big") + payload
+
+
+def make_mkv(path, duration=5.0, width=1280, height=720, codec_id=b"V_VP9"):
+    """Write a minimal Matroska file with Info/Tracks behind the first cluster."""
+    header = _element(0x1A45DFA3, _element(0x4282, b"webm"))
+    info = _element(0x1549A966, _element(0x2AD7B1, (1_000_000).to_bytes(3, "big"))
+                    + _element(0x4489, struct.pack(">d", duration * 1000)))
+    video = _element(0xE0, _element(0xB0, width.to_bytes(2, "big"))
+                     + _element(0xBA, height.to_bytes(2, "big")))
+    tracks = _element(0x1654AE6B, _element(0xAE, _element(0x83, b"\x01")
+                                           + _element(0x86, codec_id) + video))
+    cluster = _element(0x1F43B675, bytes(4096))
+
+    def seekhead(info_pos, tracks_pos):
+        def seek(target, pos):
+            return _element(0x4DBB, _element(0x53AB, target.to_bytes(4, "big"))
+                            + _element(0x53AC, pos.to_bytes(8, "big")))
+        return _element(0x114D9B74, seek(0x1549A966, info_pos) + seek(0x1654AE6B, tracks_pos))
+
+    size = len(seekhead(0, 0))
+    body = seekhead(size + len(cluster), size + len(cluster) + len(info)) + cluster + info + tracks
+    with open(path, "wb") as f:
+        f.write(header + _element(0x18538067, body))
+
+
+def test_probe_mp4_after_mdat(tmp_path):
+    path = tmp_path / "clip.mp4"
+    make_mp4(path, duration=12.5, width=1920, height=1080)
+    data = probe_container(str(path))
+    assert float(data["format"]["duration"]) == 12.5
+    assert data["streams"] == [{"codec_name": "h264", "width": 1920, "height": 1080}]
+
+
+def test_probe_matroska_via_seekhead(tmp_path):
+    path = tmp_path / "clip.webm"
+    make_mkv(path, duration=3.25)
+    data = probe_container(str(path))
+    assert float(data["format"]["duration"]) == 3.25
+    assert data["streams"] == [{"codec_name": "vp9", "width": 1280, "height": 720}]
+
+
+def test_probe_unknown_layouts_fall_back(tmp_path):
+    unknown_codec = tmp_path / "clip.mov"
+    make_mp4(unknown_codec, codec=b"xyz1")
+    garbage = tmp_path / "clip.avi"
+    garbage.write_bytes(b"RIFF" + bytes(64))
+    assert probe_container(str(unknown_codec)) is None
+    assert probe_container(str(garbage)) is None
+    assert probe_container(str(tmp_path / "missing.mp4")) is None
+
+
+def test_get_video_metadata_uses_header_parser(tmp_path):
+    path = tmp_path / "clip.mp4"
+    make_mp4(path, duration=2.0, width=640, height=360)
+    meta = VideoProcessor().get_video_metadata(str(path))
+    assert meta["duration"] == 2.0
+    assert meta["resolution"] == "640x360"
+    assert meta["codec"] == "h264"
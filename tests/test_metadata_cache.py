@@ -0,0 +1,56 @@
+import os
+
+from tests.test_media_probe import make_mp4
+from utils.metadata_cache import MetadataCache
+from utils.video_processor import VideoProcessor
+
+
+def test_cache_persists_and_invalidates_on_change(tmp_path):
+    db = str(tmp_path / "cache.db")
+    path = tmp_path / "clip.mp4"
+    make_mp4(path, duration=4.0)
+
+    cache = MetadataCache(db)
+    assert VideoProcessor(cache).get_video_metadata(str(path))["duration"] == 4.0
+    cache.close()
+
+    # A new process sees the stored entry without re-probing.
+    cache = MetadataCache(db)
+    calls = []
+    value = cache.get_or_compute(str(path), "metadata", lambda: calls.append(1))
+    assert value["duration"] == 4.0 and not calls
+
+    make_mp4(path, duration=9.0)
+    os.utime(path, ns=(0, 12345))
+    assert VideoProcessor(cache).get_video_metadata(str(path))["duration"] == 9.0
+    assert cache.stats()["misses"] == 1
+
+
+def test_cache_is_bounded_lru(tmp_path):
+    cache = MetadataCache(max_entries=2)
+    ident = MetadataCache.identity
+    paths = []
+    for i in range(3):
+        path = tmp_path / f"f{i}"
+        path.write_bytes(b"x" * i)
+        paths.append(str(path))
+    cache.put(ident(paths[0]), "score", 0.1)
+    cache.put(ident(paths[1]), "score", 0.2)
+    assert cache.get(ident(paths[0]), "score") == 0.1
+    cache.put(ident(paths[2]), "score", 0.3)
+    assert cache.get(ident(paths[1]), "score") is None
+    assert cache.get(ident(paths[0]), "score") == 0.1
+    assert cache.stats()["entries"] == 2
+    assert cache.stats()["evictions"] == 1
+
+
+def test_failed_probe_is_not_cached(tmp_path):
+    cache = MetadataCache()
+    path = tmp_path / "empty.mp4"
+    path.write_bytes(b"")
+    vp = VideoProcessor(cache)
+    try:
+        assert vp.get_video_metadata(str(path)) == {}
+    except FileNotFoundError:
+        pass  # ffprobe not installed
+    assert cache.stats()["entries"] == 0
@@ -0,0 +1,79 @@
+import asyncio
+import time
+
+import pytest
+
+from utils.retry import CircuitBreaker, CircuitOpenError, RetryPolicy, is_retryable
+
+
+def test_backoff_is_capped_and_jittered():
+    policy = RetryPolicy(base_delay=1.0, max_delay=5.0, jitter=False)
+    assert [policy.delay(n) for n in range(5)] == [1.0, 2.0, 4.0, 5.0, 5.0]
+    jittered = RetryPolicy(base_delay=1.0, max_delay=5.0)
+    assert all(0 <= jittered.delay(3) <= 5.0 for _ in range(100))
+
+
+def test_run_async_retries_transient_errors():
+    policy = RetryPolicy(attempts=3, base_delay=0.0)
+    calls = []
+
+    async def flaky():
+        calls.append(1)
+        if len(calls) < 3:
+            raise ConnectionError("boom")
+        return "ok"
+
+    assert asyncio.run(policy.run_async(flaky)) == "ok"
+    assert policy.stats() == {"calls": 1, "retries": 2, "failures": 0}
+
+
+def test_permanent_errors_are_not_retried():
+    class NotFound(Exception):
+        status = 404
+
+    policy = RetryPolicy(attempts=5, base_delay=0.0)
+    calls = []
+
+    def missing():
+        calls.append(1)
+        raise NotFound()
+
+    with pytest.raises(NotFound):
+        policy.run(missing)
+    assert len(calls) == 1
+    assert not is_retryable(CircuitOpenError("open"))
+
+
+def test_circuit_breaker_opens_and_half_opens():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+
+    time.sleep(0.06)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow()
+    assert not breaker.allow()  # only one trial request
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_async_client_fails_fast_on_dead_gateway():
+    from utils.ipfs_client import AsyncIPFSClient
+
+    async def _run():
+        async with AsyncIPFSClient(
+            "http://127.0.0.1:1",
+            retry_policy=RetryPolicy(attempts=2, base_delay=0.0),
+            breaker_threshold=2,
+        ) as client:
+            assert await client.get_file_info("cid") is None
+            with pytest.raises(CircuitOpenError):
+                await client.download_file("cid", "/nonexistent/out")
+            return client.stats()
+
+    stats = asyncio.run(_run())
+    assert stats["breakers"]["http://127.0.0.1:1"]["state"] == CircuitBreaker.OPEN
+    assert stats["retry"]["retries"] == 1
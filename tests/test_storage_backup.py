@@ -0,0 +1,54 @@
+import os
+
+from utils.storage_backup import list_snapshots, load_manifest, main, prune, restore
+from utils.storage_manager import StorageManager
+
+
+def _store(sm, tmp_path, name, data):
+    src = tmp_path / "src"
+    src.write_bytes(data)
+    return sm.store_file(str(src), name=name)
+
+
+def test_incremental_backup_and_point_in_time_restore(tmp_path):
+    sm = StorageManager(str(tmp_path / "storage"))
+    backup_dir = str(tmp_path / "backup")
+    _store(sm, tmp_path, "a.mp4", b"a1")
+    _store(sm, tmp_path, "nested/b.mp4", b"b1")
+
+    first = sm.backup(backup_dir)
+    assert first["copied"] == 2
+
+    second = sm.backup(backup_dir)
+    assert second["copied"] == 0 and second["files"] == first["files"]
+
+    path = _store(sm, tmp_path, "a.mp4", b"a2-changed")
+    os.utime(path, ns=(0, 10**18))
+    sm.delete_file("nested/b.mp4")
+    third = sm.backup(backup_dir)
+    assert third["copied"] == 1 and sorted(third["files"]) == ["a.mp4"]
+
+    snapshots = list_snapshots(backup_dir)
+    assert len(snapshots) == 3
+    old = StorageManager(str(tmp_path / "restored"))
+    assert restore(backup_dir, old, snapshots[0]) == 2
+    assert open(old.get_file("a.mp4"), "rb").read() == b"a1"
+    assert open(old.get_file("nested/b.mp4"), "rb").read() == b"b1"
+
+    assert prune(backup_dir, keep=1) == 2
+    assert list_snapshots(backup_dir) == snapshots[-1:]
+    latest = StorageManager(str(tmp_path / "latest"))
+    assert restore(backup_dir, latest) == 1
+    assert open(latest.get_file("a.mp4"), "rb").read() == b"a2-changed"
+
+
+def test_content_addressed_backup_copies_each_object_once(tmp_path, capsys):
+    sm = StorageManager(str(tmp_path / "storage"), content_addressed=True)
+    _store(sm, tmp_path, "a.mp4", b"same")
+    _store(sm, tmp_path, "b.mp4", b"same")
+    sm.close()
+
+    main(["backup", str(tmp_path / "storage"), str(tmp_path / "backup")])
+    assert "2 files, 1 copied" in capsys.readouterr().out
+    manifest = load_manifest(str(tmp_path / "backup"))
+    assert manifest["files"]["a.mp4"]["path"] == manifest["files"]["b.mp4"]["path"]
@@ -1,3 +1,6 @@
+import os
+import sqlite3
+
 from utils.storage_manager import StorageManager
 
 
@@ -10,3 +13,266 @@ def test_store_and_retrieve(tmp_path):
     assert sm.get_file(src.name) == stored
     sm.delete_file(src.name)
     assert sm.get_file(src.name) is None
+
+
+def test_index_survives_restart_and_reconciles(tmp_path):
+    root = tmp_path / "storage"
+    sm = StorageManager(str(root), max_size=10)
+    for name in ("a", "b"):
+        src = tmp_path / name
+        src.write_bytes(b"x" * 4)
+        sm.store_file(str(src))
+    sm.get_file("a")
+    sm.close()
+
+    # Written behind the manager's back while it was down.
+    (root / "c").write_bytes(b"y" * 4)
+    os.utime(root / "c", (1, 1))
+    (root / "b").unlink()
+
+    sm = StorageManager(str(root), max_size=10)
+    assert list(sm.metadata) == ["c", "a"]
+    assert sm.metadata["c"]["adopted"]
+    assert sm.storage_size() == 8
+
+    src = tmp_path / "d"
+    src.write_bytes(b"z" * 4)
+    sm.store_file(str(src))
+    # "c" was only seen on disk, so it is older than every tracked access.
+    assert list(sm.metadata) == ["a", "d"]
+    assert not (root / "c").exists()
+    assert sm.stats() == {"count": 2, "size": 8}
+    sm.close()
+    assert sorted(StorageManager(str(root), reconcile=False).metadata) == ["a", "d"]
+
+
+def test_ingest_modes(tmp_path):
+    sm = StorageManager(str(tmp_path / "storage"))
+    src = tmp_path / "src.bin"
+    src.write_bytes(b"v" * 100_000)
+
+    copied = sm.store_file(str(src), name="copy.bin")
+    linked = sm.store_file(str(src), name="link.bin", mode="link")
+    assert os.path.samefile(linked, src)
+    moved = sm.store_file(str(src), name="move.bin", mode="move")
+    assert not src.exists()
+    for path in (copied, linked, moved):
+        assert open(path, "rb").read() == b"v" * 100_000
+    assert sm.stats() == {"count": 3, "size": 300_000}
+    assert [f for f in os.listdir(sm.root) if f.endswith(".ingest")] == []
+
+
+def test_ingest_file_falls_back_to_kernel_copy(tmp_path, monkeypatch):
+    from utils import storage_manager
+
+    src = tmp_path / "src.bin"
+    src.write_bytes(os.urandom(3 * 1024 * 1024 + 7))
+    monkeypatch.setattr(storage_manager, "_clone", lambda src_fd, dst_fd: False)
+    method = storage_manager.ingest_file(str(src), str(tmp_path / "dest.bin"))
+    assert method in ("copy_file_range", "sendfile", "copy")
+    assert (tmp_path / "dest.bin").read_bytes() == src.read_bytes()
+
+
+def test_content_addressed_dedup_and_refcounts(tmp_path):
+    root = tmp_path / "storage"
+    sm = StorageManager(str(root), content_addressed=True)
+    src = tmp_path / "clip.mp4"
+    src.write_bytes(b"same bytes")
+    first = sm.store_file(str(src), name="a.mp4")
+    second = sm.store_file(str(src), name="b.mp4")
+    assert first == second
+    rel = os.path.relpath(first, root).split(os.sep)
+    assert rel[0] == "objects" and rel[1] == rel[3][:2] and rel[2] == rel[3][2:4]
+    assert sm.stats() == {"count": 2, "size": 10, "objects": 1}
+
+    sm.delete_file("a.mp4")
+    assert os.path.isfile(second)
+    sm.delete_file("b.mp4")
+    assert not os.path.exists(second)
+    assert sm.stats() == {"count": 0, "size": 0, "objects": 0}
+
+
+def test_content_addressed_reconcile_adopts_and_collects(tmp_path):
+    root = tmp_path / "storage"
+    sm = StorageManager(str(root), content_addressed=True)
+    src = tmp_path / "clip.mp4"
+    src.write_bytes(b"kept")
+    kept = sm.store_file(str(src), name="kept.mp4")
+    src.write_bytes(b"orphan")
+    orphan = sm.store_file(str(src), name="orphan.mp4")
+    sm.close()
+
+    # Lost from the index (e.g. a crash before commit), plus a flat file.
+    conn = sqlite3.connect(str(root / ".index.sqlite3"))
+    with conn:
+        conn.execute("DELETE FROM files WHERE name='orphan.mp4'")
+    conn.close()
+    (root / "loose.mp4").write_bytes(b"kept")
+
+    sm = StorageManager(str(root), content_addressed=True)
+    assert not os.path.exists(orphan)
+    assert not (root / "loose.mp4").exists()
+    assert sm.get_file("loose.mp4") == kept
+    assert sm.metadata["loose.mp4"]["adopted"]
+    assert sm.stats() == {"count": 2, "size": 4, "objects": 1}
+
+
+def test_reconcile_skips_partial_downloads(tmp_path):
+    for content_addressed in (False, True):
+        root = tmp_path / str(content_addressed)
+        root.mkdir()
+        (root / "cid.mp4.part").write_bytes(b"half")
+        (root / "cid.mp4.part.progress").write_text("{}")
+        (root / ".cid.mp4.part").write_bytes(b"half")
+        sm = StorageManager(str(root), content_addressed=content_addressed)
+        assert sm.stats()["count"] == 0
+        assert (root / "cid.mp4.part").read_bytes() == b"half"
+        assert (root / "cid.mp4.part.progress").exists()
+        sm.close()
+
+
+def test_access_times_are_written_back_in_batches(tmp_path):
+    root = tmp_path / "storage"
+    sm = StorageManager(str(root), flush_interval=3600, flush_batch=2)
+    for name in ("a", "b"):
+        src = tmp_path / name
+        src.write_text(name)
+        sm.store_file(str(src))
+
+    def _indexed():
+        with sqlite3.connect(sm.index_path) as conn:
+            return dict(conn.execute("SELECT name, last_access FROM files"))
+
+    stored = _indexed()
+    sm.get_file("a")
+    assert _indexed() == stored
+    sm.get_file("b")
+    flushed = _indexed()
+    assert flushed["a"] > stored["a"] and flushed["b"] > stored["b"]
+    sm.get_file("a")
+    sm.close()
+    assert _indexed()["a"] == sm.metadata["a"]["last_access"]
+
+
+def test_leased_files_are_not_evicted(tmp_path):
+    sm = StorageManager(str(tmp_path / "storage"), max_size=100)
+    src = tmp_path / "src"
+    for name, size in (("a", 60), ("b", 30), ("c", 30)):
+        src.write_bytes(b"x" * size)
+        if name == "c":
+            with sm.lease("a") as path:
+                sm.store_file(str(src), name=name)
+                assert open(path, "rb").read() == b"x" * 60
+        else:
+            sm.store_file(str(src), name=name)
+    assert sorted(sm.metadata) == ["a", "c"]
+
+    with sm.lease("a"), sm.lease("c"):
+        sm.max_size = 10
+        src.write_bytes(b"y" * 5)
+        sm.store_file(str(src), name="d")
+        # Only the unpinned file could go; the rest waits for the leases.
+        assert sorted(sm.metadata) == ["a", "c"]
+    assert sm.metadata == {} and sm.storage_size() == 0
+    assert sm.lease("missing").__enter__() is None
+
+    src.write_bytes(b"w" * 5)
+    sm.max_size = 100
+    sm.store_file(str(src), name="e")
+    with sm.lease("e") as path:
+        sm.delete_file("e")
+        assert sm.get_file("e") is None
+        assert open(path, "rb").read() == b"w" * 5
+    assert not os.path.exists(path) and sm.storage_size() == 0
+
+
+def test_lease_survives_delete_and_restore(tmp_path):
+    for content_addressed in (False, True):
+        root = tmp_path / str(content_addressed)
+        sm = StorageManager(str(root), content_addressed=content_addressed)
+        src = tmp_path / "src.mp4"
+        src.write_bytes(b"old")
+        sm.store_file(str(src), name="v.mp4")
+        with sm.lease("v.mp4") as path:
+            with open(path, "rb") as reader:
+                sm.delete_file("v.mp4")
+                src.write_bytes(b"newer")
+                new_path = sm.store_file(str(src), name="v.mp4")
+                assert sm.get_file("v.mp4") == new_path
+                assert reader.read() == b"old"
+            if content_addressed:
+                # Objects are immutable: the leased path still holds the old bytes.
+                assert open(path, "rb").read() == b"old"
+                src.write_bytes(b"newest")
+                sm.store_file(str(src), name="v.mp4")
+                assert open(path, "rb").read() == b"old"
+        assert open(sm.get_file("v.mp4"), "rb").read() == (
+            b"newest" if content_addressed else b"newer"
+        )
+        assert sm.storage_size() == os.path.getsize(sm.get_file("v.mp4"))
+        if content_addressed:
+            assert not os.path.exists(path) and sm.stats()["objects"] == 1
+        sm.close()
+
+
+def test_concurrent_store_get_delete_keeps_accounting(tmp_path):
+    import random
+    import threading
+
+    sm = StorageManager(str(tmp_path / "storage"), max_size=20_000)
+
+    def worker(seed):
+        rng = random.Random(seed)
+        src = tmp_path / f"src{seed}"
+        for _ in range(150):
+            name = f"f{rng.randrange(40)}"
+            op = rng.random()
+            if op < 0.5:
+                src.write_bytes(b"z" * rng.randrange(100, 2000))
+                sm.store_file(str(src), name=name)
+            elif op < 0.8:
+                with sm.lease(name) as path:
+                    if path is not None:
+                        assert os.path.getsize(path) >= 100
+            else:
+                sm.delete_file(name)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    on_disk = {
+        e.name: e.stat().st_size for e in os.scandir(sm.root) if not e.name.startswith(".")
+    }
+    assert on_disk == {name: meta["size"] for name, meta in sm.metadata.items()}
+    assert sm.storage_size() == sum(on_disk.values()) <= 20_000
+
+
+def test_async_facade(tmp_path):
+    import asyncio
+
+    from utils.storage_manager import AsyncStorageManager
+
+    storage = AsyncStorageManager(
+        StorageManager(str(tmp_path / "storage"), content_addressed=True)
+    )
+    sources = []
+    for i in range(10):
+        src = tmp_path / f"src{i}.mp4"
+        src.write_bytes(b"video %d" % (i % 3))
+        sources.append(src)
+
+    async def _run():
+        await asyncio.gather(
+            *(storage.store_file(str(src), name=src.name, mode="move") for src in sources)
+        )
+        async with storage.lease("src4.mp4") as path:
+            assert open(path, "rb").read() == b"video 1"
+        await storage.delete_file("src4.mp4")
+        return await storage.get_file("src4.mp4")
+
+    assert asyncio.run(_run()) is None
+    assert storage.stats() == {"count": 9, "size": 21, "objects": 3}
+    assert not any(src.exists() for src in sources)
@@ -0,0 +1,153 @@
+import asyncio
+import os
+import threading
+import time
+
+from utils.storage_manager import StorageManager
+from utils.tiered_storage import TieredStorage
+
+
+def _tiers(tmp_path, **kwargs):
+    hot = StorageManager(str(tmp_path / "hot"), max_size=100)
+    cold = StorageManager(str(tmp_path / "cold"))
+    return TieredStorage(hot, cold, **kwargs)
+
+
+def _store(tiers, tmp_path, name, data):
+    src = tmp_path / "src"
+    src.write_bytes(data)
+    return tiers.store_file(str(src), name=name)
+
+
+def test_hot_eviction_demotes_to_cold(tmp_path):
+    tiers = _tiers(tmp_path)
+    _store(tiers, tmp_path, "a", b"a" * 60)
+    _store(tiers, tmp_path, "b", b"b" * 60)
+    assert tiers.tier_of("a") == "cold"
+    assert tiers.tier_of("b") == "hot"
+    assert open(tiers.get_file("a"), "rb").read() == b"a" * 60
+    # Too big for the hot tier at all: lands in cold.
+    big = _store(tiers, tmp_path, "huge", b"h" * 200)
+    assert tiers.tier_of("huge") == "cold" and open(big, "rb").read() == b"h" * 200
+
+
+def test_cold_reads_promote_in_background(tmp_path):
+    tiers = _tiers(tmp_path, promote_hits=1.5)
+    _store(tiers, tmp_path, "a", b"a" * 60)
+    _store(tiers, tmp_path, "b", b"b" * 60)
+
+    async def _read():
+        first = tiers.get_file("a")
+        second = tiers.get_file("a")
+        # Served from cold without waiting for the promotion.
+        assert first == second == tiers.cold.get_storage_path("a")
+        await tiers.drain()
+
+    asyncio.run(_read())
+    assert tiers.tier_of("a") == "hot"
+    assert tiers.tier_of("b") == "cold"
+    assert open(tiers.get_file("a"), "rb").read() == b"a" * 60
+    assert tiers.stats()["promoted"] == 1
+
+
+def test_rebalance_demotes_idle_and_promotes_popular(tmp_path):
+    tiers = _tiers(tmp_path, demote_after=0, promote_hits=2.5)
+    _store(tiers, tmp_path, "a", b"a" * 40)
+    _store(tiers, tmp_path, "b", b"b" * 40)
+    assert tiers.rebalance() == {"demoted": 2, "promoted": 0}
+    assert tiers.hot.storage_size() == 0
+    for _ in range(3):
+        tiers.get_file("b")
+    tiers.demote_after = 3600
+    assert tiers.rebalance() == {"demoted": 0, "promoted": 1}
+    assert tiers.tier_of("b") == "hot"
+
+
+def test_oversized_file_goes_straight_to_cold(tmp_path):
+    tiers = _tiers(tmp_path)
+    for name in ("a", "b", "c"):
+        _store(tiers, tmp_path, name, name.encode() * 30)
+    big = _store(tiers, tmp_path, "huge", b"h" * 200)
+    assert big == tiers.cold.get_storage_path("huge")
+    assert [tiers.tier_of(n) for n in ("a", "b", "c", "huge")] == ["hot"] * 3 + ["cold"]
+    assert tiers.stats()["demoted"] == 0
+
+
+def test_demotion_copies_outside_the_locks(tmp_path):
+    tiers = _tiers(tmp_path)
+    _store(tiers, tmp_path, "a", b"a" * 60)
+    free = []
+    store = tiers.cold.store_file
+
+    def _probe():
+        for lock in (tiers.hot._lock, tiers._lock):
+            acquired = lock.acquire(blocking=False)
+            free.append(acquired)
+            if acquired:
+                lock.release()
+
+    def _spy(*args, **kwargs):
+        # Storing into cold hashes and copies; neither hot's lock nor the
+        # tier lock may be held meanwhile.
+        probe = threading.Thread(target=_probe)
+        probe.start()
+        probe.join()
+        return store(*args, **kwargs)
+
+    tiers.cold.store_file = _spy
+    _store(tiers, tmp_path, "b", b"b" * 60)
+    assert tiers.tier_of("a") == "cold" and open(tiers.get_file("a"), "rb").read() == b"a" * 60
+    assert free == [True, True]
+    assert not [f for f in os.listdir(tiers.hot.root) if f.startswith(".demote-")]
+
+
+def test_deleted_while_awaiting_demotion_stays_deleted(tmp_path):
+    tiers = _tiers(tmp_path)
+    _store(tiers, tmp_path, "a", b"a" * 60)
+    src = tmp_path / "src"
+    src.write_bytes(b"b" * 60)
+    # Storing through ``hot`` directly leaves the demotion of "a" pending.
+    tiers.hot.store_file(str(src), name="b")
+    assert tiers.tier_of("a") == "cold"
+    assert open(tiers.get_file("a"), "rb").read() == b"a" * 60
+    tiers.delete_file("a")
+    tiers._finish_demotions()
+    assert tiers.tier_of("a") is None and "a" not in tiers.cold.metadata
+
+
+def test_concurrent_reads_and_evicting_stores_do_not_deadlock(tmp_path):
+    tiers = _tiers(tmp_path, promote_hits=1e9)
+    names = [f"f{i}" for i in range(8)]
+    errors = []
+
+    def _writer(worker):
+        src = tmp_path / f"src{worker}"
+        try:
+            for round_ in range(30):
+                name = names[(worker + round_) % len(names)]
+                src.write_bytes(name.encode() * 10)
+                tiers.store_file(str(src), name=name)
+        except Exception as e:  # pragma: no cover - reported below
+            errors.append(e)
+
+    def _reader():
+        try:
+            for _ in range(300):
+                for name in names:
+                    tiers.get_file(name)
+        except Exception as e:  # pragma: no cover - reported below
+            errors.append(e)
+
+    threads = [threading.Thread(target=_writer, args=(w,)) for w in range(3)]
+    threads += [threading.Thread(target=_reader) for _ in range(3)]
+    for thread in threads:
+        thread.daemon = True
+        thread.start()
+    deadline = time.monotonic() + 20
+    for thread in threads:
+        thread.join(timeout=max(0, deadline - time.monotonic()))
+    assert not [t for t in threads if t.is_alive()], "tiered storage deadlocked"
+    assert errors == []
+    for name in names:
+        assert open(tiers.get_file(name), "rb").read() == name.encode() * 10
+    assert not [f for f in os.listdir(tiers.hot.root) if f.startswith(".demote-")]
@@ -0,0 +1,89 @@
+import asyncio
+
+import pytest
+
+from tests.test_video_processor import fake_ffmpeg  # noqa: F401 - fixture
+from utils.transcoder import (
+    PRIORITY_HIGH,
+    PRIORITY_LOW,
+    TranscodeJob,
+    TranscodeManager,
+)
+
+
+def _inputs(tmp_path, count):
+    paths = []
+    for i in range(count):
+        path = tmp_path / f"in{i}.avi"
+        path.write_bytes(b"raw")
+        paths.append(str(path))
+    return paths
+
+
+def test_priority_order_and_thread_limit(fake_ffmpeg, monkeypatch):
+    monkeypatch.setenv("FAKE_FFMPEG_DELAY", "0.05")
+    low, other_low, high = _inputs(fake_ffmpeg, 3)
+
+    async def run():
+        async with TranscodeManager(workers=1, threads_per_job=3) as manager:
+            jobs = [manager.submit(low, low + ".mp4", "1M", PRIORITY_LOW)]
+            while jobs[0].status != TranscodeJob.RUNNING:
+                await asyncio.sleep(0.01)
+            jobs.append(manager.submit(other_low, other_low + ".mp4", "1M", PRIORITY_LOW))
+            jobs.append(manager.submit(high, high + ".mp4", "1M", PRIORITY_HIGH))
+            results = [await manager.wait(job.job_id) for job in jobs]
+            return manager, jobs, results
+
+    manager, jobs, results = asyncio.run(run())
+    assert results == [True, True, True]
+    assert all(manager.status(j.job_id)["progress"] == 1.0 for j in jobs)
+    runs = (fake_ffmpeg / "ffmpeg.pid.args").read_text().splitlines()
+    # The first low job was already running; the high one jumps the queue.
+    assert [line.split()[2] for line in runs] == [low, high, other_low]
+    assert all("-threads 3" in line for line in runs)
+
+
+def test_full_queue_sheds_least_urgent(fake_ffmpeg, monkeypatch):
+    monkeypatch.setenv("FAKE_FFMPEG_DELAY", "30")
+    paths = _inputs(fake_ffmpeg, 4)
+
+    async def run():
+        async with TranscodeManager(workers=1, max_queue=1) as manager:
+            running = manager.submit(paths[0], paths[0] + ".mp4", "1M")
+            await asyncio.sleep(0.1)
+            low = manager.submit(paths[1], paths[1] + ".mp4", "1M", PRIORITY_LOW)
+            high = manager.submit(paths[2], paths[2] + ".mp4", "1M", PRIORITY_HIGH)
+            rejected = manager.submit(paths[3], paths[3] + ".mp4", "1M", PRIORITY_LOW)
+            assert running.status == TranscodeJob.RUNNING
+            assert manager.shed(PRIORITY_HIGH) == 1
+            assert manager.cancel(running.job_id)
+            assert await manager.wait(running.job_id) is False
+            return running, low, high, rejected, manager.stats()
+
+    running, low, high, rejected, stats = asyncio.run(run())
+    assert low.status == TranscodeJob.SHED
+    assert rejected.status == TranscodeJob.SHED
+    assert high.status == TranscodeJob.SHED
+    assert running.status == TranscodeJob.CANCELLED
+    assert stats["shed_total"] == 3
+
+
+def test_zero_queue_sheds_and_trimmed_jobs_can_be_awaited(fake_ffmpeg):
+    paths = _inputs(fake_ffmpeg, 3)
+
+    async def run():
+        async with TranscodeManager(workers=1, max_queue=0) as manager:
+            shed = manager.submit(paths[0], paths[0] + ".mp4", "1M")
+        async with TranscodeManager(workers=1, history=1) as manager:
+            first = manager.submit(paths[1], paths[1] + ".mp4", "1M")
+            assert await manager.wait(first.job_id) is True
+            manager.submit(paths[2], paths[2] + ".mp4", "1M")
+            assert first.job_id not in manager.jobs
+            trimmed = await manager.wait(first.job_id)
+            with pytest.raises(KeyError, match="unknown or expired"):
+                await manager.wait("missing")
+        return shed, trimmed
+
+    shed, trimmed = asyncio.run(run())
+    assert shed.status == TranscodeJob.SHED
+    assert trimmed is True
@@ -0,0 +1,58 @@
+import hashlib
+import os
+
+import pytest
+
+from utils.tree_hash import chunk_digests, resume_offset, tree_hash, tree_root, verify_chunks
+from utils.video_processor import VideoProcessor
+
+CHUNK = 64 * 1024
+
+
+@pytest.fixture
+def video(tmp_path):
+    path = tmp_path / "video.mp4"
+    path.write_bytes(os.urandom(5 * CHUNK + 123))
+    return path
+
+
+def test_tree_hash_matches_definition(video):
+    data = video.read_bytes()
+    leaves = [hashlib.sha256(data[i : i + CHUNK]).digest() for i in range(0, len(data), CHUNK)]
+    assert chunk_digests(str(video), CHUNK, workers=4) == leaves
+    expected = hashlib.sha256(f"sha256-tree:{CHUNK}:{len(data)}:".encode() + b"".join(leaves))
+    assert tree_hash(str(video), CHUNK) == expected.hexdigest()
+
+
+def test_tree_hash_empty_file(tmp_path):
+    empty = tmp_path / "empty.mp4"
+    empty.write_bytes(b"")
+    assert tree_hash(str(empty), CHUNK) == tree_root([], 0, CHUNK)
+
+
+def test_calculate_hash_modes(video):
+    vp = VideoProcessor()
+    assert vp.calculate_hash(str(video)) == hashlib.sha256(video.read_bytes()).hexdigest()
+    assert vp.calculate_hash(str(video), mode="tree") == tree_hash(str(video))
+    with pytest.raises(ValueError):
+        vp.calculate_hash(str(video), mode="md5")
+
+
+def test_verify_and_resume_partial_copy(video, tmp_path):
+    expected = chunk_digests(str(video), CHUNK)
+    data = video.read_bytes()
+    copy = tmp_path / "copy.mp4"
+
+    copy.write_bytes(data)
+    assert verify_chunks(str(copy), expected, CHUNK) == []
+    assert resume_offset(str(copy), expected, CHUNK) == len(data)
+
+    copy.write_bytes(data[: 3 * CHUNK + 10])
+    assert verify_chunks(str(copy), expected, CHUNK) == [3, 4, 5]
+    assert resume_offset(str(copy), expected, CHUNK) == 3 * CHUNK
+
+    damaged = bytearray(data)
+    damaged[CHUNK + 5] ^= 0xFF
+    copy.write_bytes(bytes(damaged))
+    assert verify_chunks(str(copy), expected, CHUNK) == [1]
+    assert resume_offset(str(tmp_path / "missing"), expected, CHUNK) == 0
@@ -1,7 +1,152 @@
+import asyncio
+import json
+import os
+import stat
+import sys
+import time
+
+import pytest
+
 from utils.video_processor import VideoProcessor
 
 
 def test_validate_format():
     vp = VideoProcessor()
     assert vp.validate_format("video.mp4", ["mp4", "mov"])
-    assert not vp.validate_format("video.avi", ["mp4"]) 
+    assert not vp.validate_format("video.avi", ["mp4"])
+
+
+FAKE_FFMPEG = """#!{python}
+import os, re, sys, time
+with open(os.environ["FAKE_FFMPEG_PID"], "w") as f:
+    f.write(str(os.getpid()))
+with open(os.environ["FAKE_FFMPEG_PID"] + ".args", "a") as f:
+    f.write(" ".join(sys.argv[1:]) + "\\n")
+if "rawvideo" in sys.argv:
+    # Emit one frame per requested timestamp, frame i filled with byte i.
+    vf = sys.argv[sys.argv.index("-vf") + 1]
+    scale = re.search(r"scale=(\\d+):(\\d+)", vf)
+    width, height = map(int, scale.groups()) if scale else (2, 2)
+    for i in range(vf.count("gte(t,")):
+        sys.stdout.buffer.write(bytes([i]) * (width * height * 3))
+    sys.exit(0)
+if "-var_stream_map" in sys.argv:
+    # HLS packaging: two segments and a playlist per variant.
+    out_dir = os.path.dirname(os.path.dirname(sys.argv[-1]))
+    for stream in sys.argv[sys.argv.index("-var_stream_map") + 1].split():
+        variant = os.path.join(out_dir, stream.split("name:")[1])
+        for i in range(2):
+            with open(os.path.join(variant, "segment_%05d.ts" % i), "wb") as f:
+                f.write(b"ts")
+        with open(os.path.join(variant, "index.m3u8"), "w") as f:
+            f.write("#EXTM3U\\n")
+    with open(os.path.join(out_dir, "master.m3u8"), "w") as f:
+        f.write("#EXTM3U\\n")
+    sys.exit(0)
+for second in range(int(os.environ.get("FAKE_FFMPEG_SECONDS", "3"))):
+    sys.stderr.write("frame=1 time=00:00:%05.2f bitrate=1k\\r" % (second + 1))
+    sys.stderr.flush()
+    time.sleep(float(os.environ.get("FAKE_FFMPEG_DELAY", "0")))
+open(sys.argv[-1], "wb").close()
+"""
+
+
+@pytest.fixture
+def fake_ffmpeg(tmp_path, monkeypatch):
+    """Put stand-in ffmpeg/ffprobe executables first on PATH."""
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    ffmpeg = bin_dir / "ffmpeg"
+    ffmpeg.write_text(FAKE_FFMPEG.format(python=sys.executable))
+    ffprobe = bin_dir / "ffprobe"
+    probe = {"format": {"duration": "3.0"}, "streams": [{"codec_name": "h264", "width": 2, "height": 2}]}
+    ffprobe.write_text(f"#!{sys.executable}\nprint({json.dumps(json.dumps(probe))})\n")
+    for exe in (ffmpeg, ffprobe):
+        exe.chmod(exe.stat().st_mode | stat.S_IEXEC)
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    monkeypatch.setenv("FAKE_FFMPEG_PID", str(tmp_path / "ffmpeg.pid"))
+    return tmp_path
+
+
+def _assert_killed(pid_file):
+    pid = int(pid_file.read_text())
+    deadline = time.time() + 5
+    while time.time() < deadline:
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return
+        time.sleep(0.05)
+    raise AssertionError(f"ffmpeg {pid} still running")
+
+
+def test_compress_video_async_streams_progress(fake_ffmpeg):
+    src = fake_ffmpeg / "in.avi"
+    src.write_bytes(b"raw")
+    out = fake_ffmpeg / "out.mp4"
+
+    async def run():
+        return [p async for p in VideoProcessor().compress_video_progress(str(src), str(out), "1M")]
+
+    progress = asyncio.run(run())
+    assert progress == [(1.0, 3.0), (2.0, 3.0), (3.0, 3.0)]
+    assert out.exists()
+
+
+def test_compress_video_async_timeout_kills_ffmpeg(fake_ffmpeg, monkeypatch):
+    monkeypatch.setenv("FAKE_FFMPEG_DELAY", "30")
+    src = fake_ffmpeg / "in.avi"
+    src.write_bytes(b"raw")
+
+    async def run():
+        return await VideoProcessor().compress_video_async(
+            str(src), str(fake_ffmpeg / "out.mp4"), "1M", timeout=0.5
+        )
+
+    started = time.monotonic()
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(run())
+    assert time.monotonic() - started < 5
+    _assert_killed(fake_ffmpeg / "ffmpeg.pid")
+
+
+def test_cancelled_compress_kills_ffmpeg(fake_ffmpeg, monkeypatch):
+    monkeypatch.setenv("FAKE_FFMPEG_DELAY", "30")
+    src = fake_ffmpeg / "in.avi"
+    src.write_bytes(b"raw")
+
+    async def run():
+        task = asyncio.ensure_future(
+            VideoProcessor().compress_video_async(str(src), str(fake_ffmpeg / "out.mp4"), "1M")
+        )
+        while not (fake_ffmpeg / "ffmpeg.pid").exists():
+            await asyncio.sleep(0.02)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(run())
+    _assert_killed(fake_ffmpeg / "ffmpeg.pid")
+
+
+def test_get_video_metadata_async_falls_back_to_ffprobe(fake_ffmpeg):
+    src = fake_ffmpeg / "in.avi"
+    src.write_bytes(b"RIFF" + bytes(32))
+    meta = asyncio.run(VideoProcessor().get_video_metadata_async(str(src), timeout=5))
+    assert meta["duration"] == 3.0
+    assert meta["resolution"] == "2x2"
+
+
+def test_extract_frames_single_pipe(fake_ffmpeg):
+    src = fake_ffmpeg / "in.avi"
+    src.write_bytes(b"RIFF" + bytes(32))
+    vp = VideoProcessor()
+
+    frames = vp.extract_frames(str(src), timestamps=[2.0, 0.5, 1.0], size=(4, 3))
+    assert frames.shape == (3, 3, 4, 3) and frames.dtype.name == "uint8"
+    assert [int(f.max()) for f in frames] == [0, 1, 2]
+    runs = (fake_ffmpeg / "ffmpeg.pid.args").read_text().splitlines()
+    assert len(runs) == 1 and "-ss 0.500000" in runs[0]
+
+    frames = asyncio.run(vp.extract_frames_async(str(src), count=5, timeout=5))
+    assert frames.shape == (5, 2, 2, 3)
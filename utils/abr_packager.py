@@ -0,0 +1,268 @@
+"""Adaptive-bitrate (HLS/DASH) packaging into ``StorageManager``."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import shutil
+import tempfile
+import time
+from typing import Dict, List, Optional, Sequence
+
+from .storage_manager import StorageManager
+from .video_processor import VideoProcessor, run_command
+
+# Renditions above the source height are dropped, never upscaled.
+DEFAULT_LADDER: List[Dict[str, object]] = [
+    {"name": "1080p", "height": 1080, "video_bitrate": "5000k", "audio_bitrate": "128k"},
+    {"name": "720p", "height": 720, "video_bitrate": "2800k", "audio_bitrate": "128k"},
+    {"name": "480p", "height": 480, "video_bitrate": "1400k", "audio_bitrate": "96k"},
+    {"name": "360p", "height": 360, "video_bitrate": "800k", "audio_bitrate": "64k"},
+]
+
+FORMATS = ("hls", "dash")
+
+
+def ladder_for(
+    source_width: int, source_height: int, ladder: Sequence[Dict[str, object]] = DEFAULT_LADDER
+) -> List[Dict[str, object]]:
+    """Return the rungs of ``ladder`` that fit the source, with widths.
+
+    A source smaller than every rung gets a single rendition at its own
+    size using the lowest rung's bitrates.
+    """
+    rungs = [dict(r) for r in ladder if int(r["height"]) <= source_height]
+    if not rungs:
+        lowest = min(ladder, key=lambda r: int(r["height"]))
+        rungs = [dict(lowest, name=f"{source_height}p", height=source_height)]
+    for rung in rungs:
+        # Even width keeping the source aspect ratio, as scale=-2:H does.
+        rung["width"] = int(round(source_width * int(rung["height"]) / source_height / 2)) * 2
+    return rungs
+
+
+def _ffmpeg_cmd(
+    input_path: str,
+    out_dir: str,
+    rungs: Sequence[Dict[str, object]],
+    fmt: str,
+    segment_duration: float,
+    audio: bool,
+) -> List[str]:
+    """One decode split into every rung; all encoders run in one process."""
+    count = len(rungs)
+    graph = f"[0:v]split={count}" + "".join(f"[s{i}]" for i in range(count))
+    for i, rung in enumerate(rungs):
+        graph += f";[s{i}]scale=-2:{rung['height']}[v{i}]"
+    cmd = ["ffmpeg", "-y", "-v", "error", "-i", input_path, "-filter_complex", graph]
+    for i, rung in enumerate(rungs):
+        bitrate = str(rung["video_bitrate"])
+        cmd += [
+            "-map",
+            f"[v{i}]",
+            f"-c:v:{i}",
+            "libx264",
+            f"-b:v:{i}",
+            bitrate,
+            f"-maxrate:v:{i}",
+            bitrate,
+            f"-bufsize:v:{i}",
+            bitrate,
+        ]
+    if audio:
+        for i, rung in enumerate(rungs):
+            cmd += ["-map", "0:a:0", f"-c:a:{i}", "aac", f"-b:a:{i}", str(rung["audio_bitrate"])]
+    # Keyframes on every segment boundary so all renditions switch cleanly.
+    cmd += [
+        "-preset",
+        "veryfast",
+        "-sc_threshold",
+        "0",
+        "-force_key_frames",
+        f"expr:gte(t,n_forced*{segment_duration})",
+    ]
+    if fmt == "hls":
+        streams = " ".join(
+            f"v:{i}" + (f",a:{i}" if audio else "") + f",name:{rung['name']}"
+            for i, rung in enumerate(rungs)
+        )
+        cmd += [
+            "-f",
+            "hls",
+            "-hls_time",
+            str(segment_duration),
+            "-hls_playlist_type",
+            "vod",
+            "-hls_flags",
+            "independent_segments",
+            "-hls_segment_filename",
+            os.path.join(out_dir, "%v", "segment_%05d.ts"),
+            "-master_pl_name",
+            "master.m3u8",
+            "-var_stream_map",
+            streams,
+            os.path.join(out_dir, "%v", "index.m3u8"),
+        ]
+    else:
+        cmd += [
+            "-f",
+            "dash",
+            "-seg_duration",
+            str(segment_duration),
+            "-use_template",
+            "1",
+            "-use_timeline",
+            "0",
+            "-init_seg_name",
+            "$RepresentationID$/init.m4s",
+            "-media_seg_name",
+            "$RepresentationID$/segment_$Number%05d$.m4s",
+            "-adaptation_sets",
+            "id=0,streams=v id=1,streams=a" if audio else "id=0,streams=v",
+            os.path.join(out_dir, "manifest.mpd"),
+        ]
+    return cmd
+
+
+class ABRPackager:
+    """Encode a bitrate ladder and store segments plus playlists.
+
+    Output for ``name`` lands in ``storage`` under ``<name>/``: the master
+    playlist (``master.m3u8`` or ``manifest.mpd``), one directory of
+    segments per rendition and a ``manifest.json`` describing them.
+
+    Each file is a separate entry in ``storage``, so a size-bounded store
+    could evict single segments and leave playlists pointing at nothing.
+    ``storage`` must therefore be unbounded (``max_size=0``); delete a
+    package as a whole with its manifest's ``files`` list. It must also
+    keep files at their names (``content_addressed=False``), since the
+    playlists refer to segments by relative path.
+    """
+
+    def __init__(
+        self,
+        storage: StorageManager,
+        video_processor: Optional[VideoProcessor] = None,
+        ladder: Sequence[Dict[str, object]] = DEFAULT_LADDER,
+        segment_duration: float = 4.0,
+        fmt: str = "hls",
+        timeout: Optional[float] = None,
+    ) -> None:
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown packaging format: {fmt}")
+        if storage.max_size:
+            raise ValueError("ABR packages need an unbounded store (max_size=0)")
+        if storage.content_addressed:
+            raise ValueError("ABR packages need a named store (content_addressed=False)")
+        self.storage = storage
+        self.video_processor = video_processor or VideoProcessor()
+        self.ladder = ladder
+        self.segment_duration = segment_duration
+        self.fmt = fmt
+        self.timeout = timeout
+
+    async def _has_audio(self, input_path: str) -> bool:
+        returncode, stdout, _ = await run_command(
+            [
+                "ffprobe",
+                "-v",
+                "error",
+                "-select_streams",
+                "a",
+                "-show_entries",
+                "stream=index",
+                "-of",
+                "json",
+                input_path,
+            ],
+            self.timeout,
+        )
+        return returncode == 0 and bool(json.loads(stdout or b"{}").get("streams"))
+
+    async def package(self, input_path: str, name: str, audio: Optional[bool] = None) -> dict:
+        """Package ``input_path`` and return its manifest.
+
+        ``audio=None`` probes the input for an audio stream. Raises
+        ``RuntimeError`` if ffmpeg fails; nothing is stored in that case.
+        """
+        meta = await self.video_processor.get_video_metadata_async(input_path, self.timeout)
+        try:
+            width, height = (int(v) for v in meta.get("resolution", "").split("x"))
+        except ValueError:
+            raise ValueError(f"Unknown resolution for {input_path}") from None
+        rungs = ladder_for(width, height, self.ladder)
+        if audio is None:
+            audio = await self._has_audio(input_path)
+
+        # Package next to the store so storing the output is a cheap move.
+        work_dir = tempfile.mkdtemp(prefix=".package-", dir=self.storage.root)
+        try:
+            for rung in rungs:
+                os.makedirs(os.path.join(work_dir, str(rung["name"])), exist_ok=True)
+            if self.fmt == "dash":
+                for i in range(len(rungs) * (2 if audio else 1)):
+                    os.makedirs(os.path.join(work_dir, str(i)), exist_ok=True)
+            cmd = _ffmpeg_cmd(input_path, work_dir, rungs, self.fmt, self.segment_duration, audio)
+            returncode, _, stderr = await run_command(cmd, self.timeout)
+            if returncode != 0:
+                raise RuntimeError(
+                    f"ffmpeg packaging failed: {stderr.decode(errors='replace').strip()}"
+                )
+            manifest = self._manifest(work_dir, name, rungs, meta, audio)
+            # Hashing (content-addressed stores) and renames run off the loop.
+            await asyncio.to_thread(self._store, work_dir, manifest)
+            return manifest
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    def _store(self, work_dir: str, manifest: dict) -> None:
+        name = manifest["name"]
+        for rel_path in manifest["files"]:
+            self.storage.store_file(
+                os.path.join(work_dir, rel_path), name=f"{name}/{rel_path}", mode="move"
+            )
+        manifest_path = os.path.join(work_dir, "manifest.json")
+        with open(manifest_path, "w") as f:
+            json.dump(manifest, f, indent=2)
+        self.storage.store_file(manifest_path, name=f"{name}/manifest.json", mode="move")
+
+    def _manifest(
+        self,
+        work_dir: str,
+        name: str,
+        rungs: Sequence[Dict[str, object]],
+        meta: dict,
+        audio: bool,
+    ) -> dict:
+        files = sorted(
+            os.path.relpath(os.path.join(root, f), work_dir).replace(os.sep, "/")
+            for root, _, names in os.walk(work_dir)
+            for f in names
+        )
+        renditions = []
+        for i, rung in enumerate(rungs):
+            prefix = f"{rung['name']}/" if self.fmt == "hls" else f"{i}/"
+            renditions.append(
+                {
+                    "name": rung["name"],
+                    "width": rung["width"],
+                    "height": rung["height"],
+                    "video_bitrate": rung["video_bitrate"],
+                    "audio_bitrate": rung["audio_bitrate"] if audio else None,
+                    "playlist": f"{prefix}index.m3u8" if self.fmt == "hls" else None,
+                    "segments": [f for f in files if f.startswith(prefix) and "segment_" in f],
+                }
+            )
+        return {
+            "name": name,
+            "format": self.fmt,
+            "master": "master.m3u8" if self.fmt == "hls" else "manifest.mpd",
+            "segment_duration": self.segment_duration,
+            "duration": meta.get("duration", 0.0),
+            "source_resolution": meta.get("resolution", ""),
+            "audio": audio,
+            "renditions": renditions,
+            "files": files,
+            "created_at": time.time(),
+        }
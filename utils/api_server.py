@@ -6,7 +6,7 @@ from fastapi.responses import JSONResponse
 
 from config.config import Config
 from utils.video_processor import VideoProcessor
-from utils.storage_manager import StorageManager
+from utils.storage_manager import AsyncStorageManager, StorageManager
 import os
 import tempfile
 
@@ -20,7 +20,10 @@ app.add_middleware(
 )
 
 video_processor = VideoProcessor()
-storage = StorageManager("api_storage", max_size=Config.MAX_STORAGE_SIZE)
+storage = StorageManager(
+    "api_storage", max_size=Config.MAX_STORAGE_SIZE, policy=Config.STORAGE_POLICY
+)
+async_storage = AsyncStorageManager(storage)
 
 
 @app.middleware("http")
@@ -72,11 +75,16 @@ async def rate_limit_middleware(request: Request, call_next):
 @app.post("/submit")
 async def submit_file(file: UploadFile = File(...)):
     """Handle video submission with basic validation and storage."""
-    ext = file.filename.split(".")[-1].lower()
+    # Never let the client pick a path inside the store.
+    name = os.path.basename((file.filename or "").replace("\\", "/"))
+    if not name or name.startswith("."):
+        return JSONResponse(status_code=400, content={"error": "invalid filename"})
+    ext = name.split(".")[-1].lower()
     if ext not in [fmt.lower() for fmt in Config.SUPPORTED_VIDEO_FORMATS]:
         return JSONResponse(status_code=400, content={"error": "unsupported format"})
 
-    fd, tmp_path = tempfile.mkstemp(suffix=f".{ext}")
+    # Spool inside the store so the final store_file is a rename.
+    fd, tmp_path = tempfile.mkstemp(suffix=f".{ext}", prefix=".upload-", dir=storage.root)
     with os.fdopen(fd, "wb") as buffer:
         buffer.write(await file.read())
 
@@ -88,9 +96,13 @@ async def submit_file(file: UploadFile = File(...)):
         os.remove(tmp_path)
         return JSONResponse(status_code=400, content={"error": "invalid video"})
 
-    stored_path = storage.store_file(tmp_path, name=file.filename)
-    os.remove(tmp_path)
-    return {"filename": file.filename, "path": stored_path}
+    try:
+        stored_path = await async_storage.store_file(tmp_path, name=name, mode="move")
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return {"filename": name, "path": stored_path}
 
 
 @app.get("/status")
@@ -0,0 +1,423 @@
+"""Eviction and admission policies for ``StorageManager`` plus a trace simulator.
+
+A policy tracks keys and their sizes in bytes and decides what to evict
+next; the caller owns the data and keeps evicting until it fits its
+budget. Every policy implements::
+
+    insert(key, size)   # key was stored (re-inserting replaces it)
+    access(key)         # key was read
+    remove(key)         # key was deleted by the caller
+    evict() -> key      # pick, forget and return the next victim
+
+Admission is part of eviction: W-TinyLFU may return the key that was
+just inserted, which rejects it.
+"""
+
+from __future__ import annotations
+
+import csv
+import heapq
+import itertools
+import zlib
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+
+class LRUPolicy:
+    """Least recently used first, regardless of size."""
+
+    def __init__(self, capacity: int = 0) -> None:
+        self.capacity = capacity
+        self._entries: OrderedDict[str, int] = OrderedDict()
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def insert(self, key: str, size: int) -> None:
+        self._entries[key] = size
+        self._entries.move_to_end(key)
+
+    def access(self, key: str) -> None:
+        if key in self._entries:
+            self._entries.move_to_end(key)
+
+    def remove(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+    def evict(self) -> Optional[str]:
+        if not self._entries:
+            return None
+        return self._entries.popitem(last=False)[0]
+
+
+class _HeapPolicy:
+    """Evicts the lowest priority; stale heap entries are skipped lazily."""
+
+    def __init__(self, capacity: int = 0) -> None:
+        self.capacity = capacity
+        self._priority: Dict[str, Tuple] = {}
+        self._sizes: Dict[str, int] = {}
+        self._heap: List[Tuple] = []
+        self._tick = itertools.count()
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._priority
+
+    def __len__(self) -> int:
+        return len(self._priority)
+
+    def _push(self, key: str, priority: Tuple) -> None:
+        self._priority[key] = priority
+        heapq.heappush(self._heap, (priority, key))
+        if len(self._heap) > 2 * len(self._priority) + 64:
+            self._heap = [(p, k) for k, p in self._priority.items()]
+            heapq.heapify(self._heap)
+
+    def remove(self, key: str) -> None:
+        self._priority.pop(key, None)
+        self._sizes.pop(key, None)
+
+    def evict(self) -> Optional[str]:
+        while self._heap:
+            priority, key = heapq.heappop(self._heap)
+            if self._priority.get(key) == priority:
+                self._evicted(priority)
+                self.remove(key)
+                return key
+        return None
+
+    def _evicted(self, priority: Tuple) -> None:
+        pass
+
+
+class SizeAwareLRUPolicy(_HeapPolicy):
+    """GreedyDual-Size: recency weighted by object size.
+
+    Each key has credit ``L + 1 / size``; the lowest credit is evicted and
+    ``L`` rises to it, so keys not touched since age out. With equal sizes
+    this is exactly LRU; otherwise one large cold object goes before many
+    small ones that were used about as recently.
+    """
+
+    def __init__(self, capacity: int = 0) -> None:
+        super().__init__(capacity)
+        self._inflation = 0.0
+
+    def _credit(self, key: str) -> Tuple:
+        return (self._inflation + 1.0 / max(1, self._sizes[key]), next(self._tick))
+
+    def insert(self, key: str, size: int) -> None:
+        self._sizes[key] = size
+        self._push(key, self._credit(key))
+
+    def access(self, key: str) -> None:
+        if key in self._priority:
+            self._push(key, self._credit(key))
+
+    def _evicted(self, priority: Tuple) -> None:
+        self._inflation = priority[0]
+
+
+class LFUPolicy(_HeapPolicy):
+    """Least frequently used first, least recently used among equals."""
+
+    def __init__(self, capacity: int = 0) -> None:
+        super().__init__(capacity)
+        self._counts: Dict[str, int] = {}
+
+    def insert(self, key: str, size: int) -> None:
+        self._sizes[key] = size
+        self._counts[key] = self._counts.get(key, 0) + 1
+        self._push(key, (self._counts[key], next(self._tick)))
+
+    def access(self, key: str) -> None:
+        if key in self._priority:
+            self._counts[key] += 1
+            self._push(key, (self._counts[key], next(self._tick)))
+
+    def remove(self, key: str) -> None:
+        super().remove(key)
+        self._counts.pop(key, None)
+
+
+class ARCPolicy:
+    """Adaptive Replacement Cache, with all lists measured in bytes.
+
+    ``T1`` holds keys seen once recently, ``T2`` keys seen at least twice.
+    Ghost lists ``B1``/``B2`` remember what was evicted from each; a miss
+    that hits a ghost shifts the target size ``p`` of ``T1`` towards the
+    list that would have kept it.
+    """
+
+    def __init__(self, capacity: int) -> None:
+        self.capacity = capacity
+        self.p = 0.0
+        self._t1: OrderedDict[str, int] = OrderedDict()
+        self._t2: OrderedDict[str, int] = OrderedDict()
+        self._b1: OrderedDict[str, int] = OrderedDict()
+        self._b2: OrderedDict[str, int] = OrderedDict()
+        self._bytes = {"t1": 0, "t2": 0, "b1": 0, "b2": 0}
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._t1 or key in self._t2
+
+    def __len__(self) -> int:
+        return len(self._t1) + len(self._t2)
+
+    def _add(self, name: str, key: str, size: int) -> None:
+        getattr(self, f"_{name}")[key] = size
+        self._bytes[name] += size
+
+    def _pop(self, name: str, key: Optional[str] = None) -> Tuple[str, int]:
+        entries: OrderedDict[str, int] = getattr(self, f"_{name}")
+        if key is None:
+            key, size = entries.popitem(last=False)
+        else:
+            size = entries.pop(key)
+        self._bytes[name] -= size
+        return key, size
+
+    def insert(self, key: str, size: int) -> None:
+        self.remove(key)
+        b1, b2 = self._bytes["b1"], self._bytes["b2"]
+        if key in self._b1:
+            self.p = min(self.capacity, self.p + max(size, size * b2 / max(1, b1)))
+            self._pop("b1", key)
+            self._add("t2", key, size)
+        elif key in self._b2:
+            self.p = max(0.0, self.p - max(size, size * b1 / max(1, b2)))
+            self._pop("b2", key)
+            self._add("t2", key, size)
+        else:
+            self._add("t1", key, size)
+        self._trim_ghosts()
+
+    def access(self, key: str) -> None:
+        if key in self._t1:
+            self._add("t2", *self._pop("t1", key))
+        elif key in self._t2:
+            self._t2.move_to_end(key)
+
+    def remove(self, key: str) -> None:
+        for name in ("t1", "t2"):
+            if key in getattr(self, f"_{name}"):
+                self._pop(name, key)
+
+    def evict(self) -> Optional[str]:
+        if self._t1 and (self._bytes["t1"] > self.p or not self._t2):
+            key, size = self._pop("t1")
+            self._add("b1", key, size)
+        elif self._t2:
+            key, size = self._pop("t2")
+            self._add("b2", key, size)
+        else:
+            return None
+        self._trim_ghosts()
+        return key
+
+    def _trim_ghosts(self) -> None:
+        while self._b1 and self._bytes["t1"] + self._bytes["b1"] > self.capacity:
+            self._pop("b1")
+        while self._b2 and sum(self._bytes.values()) > 2 * self.capacity:
+            self._pop("b2")
+
+
+class FrequencySketch:
+    """Count-Min sketch of 4-bit counters, halved periodically to age out
+    old popularity."""
+
+    def __init__(self, width: int = 1 << 16, depth: int = 4) -> None:
+        self.width = width
+        self._rows = [bytearray(width) for _ in range(depth)]
+        self._seeds = [0x9E3779B1 * (i + 1) for i in range(depth)]
+        self._additions = 0
+        self.sample_size = 10 * width
+
+    def _slots(self, key: str) -> Iterable[Tuple[bytearray, int]]:
+        h = zlib.crc32(key.encode())
+        for row, seed in zip(self._rows, self._seeds):
+            yield row, ((h ^ seed) * 0x85EBCA6B >> 7) % self.width
+
+    def increment(self, key: str) -> None:
+        for row, slot in self._slots(key):
+            if row[slot] < 15:
+                row[slot] += 1
+        self._additions += 1
+        if self._additions >= self.sample_size:
+            self._additions //= 2
+            for row in self._rows:
+                row[:] = bytes(c >> 1 for c in row)
+
+    def estimate(self, key: str) -> int:
+        return min(row[slot] for row, slot in self._slots(key))
+
+
+class WTinyLFUPolicy:
+    """W-TinyLFU: an LRU admission window in front of a segmented LRU.
+
+    New keys enter the window (``window_fraction`` of capacity). Keys
+    leaving the window only join the main cache if the frequency sketch
+    says they are more popular than the main cache's next victim, so a
+    burst of one-off uploads cannot flush out frequently read videos.
+    The main cache splits into probation and protected (80%) segments.
+    """
+
+    def __init__(
+        self,
+        capacity: int,
+        window_fraction: float = 0.01,
+        protected_fraction: float = 0.8,
+        sketch_width: int = 1 << 16,
+    ) -> None:
+        self.capacity = capacity
+        self.window_capacity = max(1, int(capacity * window_fraction))
+        self.main_capacity = capacity - self.window_capacity
+        self.protected_capacity = int(self.main_capacity * protected_fraction)
+        self.sketch = FrequencySketch(sketch_width)
+        self._window: OrderedDict[str, int] = OrderedDict()
+        self._probation: OrderedDict[str, int] = OrderedDict()
+        self._protected: OrderedDict[str, int] = OrderedDict()
+        self._window_bytes = 0
+        self._protected_bytes = 0
+        self._main_bytes = 0
+        self.rejected = 0
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._window or key in self._probation or key in self._protected
+
+    def __len__(self) -> int:
+        return len(self._window) + len(self._probation) + len(self._protected)
+
+    def insert(self, key: str, size: int) -> None:
+        self.remove(key)
+        self.sketch.increment(key)
+        self._window[key] = size
+        self._window_bytes += size
+
+    def access(self, key: str) -> None:
+        self.sketch.increment(key)
+        if key in self._window:
+            self._window.move_to_end(key)
+        elif key in self._protected:
+            self._protected.move_to_end(key)
+        elif key in self._probation:
+            size = self._probation.pop(key)
+            self._protected[key] = size
+            self._protected_bytes += size
+            while self._protected_bytes > self.protected_capacity and len(self._protected) > 1:
+                demoted, demoted_size = self._protected.popitem(last=False)
+                self._protected_bytes -= demoted_size
+                self._probation[demoted] = demoted_size
+
+    def remove(self, key: str) -> None:
+        if key in self._window:
+            self._window_bytes -= self._window.pop(key)
+        elif key in self._probation:
+            self._main_bytes -= self._probation.pop(key)
+        elif key in self._protected:
+            size = self._protected.pop(key)
+            self._protected_bytes -= size
+            self._main_bytes -= size
+
+    def _main_victim(self) -> Optional[str]:
+        for segment in (self._probation, self._protected):
+            if segment:
+                return next(iter(segment))
+        return None
+
+    def evict(self) -> Optional[str]:
+        while self._window_bytes > self.window_capacity and self._window:
+            candidate, size = self._window.popitem(last=False)
+            self._window_bytes -= size
+            victim = self._main_victim()
+            if victim is None or self._main_bytes + size <= self.main_capacity:
+                self._probation[candidate] = size
+                self._main_bytes += size
+                continue
+            if self.sketch.estimate(candidate) > self.sketch.estimate(victim):
+                self._probation[candidate] = size
+                self._main_bytes += size
+                self.remove(victim)
+                return victim
+            self.rejected += 1
+            return candidate
+        victim = self._main_victim()
+        if victim is None:
+            if not self._window:
+                return None
+            victim = next(iter(self._window))
+        self.remove(victim)
+        return victim
+
+
+POLICIES: Dict[str, Callable[[int], object]] = {
+    "lru": LRUPolicy,
+    "size-lru": SizeAwareLRUPolicy,
+    "lfu": LFUPolicy,
+    "arc": ARCPolicy,
+    "w-tinylfu": WTinyLFUPolicy,
+}
+
+
+def make_policy(name: str, capacity: int):
+    """Instantiate a policy from ``POLICIES`` by name."""
+    try:
+        return POLICIES[name](capacity)
+    except KeyError:
+        raise ValueError(f"Unknown eviction policy: {name}") from None
+
+
+def load_trace(path: str) -> List[Tuple[str, int]]:
+    """Read a ``key,size`` CSV access trace; extra columns are ignored."""
+    with open(path, newline="") as f:
+        return [
+            (row[0], int(row[1]))
+            for row in csv.reader(f)
+            if row and not row[0].startswith("#")
+        ]
+
+
+def simulate(trace: Iterable[Tuple[str, int]], policy, capacity: int) -> Dict[str, float]:
+    """Replay ``(key, size)`` requests through ``policy`` in a cache of
+    ``capacity`` bytes; a miss stores the key."""
+    sizes: Dict[str, int] = {}
+    used = requests = hits = bytes_requested = bytes_hit = 0
+    for key, size in trace:
+        requests += 1
+        bytes_requested += size
+        if key in sizes:
+            hits += 1
+            bytes_hit += size
+            policy.access(key)
+            continue
+        policy.insert(key, size)
+        sizes[key] = size
+        used += size
+        while used > capacity:
+            victim = policy.evict()
+            if victim is None:
+                break
+            used -= sizes.pop(victim)
+    return {
+        "requests": requests,
+        "hit_ratio": hits / requests if requests else 0.0,
+        "byte_hit_ratio": bytes_hit / bytes_requested if bytes_requested else 0.0,
+        "bytes_requested": bytes_requested,
+        "bytes_hit": bytes_hit,
+    }
+
+
+def compare_policies(
+    trace: Iterable[Tuple[str, int]],
+    capacity: int,
+    policies: Optional[Iterable[str]] = None,
+) -> Dict[str, Dict[str, float]]:
+    """Simulate each named policy on the same trace."""
+    trace = list(trace)
+    return {
+        name: simulate(trace, make_policy(name, capacity), capacity)
+        for name in (policies or POLICIES)
+    }
@@ -2,150 +2,334 @@
 
 from __future__ import annotations
 
+import asyncio
 import sqlite3
-from typing import Any
+import threading
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncIterator, Callable, Iterator, List, Optional
 import time
 
 
 class Database:
-    """Lightweight SQLite database wrapper."""
+    """Lightweight SQLite database wrapper with a thread-safe connection pool.
 
-    def __init__(self, db_path: str = "subnet89.db", pool_size: int = 5) -> None:
+    File databases run in WAL mode, so pooled readers never wait for the
+    writer. Writes go through one dedicated writer connection guarded by a
+    lock, which keeps writers from fighting over SQLite's single write
+    lock. Connections are opened with ``check_same_thread=False`` and may
+    be checked out from any thread or, via ``areader``/``awriter``, from
+    the event loop. An in-memory database cannot use WAL or be shared
+    between connections, so every checkout uses the writer connection.
+    """
+
+    def __init__(
+        self,
+        db_path: str = "subnet89.db",
+        pool_size: int = 5,
+        timeout: float = 30.0,
+        cache_size_kb: int = 16 * 1024,
+        mmap_size: int = 256 * 1024 * 1024,
+    ) -> None:
         self.db_path = db_path
-        self._pool: list[sqlite3.Connection] = [
-            sqlite3.connect(self.db_path) for _ in range(pool_size)
-        ]
+        self.pool_size = max(1, pool_size)
+        self.timeout = timeout
+        self.cache_size_kb = cache_size_kb
+        self.mmap_size = mmap_size
+        self._memory = db_path in ("", ":memory:")
+        self._cond = threading.Condition()
+        self._idle: List[sqlite3.Connection] = []
+        self._opened = 0
+        self._closed = False
+        self._writer_lock = threading.Lock()
+        self._writer = self._open()
+        if not self._memory:
+            self._writer.execute("PRAGMA journal_mode=WAL")
         self.migrate()
 
-    def connect(self) -> sqlite3.Connection:
-        """Get a database connection from the pool or create a new one."""
-        if self._pool:
-            return self._pool.pop()
-        return sqlite3.connect(self.db_path)
+    def _open(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=self.timeout, check_same_thread=False)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA cache_size=-{int(self.cache_size_kb)}")
+        conn.execute(f"PRAGMA mmap_size={int(self.mmap_size)}")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        return conn
+
+    def _acquire_writer(self, timeout: Optional[float]) -> sqlite3.Connection:
+        timeout = self.timeout if timeout is None else timeout
+        if not self._writer_lock.acquire(timeout=timeout):
+            raise TimeoutError(f"Timed out after {timeout}s waiting for the writer connection")
+        return self._writer
+
+    def connect(self, timeout: Optional[float] = None) -> sqlite3.Connection:
+        """Check out a pooled connection, blocking until one is free.
+
+        A new connection is opened while fewer than ``pool_size`` exist.
+        Raises ``TimeoutError`` after ``timeout`` seconds (default: the
+        pool's ``timeout``). Every checkout must be paired with ``release``.
+        """
+        if self._memory:
+            return self._acquire_writer(timeout)
+        timeout = self.timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise sqlite3.ProgrammingError("Database is closed")
+                if self._idle:
+                    return self._idle.pop()
+                if self._opened < self.pool_size:
+                    self._opened += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self._cond.wait(remaining):
+                    if not self._idle:
+                        raise TimeoutError(
+                            f"Timed out after {timeout}s waiting for a database connection"
+                        )
+        try:
+            return self._open()
+        except BaseException:
+            with self._cond:
+                self._opened -= 1
+                self._cond.notify()
+            raise
 
     def release(self, conn: sqlite3.Connection) -> None:
-        """Return a connection to the pool."""
-        self._pool.append(conn)
+        """Return a connection obtained from ``connect`` or the writer."""
+        if conn is self._writer:
+            if conn.in_transaction:
+                conn.rollback()
+            self._writer_lock.release()
+            return
+        if conn.in_transaction:
+            conn.rollback()
+        with self._cond:
+            if self._closed:
+                self._opened -= 1
+                conn.close()
+            else:
+                self._idle.append(conn)
+            self._cond.notify()
+
+    @contextmanager
+    def reader(self, timeout: Optional[float] = None) -> Iterator[sqlite3.Connection]:
+        """Check out a pooled connection for the duration of a block."""
+        conn = self.connect(timeout)
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    @contextmanager
+    def writer(self, timeout: Optional[float] = None) -> Iterator[sqlite3.Connection]:
+        """Hold the writer connection; commit on success, roll back on error."""
+        conn = self._acquire_writer(timeout)
+        try:
+            yield conn
+            conn.commit()
+        finally:
+            self.release(conn)
+
+    async def _checkout_async(
+        self, checkout: Callable[[Optional[float]], sqlite3.Connection], timeout: Optional[float]
+    ) -> sqlite3.Connection:
+        future = asyncio.ensure_future(asyncio.to_thread(checkout, timeout))
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            # The worker may still get a connection; hand it straight back.
+            future.add_done_callback(
+                lambda f: f.cancelled() or f.exception() or self.release(f.result())
+            )
+            raise
+
+    async def aconnect(self, timeout: Optional[float] = None) -> sqlite3.Connection:
+        """Like ``connect`` but waits in a worker thread, not the event loop."""
+        return await self._checkout_async(self.connect, timeout)
+
+    @asynccontextmanager
+    async def areader(self, timeout: Optional[float] = None) -> AsyncIterator[sqlite3.Connection]:
+        conn = await self.aconnect(timeout)
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    @asynccontextmanager
+    async def awriter(self, timeout: Optional[float] = None) -> AsyncIterator[sqlite3.Connection]:
+        conn = await self._checkout_async(self._acquire_writer, timeout)
+        try:
+            yield conn
+            conn.commit()
+        finally:
+            self.release(conn)
+
+    def stats(self) -> dict[str, Any]:
+        with self._cond:
+            return {
+                "pool_size": self.pool_size,
+                "open": self._opened,
+                "idle": len(self._idle),
+                "writer_busy": self._writer_lock.locked(),
+            }
 
     def close_all(self) -> None:
-        """Close all pooled connections."""
-        while self._pool:
-            self._pool.pop().close()
+        """Close idle connections and the writer.
+
+        Connections still checked out are closed when released.
+        """
+        with self._cond:
+            self._closed = True
+            while self._idle:
+                self._idle.pop().close()
+                self._opened -= 1
+            self._cond.notify_all()
+        with self._writer_lock:
+            self._writer.close()
 
     def create_tables(self) -> None:
         """Create database tables if they do not exist."""
-        conn = self.connect()
-        cur = conn.cursor()
-        cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS submissions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                submission_id TEXT UNIQUE,
-                ipfs_hash TEXT,
-                status TEXT,
-                created_at REAL
-            )
-            """
-        )
-        cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS engagement_metrics (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                post_id TEXT,
-                platform TEXT,
-                views INTEGER,
-                likes INTEGER,
-                comments INTEGER,
-                shares INTEGER,
-                timestamp REAL
-            )
-            """
-        )
-        cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS validation_results (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                submission_id TEXT,
-                validation_type TEXT,
-                result TEXT,
-                score REAL,
-                timestamp REAL
-            )
-            """
-        )
-        cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS social_posts (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                submission_id TEXT,
-                post_id TEXT,
-                platform TEXT,
-                valid INTEGER,
-                views INTEGER DEFAULT 0,
-                likes INTEGER DEFAULT 0,
-                comments INTEGER DEFAULT 0,
-                shares INTEGER DEFAULT 0,
-                timestamp REAL
-            )
-            """
-        )
-        conn.commit()
-        self.release(conn)
+        with self.writer() as conn:
+            cur = conn.cursor()
+            cur.execute(
+                """
+                CREATE TABLE IF NOT EXISTS submissions (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    submission_id TEXT UNIQUE,
+                    ipfs_hash TEXT,
+                    status TEXT,
+                    created_at REAL
+                )
+                """
+            )
+            cur.execute(
+                """
+                CREATE TABLE IF NOT EXISTS engagement_metrics (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    post_id TEXT,
+                    platform TEXT,
+                    views INTEGER,
+                    likes INTEGER,
+                    comments INTEGER,
+                    shares INTEGER,
+                    timestamp REAL
+                )
+                """
+            )
+            cur.execute(
+                """
+                CREATE TABLE IF NOT EXISTS validation_results (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    submission_id TEXT,
+                    validation_type TEXT,
+                    result TEXT,
+                    score REAL,
+                    timestamp REAL
+                )
+                """
+            )
+            cur.execute(
+                """
+                CREATE TABLE IF NOT EXISTS submission_claims (
+                    ipfs_hash TEXT PRIMARY KEY,
+                    hotkey TEXT,
+                    created_at REAL
+                )
+                """
+            )
+            cur.execute(
+                """
+                CREATE TABLE IF NOT EXISTS social_posts (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    submission_id TEXT,
+                    post_id TEXT,
+                    platform TEXT,
+                    valid INTEGER,
+                    views INTEGER DEFAULT 0,
+                    likes INTEGER DEFAULT 0,
+                    comments INTEGER DEFAULT 0,
+                    shares INTEGER DEFAULT 0,
+                    timestamp REAL
+                )
+                """
+            )
 
     def insert_submission(
         self, submission_id: str, ipfs_hash: str, status: str = "pending"
     ) -> None:
         """Insert a new submission record."""
-        conn = self.connect()
-        cur = conn.cursor()
-        cur.execute(
-            """
-            INSERT INTO submissions (submission_id, ipfs_hash, status, created_at)
-            VALUES (?, ?, ?, ?)
-            """,
-            (submission_id, ipfs_hash, status, time.time()),
-        )
-        conn.commit()
-        self.release(conn)
+        with self.writer() as conn:
+            cur = conn.cursor()
+            cur.execute(
+                """
+                INSERT INTO submissions (submission_id, ipfs_hash, status, created_at)
+                VALUES (?, ?, ?, ?)
+                """,
+                (submission_id, ipfs_hash, status, time.time()),
+            )
 
     def update_submission_status(self, submission_id: str, status: str) -> None:
         """Update the status of an existing submission."""
-        conn = self.connect()
-        cur = conn.cursor()
-        cur.execute(
-            "UPDATE submissions SET status = ? WHERE submission_id = ?",
-            (status, submission_id),
-        )
-        conn.commit()
-        self.release(conn)
+        with self.writer() as conn:
+            cur = conn.cursor()
+            cur.execute(
+                "UPDATE submissions SET status = ? WHERE submission_id = ?",
+                (status, submission_id),
+            )
 
     def get_pending_submissions(self) -> list[tuple[str, str]]:
         """Return list of (submission_id, ipfs_hash) for pending submissions."""
-        conn = self.connect()
-        cur = conn.cursor()
-        cur.execute(
-            "SELECT submission_id, ipfs_hash FROM submissions WHERE status = 'pending'"
-        )
-        rows = cur.fetchall()
-        self.release(conn)
+        with self.reader() as conn:
+            cur = conn.cursor()
+            cur.execute(
+                "SELECT submission_id, ipfs_hash FROM submissions WHERE status = 'pending'"
+            )
+            rows = cur.fetchall()
         return rows
 
+    def claim_submission(self, ipfs_hash: str, hotkey: Optional[str]) -> Optional[str]:
+        """Record ``hotkey`` as the first submitter of ``ipfs_hash``.
+
+        Returns the hotkey holding the claim afterwards, which differs from
+        ``hotkey`` when another miner got there first. An unknown (``None``)
+        claim is taken over by the first known hotkey.
+        """
+        with self.writer() as conn:
+            cur = conn.cursor()
+            cur.execute(
+                """
+                INSERT INTO submission_claims (ipfs_hash, hotkey, created_at)
+                VALUES (?, ?, ?)
+                ON CONFLICT(ipfs_hash) DO UPDATE SET hotkey = excluded.hotkey
+                WHERE submission_claims.hotkey IS NULL
+                """,
+                (ipfs_hash, hotkey, time.time()),
+            )
+            cur.execute("SELECT hotkey FROM submission_claims WHERE ipfs_hash = ?", (ipfs_hash,))
+            return cur.fetchone()[0]
+
+    def get_submission_claim(self, ipfs_hash: str) -> tuple[bool, Optional[str]]:
+        """Return ``(claimed, hotkey)`` for ``ipfs_hash``."""
+        with self.reader() as conn:
+            cur = conn.cursor()
+            cur.execute("SELECT hotkey FROM submission_claims WHERE ipfs_hash = ?", (ipfs_hash,))
+            row = cur.fetchone()
+        return (row is not None, row[0] if row else None)
+
     def insert_engagement_metrics(
         self, post_id: str, platform: str, views: int, likes: int, comments: int, shares: int
     ) -> None:
         """Store engagement metrics for a post."""
-        conn = self.connect()
-        cur = conn.cursor()
-        cur.execute(
-            """
-            INSERT INTO engagement_metrics (
-                post_id, platform, views, likes, comments, shares, timestamp
-            ) VALUES (?, ?, ?, ?, ?, ?, ?)
-            """,
-            (post_id, platform, views, likes, comments, shares, time.time()),
-        )
-        conn.commit()
-        self.release(conn)
+        with self.writer() as conn:
+            cur = conn.cursor()
+            cur.execute(
+                """
+                INSERT INTO engagement_metrics (
+                    post_id, platform, views, likes, comments, shares, timestamp
+                ) VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                (post_id, platform, views, likes, comments, shares, time.time()),
+            )
 
     def insert_social_post(
         self,
@@ -155,18 +339,16 @@ class Database:
         valid: bool,
     ) -> None:
         """Insert a verified social post."""
-        conn = self.connect()
-        cur = conn.cursor()
-        cur.execute(
-            """
-            INSERT INTO social_posts (
-                submission_id, post_id, platform, valid, timestamp
-            ) VALUES (?, ?, ?, ?, ?)
-            """,
-            (submission_id, post_id, platform, int(valid), time.time()),
-        )
-        conn.commit()
-        self.release(conn)
+        with self.writer() as conn:
+            cur = conn.cursor()
+            cur.execute(
+                """
+                INSERT INTO social_posts (
+                    submission_id, post_id, platform, valid, timestamp
+                ) VALUES (?, ?, ?, ?, ?)
+                """,
+                (submission_id, post_id, platform, int(valid), time.time()),
+            )
 
     def update_social_metrics(
         self,
@@ -178,65 +360,58 @@ class Database:
         shares: int,
     ) -> None:
         """Update engagement metrics for a post."""
-        conn = self.connect()
-        cur = conn.cursor()
-        cur.execute(
-            """
-            UPDATE social_posts
-            SET views = ?, likes = ?, comments = ?, shares = ?
-            WHERE post_id = ? AND platform = ?
-            """,
-            (views, likes, comments, shares, post_id, platform),
-        )
-        conn.commit()
-        self.release(conn)
+        with self.writer() as conn:
+            cur = conn.cursor()
+            cur.execute(
+                """
+                UPDATE social_posts
+                SET views = ?, likes = ?, comments = ?, shares = ?
+                WHERE post_id = ? AND platform = ?
+                """,
+                (views, likes, comments, shares, post_id, platform),
+            )
 
     def get_submission_history(self, limit: int = 100) -> list[tuple]:
         """Retrieve recent submission records."""
-        conn = self.connect()
-        cur = conn.cursor()
-        cur.execute(
-            "SELECT submission_id, ipfs_hash, status, created_at FROM submissions ORDER BY created_at DESC LIMIT ?",
-            (limit,),
-        )
-        rows = cur.fetchall()
-        self.release(conn)
+        with self.reader() as conn:
+            cur = conn.cursor()
+            cur.execute(
+                "SELECT submission_id, ipfs_hash, status, created_at FROM submissions ORDER BY created_at DESC LIMIT ?",
+                (limit,),
+            )
+            rows = cur.fetchall()
         return rows
 
     def cleanup_old_records(self, max_age: float) -> None:
         """Remove records older than max_age seconds."""
         cutoff = time.time() - max_age
-        conn = self.connect()
-        cur = conn.cursor()
-        cur.execute("DELETE FROM submissions WHERE created_at < ?", (cutoff,))
-        cur.execute("DELETE FROM engagement_metrics WHERE timestamp < ?", (cutoff,))
-        cur.execute("DELETE FROM validation_results WHERE timestamp < ?", (cutoff,))
-        cur.execute("DELETE FROM social_posts WHERE timestamp < ?", (cutoff,))
-        conn.commit()
-        self.release(conn)
+        with self.writer() as conn:
+            cur = conn.cursor()
+            cur.execute("DELETE FROM submissions WHERE created_at < ?", (cutoff,))
+            cur.execute("DELETE FROM engagement_metrics WHERE timestamp < ?", (cutoff,))
+            cur.execute("DELETE FROM validation_results WHERE timestamp < ?", (cutoff,))
+            cur.execute("DELETE FROM social_posts WHERE timestamp < ?", (cutoff,))
+            cur.execute("DELETE FROM submission_claims WHERE created_at < ?", (cutoff,))
 
     def backup(self, backup_path: str) -> None:
         """Create a backup copy of the database."""
-        conn = self.connect()
-        with sqlite3.connect(backup_path) as bck:
+        # Reads a consistent snapshot without blocking the writer.
+        with self.reader() as conn, sqlite3.connect(backup_path) as bck:
             conn.backup(bck)
-        self.release(conn)
 
     def create_indexes(self) -> None:
         """Ensure helpful indexes exist."""
-        conn = self.connect()
-        cur = conn.cursor()
-        cur.execute(
-            "CREATE INDEX IF NOT EXISTS idx_submissions_status ON submissions(status)"
-        )
-        cur.execute(
-            "CREATE INDEX IF NOT EXISTS idx_metrics_post_platform ON engagement_metrics(post_id, platform)"
-        )
-        cur.execute(
-            "CREATE INDEX IF NOT EXISTS idx_social_post ON social_posts(post_id, platform)"
-        )
-        conn.commit()
-        self.release(conn)
+        with self.writer() as conn:
+            cur = conn.cursor()
+            cur.execute(
+                "CREATE INDEX IF NOT EXISTS idx_submissions_status ON submissions(status)"
+            )
+            cur.execute(
+                "CREATE INDEX IF NOT EXISTS idx_metrics_post_platform ON engagement_metrics(post_id, platform)"
+            )
+            cur.execute(
+                "CREATE INDEX IF NOT EXISTS idx_social_post ON social_posts(post_id, platform)"
+            )
 
     def migrate(self) -> None:
         """Run migrations to ensure tables and indexes exist."""
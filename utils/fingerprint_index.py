@@ -0,0 +1,153 @@
+"""Hamming-radius index over perceptual video fingerprints."""
+
+from __future__ import annotations
+
+import itertools
+import os
+from array import array
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+HASH_BITS = 64
+_ALL_ONES = (1 << HASH_BITS) - 1
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+def _informative(hashes: Iterable[int]) -> List[int]:
+    # Flat frames (black intros, title cards) hash to all zeros or ones and
+    # would match every video that has one.
+    return [int(h) for h in hashes if int(h) not in (0, _ALL_ONES)]
+
+
+class FingerprintIndex:
+    """Near-duplicate lookup for videos fingerprinted as 64-bit frame hashes.
+
+    Frame hashes are stored with multi-index hashing: each hash is split
+    into ``chunks`` substrings, each with its own hash table. Any stored
+    hash within ``radius`` bits of a query matches it to within
+    ``radius // chunks`` bits on at least one substring, so a query probes
+    only those small substring neighbourhoods and verifies the candidates,
+    instead of scanning the whole collection.
+
+    A stored video matches a query when at least ``match_fraction`` of the
+    query's frame hashes have a hash of that video within ``radius``.
+    """
+
+    def __init__(self, radius: int = 10, chunks: int = 4, match_fraction: float = 0.5) -> None:
+        if HASH_BITS % chunks:
+            raise ValueError("chunks must divide 64")
+        self.radius = radius
+        self.chunks = chunks
+        self.match_fraction = match_fraction
+        self.chunk_bits = HASH_BITS // chunks
+        self._chunk_mask = (1 << self.chunk_bits) - 1
+        chunk_radius = min(radius // chunks, self.chunk_bits)
+        self._probes = [
+            sum(1 << bit for bit in flipped)
+            for r in range(chunk_radius + 1)
+            for flipped in itertools.combinations(range(self.chunk_bits), r)
+        ]
+        self._tables: List[Dict[int, array]] = [{} for _ in range(chunks)]
+        self._hashes = array("Q")
+        self._owners = array("I")
+        self._keys: List[Optional[str]] = []
+        self._ids: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._ids
+
+    def _chunks(self, value: int) -> Iterable[Tuple[int, int]]:
+        for table in range(self.chunks):
+            yield table, (value >> (table * self.chunk_bits)) & self._chunk_mask
+
+    def add(self, key: str, hashes: Sequence[int]) -> None:
+        """Index the frame hashes of ``key``, replacing any earlier entry."""
+        self.remove(key)
+        owner = len(self._keys)
+        self._keys.append(key)
+        self._ids[key] = owner
+        for value in _informative(hashes):
+            entry = len(self._hashes)
+            self._hashes.append(value)
+            self._owners.append(owner)
+            for table, chunk in self._chunks(value):
+                self._tables[table].setdefault(chunk, array("I")).append(entry)
+
+    def remove(self, key: str) -> None:
+        """Forget ``key``; its entries are skipped and dropped on ``save``."""
+        owner = self._ids.pop(key, None)
+        if owner is not None:
+            self._keys[owner] = None
+
+    def query(
+        self, hashes: Sequence[int], exclude: Optional[str] = None
+    ) -> List[Tuple[str, float]]:
+        """Return ``(key, matched_fraction)`` for every video sharing a frame
+        within ``radius``, best match first."""
+        hashes = _informative(hashes)
+        counts: Counter = Counter()
+        for value in hashes:
+            matched = set()
+            for table, chunk in self._chunks(value):
+                buckets = self._tables[table]
+                for probe in self._probes:
+                    for entry in buckets.get(chunk ^ probe, ()):
+                        owner = self._owners[entry]
+                        if owner in matched or self._keys[owner] in (None, exclude):
+                            continue
+                        if hamming(self._hashes[entry], value) <= self.radius:
+                            matched.add(owner)
+            counts.update(matched)
+        return sorted(
+            ((self._keys[owner], count / len(hashes)) for owner, count in counts.items()),
+            key=lambda item: -item[1],
+        )
+
+    def find_duplicate(
+        self, hashes: Sequence[int], exclude: Optional[str] = None
+    ) -> Optional[str]:
+        """Return the best-matching stored key above ``match_fraction``."""
+        matches = self.query(hashes, exclude)
+        if matches and matches[0][1] >= self.match_fraction:
+            return matches[0][0]
+        return None
+
+    def save(self, path: str) -> None:
+        """Write live entries to ``path`` (``.npz``) atomically."""
+        import numpy as np
+
+        live = [
+            (key, value)
+            for value, owner in zip(self._hashes, self._owners)
+            if (key := self._keys[owner]) is not None
+        ]
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(
+                f,
+                keys=np.array([key for key, _ in live], dtype=str),
+                hashes=np.array([value for _, value in live], dtype=np.uint64),
+            )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str, **kwargs) -> "FingerprintIndex":
+        """Rebuild an index saved with ``save``; empty if ``path`` is missing."""
+        import numpy as np
+
+        index = cls(**kwargs)
+        if not os.path.exists(path):
+            return index
+        data = np.load(path)
+        grouped: Dict[str, List[int]] = {}
+        for key, value in zip(data["keys"].tolist(), data["hashes"].tolist()):
+            grouped.setdefault(key, []).append(value)
+        for key, hashes in grouped.items():
+            index.add(key, hashes)
+        return index
@@ -0,0 +1,162 @@
+"""Content-addressed read-through cache for IPFS downloads."""
+
+from __future__ import annotations
+
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Dict, Iterable, Optional, Union
+
+from .ipfs_client import AsyncIPFSClient
+from .storage_manager import StorageManager
+
+
+class IPFSCache:
+    """Serve IPFS content from local storage, downloading only on a miss.
+
+    Files are keyed by CID in the backing ``StorageManager``. Downloads are
+    written to a dot-prefixed ``.<name>.part`` (never adopted by
+    ``reconcile``, so a resumable transfer survives restarts) and moved
+    into the store when complete, so a stored entry is never a partial
+    transfer. Concurrent
+    requests for the same CID share one download.
+    """
+
+    def __init__(
+        self,
+        client: AsyncIPFSClient,
+        storage: StorageManager,
+        suffix: str = "",
+        verifier: Optional[Callable[[str, str], bool]] = None,
+    ) -> None:
+        self.client = client
+        self.storage = storage
+        self.suffix = suffix
+        self.verifier = verifier
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.bytes_saved = 0
+        self.bytes_downloaded = 0
+
+    def name_for(self, ipfs_hash: str) -> str:
+        """Return the storage name used for a CID."""
+        return f"{ipfs_hash}{self.suffix}"
+
+    async def _cached_path(self, ipfs_hash: str) -> Optional[str]:
+        name = self.name_for(ipfs_hash)
+        path = self.storage.get_file(name)
+        if path is None:
+            return None
+        meta = self.storage.metadata.get(name)
+        if meta is None or meta.get("adopted"):
+            # Left over from an earlier run: only trust it once verified.
+            # Hashing a whole video must not stall the event loop.
+            if self.verifier is not None and not await asyncio.to_thread(
+                self.verifier, ipfs_hash, path
+            ):
+                self.storage.delete_file(name)
+                return None
+            path = self.storage.track_file(name)
+        return path
+
+    async def fetch(self, ipfs_hash: str, **download_kwargs) -> str:
+        """Return a local path for ``ipfs_hash``, downloading it if needed.
+
+        Extra keyword arguments are passed to ``download_file`` on a miss.
+        """
+        path = await self._cached_path(ipfs_hash)
+        if path is not None:
+            self.hits += 1
+            self.bytes_saved += os.path.getsize(path)
+            return path
+
+        task = self._inflight.get(ipfs_hash)
+        if task is not None:
+            self.coalesced += 1
+            path = await asyncio.shield(task)
+            self.bytes_saved += os.path.getsize(path)
+            return path
+
+        self.misses += 1
+        task = asyncio.ensure_future(self._download(ipfs_hash, download_kwargs))
+        self._inflight[ipfs_hash] = task
+        try:
+            return await asyncio.shield(task)
+        finally:
+            if task.done():
+                self._inflight.pop(ipfs_hash, None)
+            else:
+                task.add_done_callback(lambda _: self._inflight.pop(ipfs_hash, None))
+
+    @asynccontextmanager
+    async def open(self, ipfs_hash: str, **download_kwargs) -> AsyncIterator[str]:
+        """Fetch ``ipfs_hash`` and keep it leased for an ``async with`` block.
+
+        Unlike a path from ``fetch``, the yielded path cannot be evicted or
+        expired while the block runs.
+        """
+        name = self.name_for(ipfs_hash)
+        for _ in range(2):
+            await self.fetch(ipfs_hash, **download_kwargs)
+            path = await asyncio.to_thread(self.storage.pin, name)
+            if path is not None:
+                break
+            # Evicted between the fetch and the pin; fetch it once more.
+        else:
+            raise OSError(f"{ipfs_hash} does not stay in the cache long enough to lease")
+        try:
+            yield path
+        finally:
+            await asyncio.to_thread(self.storage.unpin, name)
+
+    async def _download(self, ipfs_hash: str, download_kwargs: dict) -> str:
+        name = self.name_for(ipfs_hash)
+        part_path = os.path.join(self.storage.root, f".{name}.part")
+        await self.client.download_file(ipfs_hash, part_path, **download_kwargs)
+        # ``verify=True`` downloads were already checked while streaming.
+        checked = download_kwargs.get("verify", False)
+        if (
+            self.verifier is not None
+            and not checked
+            and not await asyncio.to_thread(self.verifier, ipfs_hash, part_path)
+        ):
+            os.remove(part_path)
+            raise ValueError(f"Downloaded content does not match {ipfs_hash}")
+        # In content-addressed stores this hashes the file into ``objects/``,
+        # so the stored path is only known once it returns.
+        size = os.path.getsize(part_path)
+        path = await asyncio.to_thread(self.storage.store_file, part_path, name, "move")
+        self.bytes_downloaded += size
+        return path
+
+    async def fetch_many(
+        self,
+        ipfs_hashes: Iterable[str],
+        concurrency: Optional[int] = None,
+        **download_kwargs,
+    ) -> list[Union[str, BaseException]]:
+        """Fetch several CIDs concurrently.
+
+        Results are in input order; a failed fetch yields its exception.
+        """
+        semaphore = asyncio.Semaphore(concurrency or self.client.concurrency)
+
+        async def _one(ipfs_hash: str) -> str:
+            async with semaphore:
+                return await self.fetch(ipfs_hash, **download_kwargs)
+
+        return await asyncio.gather(
+            *(_one(h) for h in ipfs_hashes), return_exceptions=True
+        )
+
+    def stats(self) -> Dict[str, int]:
+        """Return cache counters."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "bytes_saved": self.bytes_saved,
+            "bytes_downloaded": self.bytes_downloaded,
+        }
@@ -2,20 +2,408 @@
 
 from __future__ import annotations
 
+import asyncio
+import hashlib
+import json
 import os
+import threading
 import time
+import uuid
+import aiohttp
+from collections import deque
 import requests
-from typing import Optional, Callable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from requests.adapters import HTTPAdapter
+from typing import Optional, Callable, Iterator, Iterable, Sequence, Union, AsyncIterator
+
+from .retry import CircuitBreaker, CircuitOpenError, RetryPolicy, breaker_stats, guard
+
+SEGMENT_SIZE = 8 * 1024 * 1024
+
+
+def _plan_segments(total: int, segment_size: int) -> list[tuple[int, int]]:
+    """Split ``total`` bytes into inclusive ``(start, end)`` byte ranges."""
+    return [
+        (start, min(start + segment_size, total) - 1)
+        for start in range(0, total, segment_size)
+    ]
+
+
+def _parse_content_range(value: Optional[str]) -> Optional[int]:
+    """Return the total size from a ``Content-Range: bytes a-b/total`` header."""
+    if not value or "/" not in value:
+        return None
+    total = value.rsplit("/", 1)[1].strip()
+    return int(total) if total.isdigit() else None
+
+
+def _multipart_envelope(boundary: str, filename: str) -> tuple[bytes, bytes]:
+    """Return the bytes that surround a single file part of a multipart body."""
+    head = (
+        f"--{boundary}\r\n"
+        f'Content-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+        "Content-Type: application/octet-stream\r\n\r\n"
+    ).encode()
+    tail = f"\r\n--{boundary}--\r\n".encode()
+    return head, tail
+
+
+CID_CHUNK_SIZE = 256 * 1024
+CID_MAX_LINKS = 174
+_BASE58_ALPHABET = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+
+
+def _varint(value: int) -> bytes:
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def _pb_bytes(field: int, payload: bytes) -> bytes:
+    return _varint(field << 3 | 2) + _varint(len(payload)) + payload
+
+
+def _pb_uint(field: int, value: int) -> bytes:
+    return _varint(field << 3) + _varint(value)
+
+
+def _base58(data: bytes) -> str:
+    number = int.from_bytes(data, "big")
+    out = ""
+    while number:
+        number, rem = divmod(number, 58)
+        out = _BASE58_ALPHABET[rem] + out
+    return "1" * (len(data) - len(data.lstrip(b"\0"))) + out
+
+
+def is_cidv0(ipfs_hash: str) -> bool:
+    """Return True for base58 sha2-256 CIDv0 hashes (``Qm...``)."""
+    return len(ipfs_hash) == 46 and ipfs_hash.startswith("Qm")
+
+
+class CIDBuilder:
+    """Incrementally compute the CIDv0 that ``/api/v0/add`` assigns a file.
+
+    Mirrors the defaults of ``ipfs add``: fixed 256 KiB chunks, dag-pb
+    UnixFS leaves (no raw leaves), and the balanced DAG layout with at
+    most 174 links per node. Feed bytes in order with ``update`` and call
+    ``cid()`` at the end. Builders for consecutive chunk-aligned byte
+    ranges can be joined with ``extend`` so segments hashed out of order
+    still produce the file's CID.
+    """
+
+    def __init__(self) -> None:
+        # (multihash, cumulative dag size, file bytes) per leaf
+        self.leaves: list[tuple[bytes, int, int]] = []
+        self.size = 0
+        self._buffer = bytearray()
+
+    def update(self, data: bytes) -> None:
+        self.size += len(data)
+        self._buffer += data
+        if len(self._buffer) < CID_CHUNK_SIZE:
+            return
+        view = memoryview(self._buffer)
+        offset = 0
+        while len(view) - offset >= CID_CHUNK_SIZE:
+            self._add_leaf(view[offset : offset + CID_CHUNK_SIZE])
+            offset += CID_CHUNK_SIZE
+        view.release()
+        del self._buffer[:offset]
+
+    def extend(self, other: "CIDBuilder") -> None:
+        """Append the leaves of a builder covering the following bytes."""
+        if self._buffer:
+            raise ValueError("Can only extend a builder ending on a chunk boundary")
+        other._flush()
+        self.leaves.extend(other.leaves)
+        self.size += other.size
+
+    def _flush(self) -> None:
+        if self._buffer:
+            self._add_leaf(memoryview(self._buffer))
+            self._buffer = bytearray()
+
+    def _add_leaf(self, chunk) -> None:
+        unixfs = _pb_uint(1, 2)
+        if len(chunk):
+            unixfs += _pb_bytes(2, bytes(chunk))
+        unixfs += _pb_uint(3, len(chunk))
+        block = _pb_bytes(1, unixfs)
+        self.leaves.append((_multihash(block), len(block), len(chunk)))
+
+    def cid(self) -> str:
+        """Return the CIDv0 for all bytes fed so far."""
+        self._flush()
+        leaves = self.leaves or [self._empty_leaf()]
+        if len(leaves) == 1:
+            return _base58(leaves[0][0])
+
+        position = 1
+
+        def _fill(children: list, depth: int) -> None:
+            nonlocal position
+            while len(children) < CID_MAX_LINKS and position < len(leaves):
+                if depth == 1:
+                    children.append(leaves[position])
+                    position += 1
+                else:
+                    sub: list = []
+                    _fill(sub, depth - 1)
+                    children.append(_dag_node(sub))
+
+        root, depth = leaves[0], 1
+        while position < len(leaves):
+            children = [root]
+            _fill(children, depth)
+            root = _dag_node(children)
+            depth += 1
+        return _base58(root[0])
+
+    @staticmethod
+    def _empty_leaf() -> tuple[bytes, int, int]:
+        builder = CIDBuilder()
+        builder._add_leaf(b"")
+        return builder.leaves[0]
+
+
+def _multihash(block: bytes) -> bytes:
+    return b"\x12\x20" + hashlib.sha256(block).digest()
+
+
+def _dag_node(children: list) -> tuple[bytes, int, int]:
+    """Serialize an internal UnixFS file node linking ``children``."""
+    filesize = sum(child[2] for child in children)
+    unixfs = _pb_uint(1, 2) + _pb_uint(3, filesize)
+    unixfs += b"".join(_pb_uint(4, child[2]) for child in children)
+    links = b"".join(
+        _pb_bytes(2, _pb_bytes(1, mh) + _pb_bytes(2, b"") + _pb_uint(3, tsize))
+        for mh, tsize, _ in children
+    )
+    block = links + _pb_bytes(1, unixfs)
+    return _multihash(block), len(block) + sum(child[1] for child in children), filesize
+
+
+def _hash_range(file_path: str, start: int, end: int) -> CIDBuilder:
+    """Return a builder fed with the inclusive byte range of a file."""
+    builder = CIDBuilder()
+    with open(file_path, "rb") as f:
+        f.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = f.read(min(remaining, 1024 * 1024))
+            if not chunk:
+                break
+            builder.update(chunk)
+            remaining -= len(chunk)
+    return builder
+
+
+def compute_cid(file_path: str) -> str:
+    """Return the CIDv0 ``ipfs add`` would assign to a local file."""
+    return _hash_range(file_path, 0, os.path.getsize(file_path) - 1).cid()
+
+
+def _new_hasher(name: str):
+    """Return a hashlib object, or a ``CIDBuilder`` for ``"cid"``."""
+    return CIDBuilder() if name == "cid" else hashlib.new(name)
+
+
+def _digest(hasher) -> str:
+    return hasher.cid() if isinstance(hasher, CIDBuilder) else hasher.hexdigest()
+
+
+def file_digests(
+    file_path: str, algorithms: Sequence[str] = ("sha256", "cid")
+) -> dict[str, str]:
+    """Hash a local file with every algorithm in ``algorithms`` in one read.
+
+    Accepts the same names as ``upload_file_with_digests``.
+    """
+    hashers = {name: _new_hasher(name) for name in algorithms}
+    with open(file_path, "rb") as f:
+        while True:
+            chunk = f.read(1024 * 1024)
+            if not chunk:
+                break
+            for hasher in hashers.values():
+                hasher.update(chunk)
+    return {name: _digest(h) for name, h in hashers.items()}
+
+
+def matches_cid(ipfs_hash: str, file_path: str) -> bool:
+    """Return False if a local file provably does not match ``ipfs_hash``.
+
+    Only CIDv0 hashes can be recomputed locally; others are accepted.
+    """
+    return not is_cidv0(ipfs_hash) or compute_cid(file_path) == ipfs_hash
+
+
+def _check_cid(ipfs_hash: str, builder: CIDBuilder) -> None:
+    if builder.cid() != ipfs_hash:
+        raise ValueError(f"Downloaded content does not match {ipfs_hash}")
+
+
+def _join_segments(
+    dest_path: str, ranges: list[tuple[int, int]], builders: dict[int, CIDBuilder]
+) -> CIDBuilder:
+    """Combine per-segment builders in file order.
+
+    Segments finished by an earlier, interrupted run have no builder and
+    are hashed from disk; everything received in this run is not re-read.
+    """
+    joined = CIDBuilder()
+    for index, (start, end) in enumerate(ranges):
+        builder = builders.get(index) or _hash_range(dest_path, start, end)
+        joined.extend(builder)
+    return joined
+
+
+def _write_block(f, chunks: list[bytes], builder: Optional[CIDBuilder]) -> None:
+    """Write buffered ``chunks`` at the file position and feed them to ``builder``."""
+    block = b"".join(chunks)
+    f.write(block)
+    if builder is not None:
+        builder.update(block)
+
+
+def _verified_segment_size(segment_size: int) -> int:
+    """Round a segment size down to whole CID chunks so segments hash independently."""
+    return max(CID_CHUNK_SIZE, segment_size // CID_CHUNK_SIZE * CID_CHUNK_SIZE)
+
+
+class _SegmentProgress:
+    """Sidecar record of the completed segments of a resumable download.
+
+    Stored next to the destination as ``<dest>.progress`` and rewritten
+    atomically after each segment, so a crashed or timed-out transfer can
+    continue from the segments already on disk.
+    """
+
+    def __init__(self, dest_path: str, ipfs_hash: str, total: int, segment_size: int):
+        self.path = f"{dest_path}.progress"
+        self.dest_path = dest_path
+        self.ipfs_hash = ipfs_hash
+        self.total = total
+        self.segment_size = segment_size
+        self.done: set[int] = set()
+        self._lock = threading.Lock()
+
+    def load(self) -> bool:
+        """Load a previous record; return True if it matches this transfer."""
+        try:
+            with open(self.path) as f:
+                record = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if (
+            record.get("hash") != self.ipfs_hash
+            or record.get("size") != self.total
+            or record.get("segment_size") != self.segment_size
+            or not os.path.isfile(self.dest_path)
+            or os.path.getsize(self.dest_path) != self.total
+        ):
+            return False
+        self.done = set(record.get("done", []))
+        return True
+
+    def prepare(self) -> None:
+        """Resume a matching transfer or preallocate the destination file."""
+        if self.load():
+            return
+        self.done = set()
+        with open(self.dest_path, "wb") as f:
+            f.truncate(self.total)
+        self._save()
+
+    def mark_done(self, index: int) -> None:
+        with self._lock:
+            self.done.add(index)
+            self._save()
+
+    def _save(self) -> None:
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(
+                {
+                    "hash": self.ipfs_hash,
+                    "size": self.total,
+                    "segment_size": self.segment_size,
+                    "done": sorted(self.done),
+                },
+                f,
+            )
+        os.replace(tmp, self.path)
+
+    def remove(self) -> None:
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
 
 
 class IPFSClient:
     """Simple IPFS client wrapper."""
 
-    def __init__(self, gateway_url: str):
+    def __init__(
+        self,
+        gateway_url: str,
+        pool_size: int = 10,
+        retry_policy: Optional[RetryPolicy] = None,
+        breaker: Optional[CircuitBreaker] = None,
+    ):
         self.gateway_url = gateway_url.rstrip("/")
+        # Reuse keep-alive connections instead of opening one per call
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.breaker = breaker or CircuitBreaker()
+
+    def _send(self, method: str, url: str, **kwargs) -> requests.Response:
+        """Send a request through the gateway's circuit breaker."""
+        guard(self.breaker, self.gateway_url)
+        try:
+            response = self.session.request(method, url, **kwargs)
+        except Exception:
+            self.breaker.record_failure()
+            raise
+        if response.status_code >= 500:
+            self.breaker.record_failure()
+            response.close()
+            response.raise_for_status()
+        self.breaker.record_success()
+        return response
+
+    def stats(self) -> dict:
+        """Return retry counts and circuit breaker state."""
+        return {
+            "retry": self.retry_policy.stats(),
+            "breakers": breaker_stats({self.gateway_url: self.breaker}),
+        }
 
     def upload_file(self, file_path: str) -> Optional[str]:
         """Upload a file to the IPFS gateway and return the hash."""
+        return self.upload_file_with_digests(file_path, algorithms=())[0]
+
+    def upload_file_with_digests(
+        self, file_path: str, algorithms: Sequence[str] = ("sha256",)
+    ) -> tuple[Optional[str], dict[str, str]]:
+        """Upload a file and hash it in the same pass.
+
+        The multipart body is streamed from disk in chunks and each chunk is
+        fed to the requested ``hashlib`` algorithms as it is sent, so the
+        file is read once. The pseudo-algorithm ``"cid"`` computes the local
+        CIDv0 in the same pass. Returns ``(ipfs_hash, {algorithm: digest})``.
+        """
         if not os.path.isfile(file_path):
             raise FileNotFoundError(file_path)
         def _reader(fp: str, chunk_size: int = 1024 * 1024) -> Iterator[bytes]:
@@ -27,58 +415,192 @@ class IPFSClient:
                     yield chunk
 
         url = f"{self.gateway_url}/api/v0/add"
-        last_error: Optional[Exception] = None
-        for _ in range(3):
-            try:
-                with open(file_path, "rb") as file_obj:
-                    files = {"file": (os.path.basename(file_path), file_obj)}
-                    response = requests.post(url, files=files)
-                response.raise_for_status()
-                return response.json().get("Hash")
-            except Exception as e:
-                last_error = e
-                time.sleep(1)
-        raise RuntimeError(f"Failed to upload {file_path}: {last_error}")
+
+        def _attempt() -> tuple[Optional[str], dict[str, str]]:
+            hashers = {name: _new_hasher(name) for name in algorithms}
+            boundary = uuid.uuid4().hex
+            head, tail = _multipart_envelope(boundary, os.path.basename(file_path))
+
+            def _body() -> Iterator[bytes]:
+                yield head
+                for chunk in _reader(file_path):
+                    for hasher in hashers.values():
+                        hasher.update(chunk)
+                    yield chunk
+                yield tail
+
+            response = self._send(
+                "POST",
+                url,
+                data=_body(),
+                headers={"Content-Type": f"multipart/form-data; boundary={boundary}"},
+            )
+            response.raise_for_status()
+            digests = {name: _digest(h) for name, h in hashers.items()}
+            return response.json().get("Hash"), digests
+
+        try:
+            return self.retry_policy.run(_attempt)
+        except CircuitOpenError:
+            raise
+        except Exception as e:
+            raise RuntimeError(f"Failed to upload {file_path}: {e}") from e
 
     def download_file(
         self,
         ipfs_hash: str,
         dest_path: str,
         progress_callback: Optional[Callable[[int, int], None]] = None,
+        segments: int = 1,
+        segment_size: int = SEGMENT_SIZE,
+        verify: bool = False,
     ) -> None:
-        """Download a file from the IPFS gateway."""
+        """Download a file from the IPFS gateway.
+
+        With ``segments > 1`` the file is fetched as HTTP Range requests,
+        ``segments`` at a time, and can resume after a failure. Gateways
+        that ignore Range fall back to a single stream.
+
+        With ``verify`` set, the CID of the received bytes is computed as
+        they are written and ``ValueError`` is raised if it does not match
+        ``ipfs_hash``. Only CIDv0 hashes can be checked; others are skipped.
+        """
+        verify = verify and is_cidv0(ipfs_hash)
+        if segments > 1:
+            total = self.retry_policy.run(partial(self._probe_size, ipfs_hash))
+            if total:
+                if verify:
+                    segment_size = _verified_segment_size(segment_size)
+                self._download_segmented(
+                    ipfs_hash, dest_path, total, segments, segment_size, progress_callback,
+                    verify,
+                )
+                return
+
         url = f"{self.gateway_url}/ipfs/{ipfs_hash}"
-        response = requests.get(url, stream=True)
-        response.raise_for_status()
-        total = int(response.headers.get("content-length", 0))
-        downloaded = 0
-        with open(dest_path, "wb") as f:
-            for chunk in response.iter_content(chunk_size=1024 * 1024):
-                if chunk:
-                    f.write(chunk)
-                    downloaded += len(chunk)
-                    if progress_callback:
-                        progress_callback(downloaded, total)
+
+        def _attempt() -> CIDBuilder:
+            builder = CIDBuilder()
+            with self._send("GET", url, stream=True) as response:
+                response.raise_for_status()
+                total = int(response.headers.get("content-length", 0))
+                downloaded = 0
+                with open(dest_path, "wb") as f:
+                    for chunk in response.iter_content(chunk_size=1024 * 1024):
+                        if chunk:
+                            f.write(chunk)
+                            if verify:
+                                builder.update(chunk)
+                            downloaded += len(chunk)
+                            if progress_callback:
+                                progress_callback(downloaded, total)
+            return builder
+
+        builder = self.retry_policy.run(_attempt)
+        if verify:
+            _check_cid(ipfs_hash, builder)
+
+    def _probe_size(self, ipfs_hash: str) -> Optional[int]:
+        """Return the file size if the gateway honours Range requests."""
+        url = f"{self.gateway_url}/ipfs/{ipfs_hash}"
+        with self._send("GET", url, headers={"Range": "bytes=0-0"}, stream=True) as response:
+            response.raise_for_status()
+            if response.status_code != 206:
+                return None
+            return _parse_content_range(response.headers.get("content-range"))
+
+    def _download_segmented(
+        self,
+        ipfs_hash: str,
+        dest_path: str,
+        total: int,
+        segments: int,
+        segment_size: int,
+        progress_callback: Optional[Callable[[int, int], None]],
+        verify: bool = False,
+    ) -> None:
+        url = f"{self.gateway_url}/ipfs/{ipfs_hash}"
+        progress = _SegmentProgress(dest_path, ipfs_hash, total, segment_size)
+        progress.prepare()
+        ranges = _plan_segments(total, segment_size)
+        resumed = set(progress.done)
+        downloaded = sum(ranges[i][1] - ranges[i][0] + 1 for i in resumed)
+        builders: dict[int, CIDBuilder] = {}
+        lock = threading.Lock()
+
+        def _fetch(index: int) -> None:
+            nonlocal downloaded
+            start, end = ranges[index]
+            headers = {"Range": f"bytes={start}-{end}"}
+            builder = CIDBuilder()
+            with self._send("GET", url, headers=headers, stream=True) as response:
+                response.raise_for_status()
+                if response.status_code != 206:
+                    raise RuntimeError(f"Gateway ignored range request for {ipfs_hash}")
+                with open(dest_path, "r+b") as f:
+                    f.seek(start)
+                    for chunk in response.iter_content(chunk_size=1024 * 1024):
+                        if chunk:
+                            f.write(chunk)
+                            if verify:
+                                builder.update(chunk)
+                            with lock:
+                                downloaded += len(chunk)
+                                if progress_callback:
+                                    progress_callback(downloaded, total)
+                    if f.tell() != end + 1:
+                        raise RuntimeError(f"Short segment {index} for {ipfs_hash}")
+            builders[index] = builder
+            progress.mark_done(index)
+
+        pending = [i for i in range(len(ranges)) if i not in resumed]
+        with ThreadPoolExecutor(max_workers=segments) as pool:
+            futures = [pool.submit(self.retry_policy.run, partial(_fetch, i)) for i in pending]
+            for future in futures:
+                future.result()
+        if verify:
+            _check_cid(ipfs_hash, _join_segments(dest_path, ranges, builders))
+        progress.remove()
 
     def get_file_info(self, ipfs_hash: str) -> Optional[dict]:
         """Retrieve information about a file from IPFS."""
         url = f"{self.gateway_url}/api/v0/object/stat?arg={ipfs_hash}"
-        try:
-            response = requests.post(url)
+
+        def _attempt() -> dict:
+            response = self._send("POST", url)
             response.raise_for_status()
             return response.json()
+
+        try:
+            return self.retry_policy.run(_attempt)
         except Exception:
             return None
 
+    def has_content(self, ipfs_hash: str) -> bool:
+        """Return True if the gateway already serves ``ipfs_hash``.
+
+        One HEAD request; any failure counts as absent.
+        """
+        try:
+            response = self._send("HEAD", f"{self.gateway_url}/ipfs/{ipfs_hash}")
+            response.close()
+            return response.status_code == 200
+        except Exception:
+            return False
+
     def test_connection(self) -> bool:
         """Check if the IPFS gateway is reachable."""
         url = f"{self.gateway_url}/api/v0/version"
         try:
-            response = requests.post(url)
+            response = self.retry_policy.run(partial(self._send, "POST", url))
             return response.status_code == 200
         except Exception:
             return False
 
+    def close(self) -> None:
+        """Close pooled connections."""
+        self.session.close()
+
     def cleanup(self, path: str) -> None:
         """Remove a temporary file if it exists."""
         try:
@@ -86,3 +608,522 @@ class IPFSClient:
                 os.remove(path)
         except Exception:
             pass
+
+
+class GatewayStats:
+    """Rolling latency and error estimate for one gateway."""
+
+    def __init__(self, url: str, window: int = 100, alpha: float = 0.2) -> None:
+        self.url = url
+        self.alpha = alpha
+        self.latencies: deque[float] = deque(maxlen=window)
+        self.ewma_latency: Optional[float] = None
+        self.error_rate = 0.0
+        self.requests = 0
+        self.failures = 0
+
+    def record_success(self, latency: float) -> None:
+        self.requests += 1
+        self.record_latency(latency)
+        self.error_rate *= 1 - self.alpha
+
+    def record_latency(self, latency: float) -> None:
+        """Add a latency sample without counting a completed request.
+
+        Used for hedges that lost the race: their elapsed time is a lower
+        bound on the real latency and keeps a slow gateway ranked low.
+        """
+        self.latencies.append(latency)
+        if self.ewma_latency is None:
+            self.ewma_latency = latency
+        else:
+            self.ewma_latency += self.alpha * (latency - self.ewma_latency)
+
+    def record_failure(self) -> None:
+        self.requests += 1
+        self.failures += 1
+        self.error_rate += self.alpha * (1 - self.error_rate)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Return the ``q``-th percentile of recent latencies."""
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))]
+
+    def healthy(self, max_error_rate: float = 0.5) -> bool:
+        return self.error_rate < max_error_rate
+
+    def as_dict(self) -> dict:
+        return {
+            "ewma_latency": self.ewma_latency,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "error_rate": self.error_rate,
+            "requests": self.requests,
+            "failures": self.failures,
+        }
+
+
+class AsyncIPFSClient:
+    """Asyncio IPFS client sharing one pooled aiohttp session.
+
+    All transfers go through a single ``aiohttp.ClientSession`` so TCP
+    connections are kept alive and reused. ``max_connections_per_host``
+    caps how many sockets are opened to each gateway, and ``concurrency``
+    bounds how many transfers ``upload_many``/``download_many`` run at once.
+
+    ``gateway_url`` may be a list of gateways. Each request goes to the
+    healthy gateway with the lowest recent latency. Reads that have not
+    answered within the ``hedge_percentile`` latency of that gateway are
+    duplicated to the next best one, and whichever responds first wins.
+    """
+
+    def __init__(
+        self,
+        gateway_url: Union[str, Sequence[str]],
+        max_connections: int = 100,
+        max_connections_per_host: int = 16,
+        concurrency: int = 8,
+        chunk_size: int = 1024 * 1024,
+        timeout: Optional[float] = None,
+        hedge_percentile: float = 95.0,
+        hedge_delay: float = 1.0,
+        min_hedge_delay: float = 0.01,
+        retry_policy: Optional[RetryPolicy] = None,
+        breaker_threshold: int = 5,
+        breaker_reset: float = 30.0,
+    ) -> None:
+        urls = [gateway_url] if isinstance(gateway_url, str) else list(gateway_url)
+        if not urls:
+            raise ValueError("At least one gateway URL is required")
+        self.gateways = [url.rstrip("/") for url in urls]
+        self.gateway_url = self.gateways[0]
+        self.gateway_stats = {url: GatewayStats(url) for url in self.gateways}
+        self.breakers = {
+            url: CircuitBreaker(breaker_threshold, breaker_reset) for url in self.gateways
+        }
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.hedge_percentile = hedge_percentile
+        self.hedge_delay = hedge_delay
+        self.min_hedge_delay = min_hedge_delay
+        self.hedged_requests = 0
+        self.max_connections = max_connections
+        self.max_connections_per_host = max_connections_per_host
+        self.concurrency = concurrency
+        self.chunk_size = chunk_size
+        self.timeout = timeout
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    async def __aenter__(self) -> "AsyncIPFSClient":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Return the shared session, creating it on first use."""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.max_connections,
+                limit_per_host=self.max_connections_per_host,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            )
+        return self._session
+
+    async def close(self) -> None:
+        """Close the shared session and its connection pool."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    def ranked_gateways(self) -> list[str]:
+        """Return gateways ordered best first: healthy, then lowest latency."""
+        def _key(url: str) -> tuple:
+            stats = self.gateway_stats[url]
+            return (not stats.healthy(), stats.ewma_latency or 0.0)
+
+        return sorted(self.gateways, key=_key)
+
+    def _available_gateways(self) -> list[str]:
+        """Return ranked gateways whose circuit currently accepts requests."""
+        ranked = [url for url in self.ranked_gateways() if self.breakers[url].available()]
+        if not ranked:
+            raise CircuitOpenError("All IPFS gateway circuits are open")
+        return ranked
+
+    def _hedge_deadline(self, url: str) -> float:
+        """Return how long to wait on ``url`` before sending a hedge."""
+        stats = self.gateway_stats[url]
+        deadline = stats.percentile(self.hedge_percentile)
+        if deadline is None or len(stats.latencies) < 10:
+            deadline = self.hedge_delay
+        return max(deadline, self.min_hedge_delay)
+
+    async def _send(
+        self, gateway: str, method: str, path: str, **kwargs
+    ) -> aiohttp.ClientResponse:
+        """Send one request to ``gateway`` and record its latency."""
+        stats = self.gateway_stats[gateway]
+        breaker = self.breakers[gateway]
+        guard(breaker, gateway)
+        start = time.monotonic()
+        try:
+            response = await self._get_session().request(method, f"{gateway}{path}", **kwargs)
+        except asyncio.CancelledError:
+            stats.record_latency(time.monotonic() - start)
+            breaker.release_trial()
+            raise
+        except Exception:
+            stats.record_failure()
+            breaker.record_failure()
+            raise
+        if response.status >= 500:
+            stats.record_failure()
+            breaker.record_failure()
+            response.release()
+            response.raise_for_status()
+        stats.record_success(time.monotonic() - start)
+        breaker.record_success()
+        return response
+
+    async def _request(
+        self, method: str, path: str, hedge: bool = False, **kwargs
+    ) -> aiohttp.ClientResponse:
+        """Send a request to the best gateway and return the open response.
+
+        With ``hedge`` set, a duplicate goes to the next gateway if the first
+        has not answered by its hedge deadline or has failed. The caller owns
+        the returned response and must release it.
+        """
+        ranked = self._available_gateways()
+        if not hedge or len(ranked) < 2:
+            return await self._send(ranked[0], method, path, **kwargs)
+
+        primary = asyncio.ensure_future(self._send(ranked[0], method, path, **kwargs))
+        pending = {primary}
+        winner: Optional[aiohttp.ClientResponse] = None
+        error: Optional[BaseException] = None
+        try:
+            done, _ = await asyncio.wait(pending, timeout=self._hedge_deadline(ranked[0]))
+            if primary in done and primary.exception() is None:
+                pending = set()
+                return primary.result()
+
+            self.hedged_requests += 1
+            pending.add(asyncio.ensure_future(self._send(ranked[1], method, path, **kwargs)))
+            while pending and winner is None:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None and winner is None:
+                        winner = task.result()
+                    elif task.exception() is None:
+                        task.result().release()
+                    else:
+                        error = task.exception()
+        finally:
+            # Also reached when the caller is cancelled mid-wait.
+            for task in pending:
+                task.cancel()
+                task.add_done_callback(_release_response)
+        if winner is None:
+            raise error  # type: ignore[misc]
+        return winner
+
+    def stats(self) -> dict:
+        """Return per-gateway estimates, hedge and retry counts and breaker state."""
+        return {
+            "hedged_requests": self.hedged_requests,
+            "gateways": {url: s.as_dict() for url, s in self.gateway_stats.items()},
+            "retry": self.retry_policy.stats(),
+            "breakers": breaker_stats(self.breakers),
+        }
+
+    async def upload_file(self, file_path: str) -> Optional[str]:
+        """Upload a file to the IPFS gateway and return the hash."""
+        return (await self.upload_file_with_digests(file_path, algorithms=()))[0]
+
+    async def upload_file_with_digests(
+        self, file_path: str, algorithms: Sequence[str] = ("sha256",)
+    ) -> tuple[Optional[str], dict[str, str]]:
+        """Upload a file and hash it in the same pass.
+
+        See ``IPFSClient.upload_file_with_digests``. Disk reads run in the
+        default executor so the event loop is not blocked.
+        """
+        if not os.path.isfile(file_path):
+            raise FileNotFoundError(file_path)
+
+        async def _reader(hashers: dict) -> AsyncIterator[bytes]:
+            loop = asyncio.get_running_loop()
+            with open(file_path, "rb") as f:
+                while True:
+                    chunk = await loop.run_in_executor(None, f.read, self.chunk_size)
+                    if not chunk:
+                        break
+                    for hasher in hashers.values():
+                        hasher.update(chunk)
+                    yield chunk
+
+        async def _attempt() -> tuple[Optional[str], dict[str, str]]:
+            hashers = {name: _new_hasher(name) for name in algorithms}
+            form = aiohttp.FormData()
+            form.add_field(
+                "file",
+                _reader(hashers),
+                filename=os.path.basename(file_path),
+                content_type="application/octet-stream",
+            )
+            async with await self._request("POST", "/api/v0/add", data=form) as response:
+                response.raise_for_status()
+                data = await response.json(content_type=None)
+            digests = {name: _digest(h) for name, h in hashers.items()}
+            return data.get("Hash"), digests
+
+        try:
+            return await self.retry_policy.run_async(_attempt)
+        except CircuitOpenError:
+            raise
+        except Exception as e:
+            raise RuntimeError(f"Failed to upload {file_path}: {e}") from e
+
+    async def download_file(
+        self,
+        ipfs_hash: str,
+        dest_path: str,
+        progress_callback: Optional[Callable[[int, int], None]] = None,
+        segments: int = 1,
+        segment_size: int = SEGMENT_SIZE,
+        verify: bool = False,
+    ) -> None:
+        """Download a file from the IPFS gateway.
+
+        With ``segments > 1`` the file is fetched as concurrent HTTP Range
+        requests and can resume after a failure. ``verify`` checks the CID
+        of the received bytes in the same pass; see ``IPFSClient``.
+        """
+        verify = verify and is_cidv0(ipfs_hash)
+        if segments > 1:
+            total = await self.retry_policy.run_async(partial(self._probe_size, ipfs_hash))
+            if total:
+                if verify:
+                    segment_size = _verified_segment_size(segment_size)
+                await self._download_segmented(
+                    ipfs_hash, dest_path, total, segments, segment_size, progress_callback,
+                    verify,
+                )
+                return
+
+        path = f"/ipfs/{ipfs_hash}"
+
+        async def _attempt() -> CIDBuilder:
+            builder = CIDBuilder()
+            async with await self._request("GET", path, hedge=True) as response:
+                response.raise_for_status()
+                total = int(response.headers.get("content-length", 0))
+                downloaded = 0
+
+                def _progress(size: int) -> None:
+                    nonlocal downloaded
+                    downloaded += size
+                    if progress_callback:
+                        progress_callback(downloaded, total)
+
+                with open(dest_path, "wb") as f:
+                    await self._write_stream(response, f, builder if verify else None, _progress)
+            return builder
+
+        builder = await self.retry_policy.run_async(_attempt)
+        if verify:
+            _check_cid(ipfs_hash, builder)
+
+    async def _write_stream(
+        self,
+        response: aiohttp.ClientResponse,
+        f,
+        builder: Optional[CIDBuilder],
+        on_chunk: Callable[[int], None],
+    ) -> None:
+        """Copy a response body into ``f``.
+
+        Chunks are buffered up to ``chunk_size`` and written (and hashed)
+        in a worker thread, so disk and CID work stay off the event loop.
+        """
+        async def _flush(chunks: list[bytes]) -> None:
+            write = asyncio.ensure_future(asyncio.to_thread(_write_block, f, chunks, builder))
+            try:
+                await asyncio.shield(write)
+            except asyncio.CancelledError:
+                # Let the block finish before the caller closes ``f``.
+                await write
+                raise
+
+        buffered: list[bytes] = []
+        size = 0
+        async for chunk in response.content.iter_chunked(self.chunk_size):
+            buffered.append(chunk)
+            size += len(chunk)
+            on_chunk(len(chunk))
+            if size >= self.chunk_size:
+                await _flush(buffered)
+                buffered, size = [], 0
+        if buffered:
+            await _flush(buffered)
+
+    async def _probe_size(self, ipfs_hash: str) -> Optional[int]:
+        """Return the file size if the gateway honours Range requests."""
+        path = f"/ipfs/{ipfs_hash}"
+        headers = {"Range": "bytes=0-0"}
+        async with await self._request("GET", path, hedge=True, headers=headers) as response:
+            response.raise_for_status()
+            if response.status != 206:
+                return None
+            return _parse_content_range(response.headers.get("Content-Range"))
+
+    async def _download_segmented(
+        self,
+        ipfs_hash: str,
+        dest_path: str,
+        total: int,
+        segments: int,
+        segment_size: int,
+        progress_callback: Optional[Callable[[int, int], None]],
+        verify: bool = False,
+    ) -> None:
+        path = f"/ipfs/{ipfs_hash}"
+        progress = _SegmentProgress(dest_path, ipfs_hash, total, segment_size)
+        progress.prepare()
+        ranges = _plan_segments(total, segment_size)
+        resumed = set(progress.done)
+        downloaded = sum(ranges[i][1] - ranges[i][0] + 1 for i in resumed)
+        builders: dict[int, CIDBuilder] = {}
+        semaphore = asyncio.Semaphore(segments)
+
+        def _progress(size: int) -> None:
+            nonlocal downloaded
+            downloaded += size
+            if progress_callback:
+                progress_callback(downloaded, total)
+
+        async def _fetch(index: int) -> None:
+            start, end = ranges[index]
+            headers = {"Range": f"bytes={start}-{end}"}
+            builder = CIDBuilder()
+            async with semaphore, await self._request(
+                "GET", path, hedge=True, headers=headers
+            ) as response:
+                response.raise_for_status()
+                if response.status != 206:
+                    raise RuntimeError(f"Gateway ignored range request for {ipfs_hash}")
+                with open(dest_path, "r+b") as f:
+                    f.seek(start)
+                    await self._write_stream(response, f, builder if verify else None, _progress)
+                    if f.tell() != end + 1:
+                        raise RuntimeError(f"Short segment {index} for {ipfs_hash}")
+            builders[index] = builder
+            progress.mark_done(index)
+
+        tasks = [
+            asyncio.ensure_future(self.retry_policy.run_async(partial(_fetch, i)))
+            for i in range(len(ranges))
+            if i not in resumed
+        ]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            # On the first failure (or cancellation) stop the other segments
+            # before they write any more into the file.
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        if verify:
+            loop = asyncio.get_running_loop()
+            joined = await loop.run_in_executor(
+                None, _join_segments, dest_path, ranges, builders
+            )
+            _check_cid(ipfs_hash, joined)
+        progress.remove()
+
+    async def get_file_info(self, ipfs_hash: str) -> Optional[dict]:
+        """Retrieve information about a file from IPFS."""
+        path = f"/api/v0/object/stat?arg={ipfs_hash}"
+
+        async def _attempt() -> dict:
+            async with await self._request("POST", path, hedge=True) as response:
+                response.raise_for_status()
+                return await response.json(content_type=None)
+
+        try:
+            return await self.retry_policy.run_async(_attempt)
+        except Exception:
+            return None
+
+    async def has_content(self, ipfs_hash: str) -> bool:
+        """Return True if a gateway already serves ``ipfs_hash``.
+
+        One (hedged) HEAD request; any failure counts as absent.
+        """
+        try:
+            async with await self._request("HEAD", f"/ipfs/{ipfs_hash}", hedge=True) as response:
+                return response.status == 200
+        except Exception:
+            return False
+
+    async def test_connection(self) -> bool:
+        """Check if any IPFS gateway is reachable."""
+        async def _attempt() -> bool:
+            async with await self._request("POST", "/api/v0/version", hedge=True) as response:
+                return response.status == 200
+
+        try:
+            return await self.retry_policy.run_async(_attempt)
+        except Exception:
+            return False
+
+    async def _bounded(self, semaphore: asyncio.Semaphore, coro):
+        async with semaphore:
+            return await coro
+
+    async def upload_many(
+        self, file_paths: Sequence[str], concurrency: Optional[int] = None
+    ) -> list[Union[Optional[str], BaseException]]:
+        """Upload several files concurrently.
+
+        Results are returned in input order. A failed upload yields its
+        exception in place of the hash instead of aborting the batch.
+        """
+        semaphore = asyncio.Semaphore(concurrency or self.concurrency)
+        return await asyncio.gather(
+            *(self._bounded(semaphore, self.upload_file(p)) for p in file_paths),
+            return_exceptions=True,
+        )
+
+    async def download_many(
+        self,
+        items: Iterable[tuple[str, str]],
+        concurrency: Optional[int] = None,
+        **download_kwargs,
+    ) -> list[Optional[BaseException]]:
+        """Download ``(ipfs_hash, dest_path)`` pairs concurrently.
+
+        Extra keyword arguments are passed to ``download_file``. Returns one
+        entry per item: ``None`` on success or the exception raised by that
+        transfer.
+        """
+        semaphore = asyncio.Semaphore(concurrency or self.concurrency)
+        return await asyncio.gather(
+            *(
+                self._bounded(semaphore, self.download_file(h, dest, **download_kwargs))
+                for h, dest in items
+            ),
+            return_exceptions=True,
+        )
+
+
+def _release_response(task: asyncio.Future) -> None:
+    """Release the response of a hedge that lost the race."""
+    if not task.cancelled() and task.exception() is None:
+        task.result().release()
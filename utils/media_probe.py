@@ -0,0 +1,339 @@
+"""Fast container header parsing for MP4/MOV and Matroska/WebM files.
+
+Only the boxes/elements needed for duration, dimensions and codec are
+read, so a probe costs a few small seeks and reads instead of an
+``ffprobe`` process. Anything unexpected (fragmented or live files,
+unknown codecs, damaged headers) returns ``None`` so callers can fall
+back to ffprobe.
+"""
+
+from __future__ import annotations
+
+import os
+import struct
+from typing import BinaryIO, Iterator, Optional
+
+# Refuse to buffer header structures larger than this.
+MAX_HEADER_SIZE = 32 * 1024 * 1024
+
+# Sample entry / CodecID -> ffprobe ``codec_name``
+_MP4_CODECS = {
+    b"avc1": "h264",
+    b"avc3": "h264",
+    b"hvc1": "hevc",
+    b"hev1": "hevc",
+    b"vp08": "vp8",
+    b"vp09": "vp9",
+    b"av01": "av1",
+    b"mp4v": "mpeg4",
+    b"apcn": "prores",
+    b"apch": "prores",
+}
+_MKV_CODECS = {
+    "V_MPEG4/ISO/AVC": "h264",
+    "V_MPEGH/ISO/HEVC": "hevc",
+    "V_VP8": "vp8",
+    "V_VP9": "vp9",
+    "V_AV1": "av1",
+    "V_MPEG4/ISO/ASP": "mpeg4",
+}
+_MP4_TOP_LEVEL = {b"ftyp", b"moov", b"mdat", b"free", b"skip", b"wide", b"pnot"}
+
+_EBML = 0x1A45DFA3
+_DOCTYPE = 0x4282
+_SEGMENT = 0x18538067
+_SEEKHEAD = 0x114D9B74
+_SEEK = 0x4DBB
+_SEEK_ID = 0x53AB
+_SEEK_POSITION = 0x53AC
+_INFO = 0x1549A966
+_TIMESTAMP_SCALE = 0x2AD7B1
+_DURATION = 0x4489
+_TRACKS = 0x1654AE6B
+_TRACK_ENTRY = 0xAE
+_TRACK_TYPE = 0x83
+_CODEC_ID = 0x86
+_VIDEO = 0xE0
+_PIXEL_WIDTH = 0xB0
+_PIXEL_HEIGHT = 0xBA
+_CLUSTER = 0x1F43B675
+
+
+def probe_container(file_path: str) -> Optional[dict]:
+    """Return ffprobe-shaped metadata parsed from the container header.
+
+    The result has ``format.duration`` and one ``streams`` entry per video
+    track with ``codec_name``, ``width`` and ``height``. ``None`` means the
+    layout is not understood and ffprobe should be used instead.
+    """
+    try:
+        with open(file_path, "rb") as f:
+            file_size = os.fstat(f.fileno()).st_size
+            head = f.read(8)
+            if len(head) < 8:
+                return None
+            if int.from_bytes(head[:4], "big") == _EBML:
+                return _probe_matroska(f, file_size)
+            if head[4:8] in _MP4_TOP_LEVEL:
+                return _probe_mp4(f, file_size)
+    except (OSError, ValueError, IndexError, struct.error):
+        pass
+    return None
+
+
+def _result(duration: float, streams: list[dict]) -> Optional[dict]:
+    if duration <= 0 or not streams:
+        return None
+    return {"format": {"duration": f"{duration:.6f}"}, "streams": streams}
+
+
+# MP4 / QuickTime
+
+
+def _boxes(data: bytes, start: int, end: int) -> Iterator[tuple[bytes, int, int]]:
+    """Yield ``(type, body_start, body_end)`` for each box in a range."""
+    pos = start
+    while pos + 8 <= end:
+        size, kind = struct.unpack_from(">I4s", data, pos)
+        header = 8
+        if size == 1:
+            size = struct.unpack_from(">Q", data, pos + 8)[0]
+            header = 16
+        elif size == 0:
+            size = end - pos
+        if size < header or pos + size > end:
+            raise ValueError(f"Truncated {kind!r} box")
+        yield kind, pos + header, pos + size
+        pos += size
+
+
+def _find(data: bytes, start: int, end: int, *path: bytes) -> Optional[tuple[int, int]]:
+    """Return the body range of the box at ``path`` below a range."""
+    for kind in path:
+        for child, child_start, child_end in _boxes(data, start, end):
+            if child == kind:
+                start, end = child_start, child_end
+                break
+        else:
+            return None
+    return start, end
+
+
+def _read_moov(f: BinaryIO, file_size: int) -> Optional[bytes]:
+    """Seek over top-level boxes (skipping ``mdat``) and read ``moov``."""
+    pos = 0
+    while pos + 8 <= file_size:
+        f.seek(pos)
+        header = f.read(16)
+        size, kind = struct.unpack_from(">I4s", header)
+        header_size = 8
+        if size == 1:
+            size = struct.unpack_from(">Q", header, 8)[0]
+            header_size = 16
+        elif size == 0:
+            size = file_size - pos
+        if size < header_size:
+            return None
+        if kind == b"moov":
+            if size > MAX_HEADER_SIZE:
+                return None
+            f.seek(pos + header_size)
+            body = f.read(size - header_size)
+            return body if len(body) == size - header_size else None
+        pos += size
+    return None
+
+
+def _probe_mp4(f: BinaryIO, file_size: int) -> Optional[dict]:
+    moov = _read_moov(f, file_size)
+    if moov is None:
+        return None
+    mvhd = _find(moov, 0, len(moov), b"mvhd")
+    if mvhd is None:
+        return None
+    if moov[mvhd[0]] == 1:
+        timescale, duration = struct.unpack_from(">IQ", moov, mvhd[0] + 20)
+    else:
+        timescale, duration = struct.unpack_from(">II", moov, mvhd[0] + 12)
+    if not timescale:
+        return None
+
+    streams = []
+    for kind, start, end in _boxes(moov, 0, len(moov)):
+        if kind == b"trak":
+            stream = _mp4_video_stream(moov, start, end)
+            if stream is not None:
+                streams.append(stream)
+    # Fragmented files leave mvhd duration at zero; ffprobe handles those.
+    return _result(duration / timescale, streams)
+
+
+def _mp4_video_stream(data: bytes, start: int, end: int) -> Optional[dict]:
+    mdia = _find(data, start, end, b"mdia")
+    if mdia is None:
+        return None
+    hdlr = _find(data, *mdia, b"hdlr")
+    if hdlr is None or data[hdlr[0] + 8 : hdlr[0] + 12] != b"vide":
+        return None
+    stsd = _find(data, *mdia, b"minf", b"stbl", b"stsd")
+    if stsd is None:
+        raise ValueError("Video track without sample description")
+    entry = stsd[0] + 8
+    codec = _MP4_CODECS.get(data[entry + 4 : entry + 8])
+    if codec is None:
+        raise ValueError(f"Unknown sample entry {data[entry + 4 : entry + 8]!r}")
+    # VisualSampleEntry: 8 byte box header, 8 byte SampleEntry, 16 reserved
+    width, height = struct.unpack_from(">HH", data, entry + 32)
+    return {"codec_name": codec, "width": width, "height": height}
+
+
+# Matroska / WebM
+
+
+def _vint(data: bytes, pos: int, keep_marker: bool = False) -> tuple[Optional[int], int]:
+    """Decode an EBML variable-length integer; ``None`` means unknown size."""
+    first = data[pos]
+    if first == 0:
+        raise ValueError("Invalid EBML vint")
+    length = 9 - first.bit_length()
+    if pos + length > len(data):
+        raise ValueError("Truncated EBML vint")
+    value = first if keep_marker else first & (0xFF >> length)
+    for byte in data[pos + 1 : pos + length]:
+        value = (value << 8) | byte
+    if not keep_marker and value == (1 << (7 * length)) - 1:
+        return None, length
+    return value, length
+
+
+def _element_header(data: bytes, pos: int) -> tuple[int, Optional[int], int]:
+    """Return ``(id, size, header_length)`` for the element at ``pos``."""
+    element_id, id_length = _vint(data, pos, keep_marker=True)
+    size, size_length = _vint(data, pos + id_length)
+    return element_id, size, id_length + size_length
+
+
+def _elements(data: bytes, start: int, end: int) -> Iterator[tuple[int, int, int]]:
+    """Yield ``(id, body_start, body_end)`` for each child element."""
+    pos = start
+    while pos < end:
+        element_id, size, header = _element_header(data, pos)
+        if size is None or pos + header + size > end:
+            raise ValueError(f"Unsupported element {element_id:#x}")
+        yield element_id, pos + header, pos + header + size
+        pos += header + size
+
+
+def _uint(data: bytes, start: int, end: int) -> int:
+    return int.from_bytes(data[start:end], "big")
+
+
+def _read_element(f: BinaryIO, pos: int) -> tuple[int, Optional[int], int]:
+    f.seek(pos)
+    return _element_header(f.read(16), 0)
+
+
+def _read_body(f: BinaryIO, pos: int, size: Optional[int]) -> bytes:
+    if size is None or size > MAX_HEADER_SIZE:
+        raise ValueError("Header element too large")
+    f.seek(pos)
+    body = f.read(size)
+    if len(body) != size:
+        raise ValueError("Truncated header element")
+    return body
+
+
+def _probe_matroska(f: BinaryIO, file_size: int) -> Optional[dict]:
+    _, size, header = _read_element(f, 0)
+    ebml = _read_body(f, header, size)
+    doc_types = [ebml[s:e] for eid, s, e in _elements(ebml, 0, len(ebml)) if eid == _DOCTYPE]
+    if not doc_types or doc_types[0] not in (b"matroska", b"webm"):
+        return None
+
+    pos = header + size
+    element_id, size, header = _read_element(f, pos)
+    if element_id != _SEGMENT:
+        return None
+    segment_start = pos + header
+    segment_end = file_size if size is None else min(file_size, segment_start + size)
+
+    found: dict[int, bytes] = {}
+    seek_positions: dict[int, int] = {}
+    pos = segment_start
+    while pos < segment_end and not (_INFO in found and _TRACKS in found):
+        element_id, size, header = _read_element(f, pos)
+        if element_id in (_INFO, _TRACKS):
+            found[element_id] = _read_body(f, pos + header, size)
+        elif element_id == _SEEKHEAD:
+            seek_positions.update(_parse_seekhead(_read_body(f, pos + header, size)))
+        elif element_id == _CLUSTER or size is None:
+            break
+        pos += header + size
+
+    # Headers written after the media data are reachable via the SeekHead.
+    for element_id in (_INFO, _TRACKS):
+        if element_id not in found and element_id in seek_positions:
+            pos = segment_start + seek_positions[element_id]
+            actual_id, size, header = _read_element(f, pos)
+            if actual_id != element_id:
+                return None
+            found[element_id] = _read_body(f, pos + header, size)
+    if _INFO not in found or _TRACKS not in found:
+        return None
+    return _result(_matroska_duration(found[_INFO]), _matroska_streams(found[_TRACKS]))
+
+
+def _parse_seekhead(data: bytes) -> dict[int, int]:
+    positions = {}
+    for element_id, start, end in _elements(data, 0, len(data)):
+        if element_id != _SEEK:
+            continue
+        target = position = None
+        for child, child_start, child_end in _elements(data, start, end):
+            if child == _SEEK_ID:
+                target = _uint(data, child_start, child_end)
+            elif child == _SEEK_POSITION:
+                position = _uint(data, child_start, child_end)
+        if target is not None and position is not None:
+            positions.setdefault(target, position)
+    return positions
+
+
+def _matroska_duration(data: bytes) -> float:
+    timestamp_scale = 1_000_000
+    duration = 0.0
+    for element_id, start, end in _elements(data, 0, len(data)):
+        if element_id == _TIMESTAMP_SCALE:
+            timestamp_scale = _uint(data, start, end)
+        elif element_id == _DURATION:
+            fmt = ">f" if end - start == 4 else ">d"
+            duration = struct.unpack_from(fmt, data, start)[0]
+    return duration * timestamp_scale / 1e9
+
+
+def _matroska_streams(data: bytes) -> list[dict]:
+    streams = []
+    for element_id, start, end in _elements(data, 0, len(data)):
+        if element_id != _TRACK_ENTRY:
+            continue
+        track_type = 0
+        codec_id = ""
+        width = height = 0
+        for child, child_start, child_end in _elements(data, start, end):
+            if child == _TRACK_TYPE:
+                track_type = _uint(data, child_start, child_end)
+            elif child == _CODEC_ID:
+                codec_id = data[child_start:child_end].rstrip(b"\0").decode("ascii")
+            elif child == _VIDEO:
+                for field, field_start, field_end in _elements(data, child_start, child_end):
+                    if field == _PIXEL_WIDTH:
+                        width = _uint(data, field_start, field_end)
+                    elif field == _PIXEL_HEIGHT:
+                        height = _uint(data, field_start, field_end)
+        if track_type != 1:
+            continue
+        codec = _MKV_CODECS.get(codec_id)
+        if codec is None:
+            raise ValueError(f"Unknown CodecID {codec_id!r}")
+        streams.append({"codec_name": codec, "width": width, "height": height})
+    return streams
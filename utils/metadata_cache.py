@@ -0,0 +1,156 @@
+"""Persistent cache of per-file derived data (metadata, thumbnails, scores)."""
+
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+FileIdentity = Tuple[int, int, int, int]
+
+
+class MetadataCache:
+    """SQLite-backed cache keyed by file identity and a value kind.
+
+    The identity is ``(st_dev, st_ino, st_size, st_mtime_ns)``, so an entry
+    survives restarts and renames but is never served for a file that was
+    rewritten. ``kind`` names what is cached (``"metadata"``,
+    ``"deepfake_score"``...). At most ``max_entries`` rows are kept; the
+    least recently used rows are evicted first.
+    """
+
+    def __init__(self, db_path: str = ":memory:", max_entries: int = 100_000) -> None:
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS file_cache (
+                dev INTEGER,
+                ino INTEGER,
+                size INTEGER,
+                mtime_ns INTEGER,
+                kind TEXT,
+                value TEXT,
+                last_access REAL,
+                PRIMARY KEY (dev, ino, size, mtime_ns, kind)
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_file_cache_access ON file_cache (last_access)"
+        )
+        self._conn.commit()
+        self._count = self._conn.execute("SELECT COUNT(*) FROM file_cache").fetchone()[0]
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def identity(file_path: str) -> FileIdentity:
+        """Return the cache identity of ``file_path``."""
+        st = os.stat(file_path)
+        return (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
+
+    def get(self, identity: FileIdentity, kind: str) -> Optional[Any]:
+        """Return the cached value or ``None``."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM file_cache WHERE dev=? AND ino=? AND size=? "
+                "AND mtime_ns=? AND kind=?",
+                (*identity, kind),
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._conn.execute(
+                "UPDATE file_cache SET last_access=? WHERE dev=? AND ino=? AND size=? "
+                "AND mtime_ns=? AND kind=?",
+                (time.time(), *identity, kind),
+            )
+            self._conn.commit()
+        return json.loads(row[0])
+
+    def put(self, identity: FileIdentity, kind: str, value: Any) -> None:
+        """Store a JSON-serializable ``value``."""
+        with self._lock:
+            cur = self._conn.execute(
+                "INSERT OR IGNORE INTO file_cache VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (*identity, kind, json.dumps(value), time.time()),
+            )
+            if cur.rowcount:
+                self._count += 1
+            else:
+                self._conn.execute(
+                    "UPDATE file_cache SET value=?, last_access=? WHERE dev=? AND ino=? "
+                    "AND size=? AND mtime_ns=? AND kind=?",
+                    (json.dumps(value), time.time(), *identity, kind),
+                )
+            self._evict_if_needed()
+            self._conn.commit()
+
+    def _evict_if_needed(self) -> None:
+        excess = self._count - self.max_entries
+        if excess <= 0:
+            return
+        self._conn.execute(
+            "DELETE FROM file_cache WHERE rowid IN "
+            "(SELECT rowid FROM file_cache ORDER BY last_access, rowid LIMIT ?)",
+            (excess,),
+        )
+        self._count -= excess
+        self.evictions += excess
+
+    def get_or_compute(self, file_path: str, kind: str, compute: Callable[[], T]) -> T:
+        """Return the cached value for ``file_path`` or compute and store it.
+
+        The identity is taken before ``compute`` runs, so a file modified
+        meanwhile is cached under its old identity and re-computed next
+        time. ``None`` results are not cached.
+        """
+        try:
+            identity = self.identity(file_path)
+        except OSError:
+            return compute()
+        value = self.get(identity, kind)
+        if value is None:
+            value = compute()
+            if value is not None:
+                self.put(identity, kind, value)
+        return value
+
+    async def get_or_compute_async(
+        self, file_path: str, kind: str, compute: Callable[[], Awaitable[T]]
+    ) -> T:
+        """Awaitable ``get_or_compute`` for coroutine ``compute`` functions."""
+        try:
+            identity = self.identity(file_path)
+        except OSError:
+            return await compute()
+        value = self.get(identity, kind)
+        if value is None:
+            value = await compute()
+            if value is not None:
+                self.put(identity, kind, value)
+        return value
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": self._count,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,180 @@
+"""Retry with exponential backoff and per-endpoint circuit breakers."""
+
+from __future__ import annotations
+
+import asyncio
+import random
+import time
+from typing import Awaitable, Callable, Dict, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised when a request is refused because its circuit is open."""
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Return False for errors that another attempt cannot fix.
+
+    Client errors (4xx other than 408/429), missing local files and open
+    circuits fail immediately; everything else is treated as transient.
+    """
+    if isinstance(error, (CircuitOpenError, FileNotFoundError)):
+        return False
+    status = getattr(error, "status", None)
+    if status is None:
+        response = getattr(error, "response", None)
+        status = getattr(response, "status_code", None)
+    if isinstance(status, int) and 400 <= status < 500:
+        return status in (408, 429)
+    return True
+
+
+class CircuitBreaker:
+    """Track consecutive failures for one endpoint and fail fast when dead.
+
+    After ``failure_threshold`` consecutive failures the circuit opens and
+    ``allow()`` returns False for ``reset_timeout`` seconds. It then goes
+    half-open and lets a single trial request through; success closes the
+    circuit, failure opens it again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self._state = self.CLOSED
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self._state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+            self._state = self.HALF_OPEN
+            self._trial_in_flight = False
+        return self._state
+
+    def available(self) -> bool:
+        """Return True if a request could be sent now, without claiming it."""
+        state = self.state
+        return state == self.CLOSED or (state == self.HALF_OPEN and not self._trial_in_flight)
+
+    def allow(self) -> bool:
+        """Return True if a request may be sent now."""
+        if not self.available():
+            return False
+        if self._state == self.HALF_OPEN:
+            self._trial_in_flight = True
+        return True
+
+    def record_success(self) -> None:
+        self.consecutive_failures = 0
+        self._state = self.CLOSED
+        self._trial_in_flight = False
+
+    def release_trial(self) -> None:
+        """Give back a half-open trial slot whose request was abandoned."""
+        self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        self.consecutive_failures += 1
+        if self._state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            if self._state != self.OPEN:
+                self.times_opened += 1
+            self._state = self.OPEN
+            self.opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+    def as_dict(self) -> Dict[str, object]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "times_opened": self.times_opened,
+        }
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter.
+
+    Attempt ``n`` (0-based) waits a random time in
+    ``[0, min(max_delay, base_delay * multiplier ** n)]`` before the next
+    try. ``run_async`` sleeps with ``asyncio.sleep`` so it never blocks the
+    event loop; ``run`` is the blocking equivalent for synchronous callers.
+    """
+
+    def __init__(
+        self,
+        attempts: int = 3,
+        base_delay: float = 0.5,
+        max_delay: float = 30.0,
+        multiplier: float = 2.0,
+        jitter: bool = True,
+        retry_if: Callable[[BaseException], bool] = is_retryable,
+    ) -> None:
+        self.attempts = max(1, attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.multiplier = multiplier
+        self.jitter = jitter
+        self.retry_if = retry_if
+        self.calls = 0
+        self.retries = 0
+        self.failures = 0
+
+    def delay(self, attempt: int) -> float:
+        """Return the backoff before retrying after ``attempt`` failed."""
+        ceiling = min(self.max_delay, self.base_delay * self.multiplier ** attempt)
+        return random.uniform(0, ceiling) if self.jitter else ceiling
+
+    def _should_retry(self, attempt: int, error: BaseException) -> bool:
+        if attempt + 1 >= self.attempts or not self.retry_if(error):
+            self.failures += 1
+            return False
+        self.retries += 1
+        return True
+
+    async def run_async(self, fn: Callable[[], Awaitable[T]]) -> T:
+        """Await ``fn()`` until it succeeds or the policy gives up."""
+        self.calls += 1
+        attempt = 0
+        while True:
+            try:
+                return await fn()
+            except Exception as e:
+                if not self._should_retry(attempt, e):
+                    raise
+            await asyncio.sleep(self.delay(attempt))
+            attempt += 1
+
+    def run(self, fn: Callable[[], T]) -> T:
+        """Call ``fn()`` until it succeeds or the policy gives up."""
+        self.calls += 1
+        attempt = 0
+        while True:
+            try:
+                return fn()
+            except Exception as e:
+                if not self._should_retry(attempt, e):
+                    raise
+            time.sleep(self.delay(attempt))
+            attempt += 1
+
+    def stats(self) -> Dict[str, int]:
+        return {"calls": self.calls, "retries": self.retries, "failures": self.failures}
+
+
+def breaker_stats(breakers: Dict[str, CircuitBreaker]) -> Dict[str, Dict[str, object]]:
+    """Return ``as_dict()`` for each named breaker."""
+    return {name: breaker.as_dict() for name, breaker in breakers.items()}
+
+
+def guard(breaker: Optional[CircuitBreaker], name: str) -> None:
+    """Raise ``CircuitOpenError`` if ``breaker`` refuses a request."""
+    if breaker is not None and not breaker.allow():
+        raise CircuitOpenError(f"Circuit open for {name}")
@@ -1,93 +1,760 @@
 """Simple storage management with LRU eviction."""
 
+import asyncio
+import hashlib
 import os
 import shutil
+import sqlite3
+import threading
 import time
+import uuid
 from collections import OrderedDict
-from typing import Optional, Dict
+from contextlib import asynccontextmanager, contextmanager
+from typing import AsyncIterator, Callable, Iterator, Optional, Dict, List, Tuple, Union
+
+from .cache_policies import make_policy
+
+# Index file kept inside ``root``; dot-prefixed entries are never tracked.
+INDEX_NAME = ".index.sqlite3"
+
+# Content-addressed objects live under ``root/objects/<aa>/<bb>/``.
+OBJECTS_DIR = "objects"
+
+# Files failing verification are moved here (dot-prefixed, so untracked).
+QUARANTINE_DIR = ".quarantine"
+
+# Columns added to the index after its first release.
+_LATER_COLUMNS = {"object": "TEXT", "checksum": "TEXT", "checksum_mtime": "INTEGER"}
+
+INGEST_MODES = ("copy", "move", "link")
+
+# In-flight downloads and their resume state are not files to adopt.
+_PARTIAL_SUFFIXES = (".part", ".part.progress")
+
+# ioctl(dest_fd, FICLONE, src_fd) shares extents on btrfs/XFS (Linux).
+_FICLONE = 0x40049409
+
+
+def _clone(src_fd: int, dst_fd: int) -> bool:
+    try:
+        import fcntl
+
+        fcntl.ioctl(dst_fd, _FICLONE, src_fd)
+        return True
+    except (ImportError, OSError):
+        return False
+
+
+def _kernel_copy(src_fd: int, dst_fd: int, size: int) -> str:
+    """Copy ``size`` bytes in the kernel; return the syscall that did it."""
+    if hasattr(os, "copy_file_range"):
+        try:
+            copied = 0
+            while copied < size:
+                n = os.copy_file_range(src_fd, dst_fd, size - copied)
+                if n == 0:
+                    break
+                copied += n
+            if copied == size:
+                return "copy_file_range"
+        except OSError:
+            pass
+        os.lseek(src_fd, 0, os.SEEK_SET)
+        os.lseek(dst_fd, 0, os.SEEK_SET)
+        os.ftruncate(dst_fd, 0)
+    try:
+        offset = 0
+        while offset < size:
+            n = os.sendfile(dst_fd, src_fd, offset, size - offset)
+            if n == 0:
+                break
+            offset += n
+        if offset == size:
+            return "sendfile"
+    except (AttributeError, OSError):
+        pass
+    os.lseek(src_fd, 0, os.SEEK_SET)
+    os.lseek(dst_fd, 0, os.SEEK_SET)
+    os.ftruncate(dst_fd, 0)
+    with open(src_fd, "rb", closefd=False) as src, open(dst_fd, "wb", closefd=False) as dst:
+        shutil.copyfileobj(src, dst, 1024 * 1024)
+    return "copy"
+
+
+def _file_digest(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def ingest_file(source_path: str, dest: str, mode: str = "copy") -> str:
+    """Place ``source_path`` at ``dest`` atomically, avoiding data copies.
+
+    ``move`` renames (the source is consumed), ``link`` hardlinks (the
+    source must not be modified afterwards) and ``copy`` reflinks. Each
+    falls back to an in-kernel ``copy_file_range``/``sendfile`` copy when
+    the cheaper operation is not possible, e.g. across filesystems.
+    Returns the method used.
+    """
+    if mode not in INGEST_MODES:
+        raise ValueError(f"Unknown ingest mode: {mode}")
+    if mode == "move":
+        try:
+            os.replace(source_path, dest)
+            return "rename"
+        except OSError:
+            pass
+    tmp = os.path.join(
+        os.path.dirname(dest), f".{os.path.basename(dest)}.{uuid.uuid4().hex[:8]}.ingest"
+    )
+    try:
+        if mode == "link":
+            try:
+                os.link(source_path, tmp)
+                os.replace(tmp, dest)
+                return "hardlink"
+            except OSError:
+                pass
+        with open(source_path, "rb") as src, open(tmp, "wb") as dst:
+            size = os.fstat(src.fileno()).st_size
+            if _clone(src.fileno(), dst.fileno()):
+                method = "reflink"
+            else:
+                method = _kernel_copy(src.fileno(), dst.fileno(), size)
+        shutil.copystat(source_path, tmp)
+        os.replace(tmp, dest)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    if mode == "move":
+        os.remove(source_path)
+    return method
 
 
 class StorageManager:
-    """Manage local video storage."""
+    """Manage local video storage.
+
+    ``metadata`` is ordered least recently used first and mirrored to a
+    SQLite index (WAL journal) so it survives restarts. On start the index
+    is reconciled with an ``os.scandir`` walk of ``root``: untracked files
+    are adopted, vanished ones dropped, and ``max_size`` is enforced.
+
+    With ``content_addressed=True`` each distinct content is stored once,
+    as ``objects/<aa>/<bb>/<sha256><ext>``, and names map to objects
+    through the index. An object is deleted with its last name, and
+    ``max_size`` counts every object once.
 
-    def __init__(self, root: str = "storage", max_size: int = 0) -> None:
+    ``policy`` picks eviction victims: a name from
+    ``cache_policies.POLICIES`` or a policy instance. By default the least
+    recently used name goes first. Policy state (e.g. frequencies) is
+    rebuilt from recency order on restart.
+
+    ``on_evict(name, path)`` is called before an evicted file is deleted,
+    e.g. to demote it to a slower tier. It runs under the store's lock,
+    so it should only link ``path`` aside and do any copying later.
+
+    All methods are thread-safe. Index and accounting changes happen in a
+    short global critical section; copying and hashing run outside it
+    into a staging file that is renamed into place when committed, with
+    a per-name lock ordering writers of the same name. Names pinned with
+    ``pin``/``lease`` are never evicted while a reader holds them.
+
+    Reads only touch the in-memory index. Their access times are written
+    back in batches: once ``flush_batch`` names are dirty or
+    ``flush_interval`` seconds have passed, on eviction and on ``close``.
+    """
+
+    def __init__(
+        self,
+        root: str = "storage",
+        max_size: int = 0,
+        index_path: Optional[str] = None,
+        reconcile: bool = True,
+        content_addressed: bool = False,
+        policy: Union[str, object, None] = None,
+        on_evict: Optional[Callable[[str, str], None]] = None,
+        flush_interval: float = 5.0,
+        flush_batch: int = 256,
+    ) -> None:
         self.root = root
         self.max_size = max_size
+        self.content_addressed = content_addressed
+        self.policy = make_policy(policy, max_size) if isinstance(policy, str) else policy
+        self.on_evict = on_evict
+        self.flush_interval = flush_interval
+        self.flush_batch = flush_batch
+        # Names whose last_access changed since the index was last written.
+        self._dirty: set = set()
+        self._last_flush = time.monotonic()
+        self._lock = threading.RLock()
+        self._key_locks: Dict[str, List] = {}
+        self._pins: Dict[str, int] = {}
+        # Entries deleted (or replaced) while pinned, released on the last unpin.
+        self._deferred: Dict[str, List[Dict]] = {}
         self.metadata: OrderedDict[str, Dict] = OrderedDict()
+        self._refs: Dict[str, int] = {}
+        self._size = 0
         os.makedirs(self.root, exist_ok=True)
+        self.index_path = index_path or os.path.join(self.root, INDEX_NAME)
+        self._conn = sqlite3.connect(self.index_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS files (name TEXT PRIMARY KEY, size INTEGER, "
+            "last_access REAL, adopted INTEGER, object TEXT, checksum TEXT, "
+            "checksum_mtime INTEGER)"
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(files)")}
+        for column, kind in _LATER_COLUMNS.items():
+            if column not in columns:
+                self._conn.execute(f"ALTER TABLE files ADD COLUMN {column} {kind}")
+        self._conn.commit()
+        for name, size, last_access, adopted, obj, checksum, checksum_mtime in self._conn.execute(
+            "SELECT name, size, last_access, adopted, object, checksum, checksum_mtime "
+            "FROM files ORDER BY last_access"
+        ):
+            meta = {"size": size, "last_access": last_access}
+            if adopted:
+                meta["adopted"] = True
+            if obj:
+                meta["object"] = obj
+            if checksum:
+                meta["checksum"] = checksum
+                meta["checksum_mtime"] = checksum_mtime
+            self._attach(name, meta)
+        if reconcile:
+            self.reconcile()
+        self._evict_if_needed()
 
     def get_storage_path(self, filename: str) -> str:
         """Return absolute path for a stored file."""
+        meta = self.metadata.get(filename)
+        if meta is not None and "object" in meta:
+            return self._object_path(meta["object"])
         return os.path.join(self.root, filename)
 
+    def _object_path(self, obj: str) -> str:
+        return os.path.join(self.root, OBJECTS_DIR, obj[:2], obj[2:4], obj)
+
     def _current_size(self) -> int:
-        return sum(meta["size"] for meta in self.metadata.values())
+        return self._size
+
+    def _scan(self, directory: str = "") -> Iterator[Tuple[str, os.stat_result]]:
+        """Yield ``(name, stat)`` for every file under ``root``.
+
+        The top-level walk skips the object store.
+        """
+        with os.scandir(os.path.join(self.root, directory)) as entries:
+            for entry in entries:
+                if entry.name.startswith(".") or (not directory and entry.name == OBJECTS_DIR):
+                    continue
+                name = f"{directory}/{entry.name}" if directory else entry.name
+                if entry.is_dir(follow_symlinks=False):
+                    yield from self._scan(name)
+                elif entry.is_file(follow_symlinks=False) and not name.endswith(
+                    _PARTIAL_SUFFIXES
+                ):
+                    yield name, entry.stat(follow_symlinks=False)
+
+    def reconcile(self) -> Dict[str, int]:
+        """Bring the index in line with the files on disk.
+
+        Untracked files are adopted with their mtime as last access, so
+        they are evicted before anything used since, and flagged
+        ``"adopted"`` until ``track_file`` vouches for them. In
+        content-addressed mode they are moved into the object store, and
+        objects no name refers to are deleted.
+        """
+        with self._lock:
+            for entry in os.scandir(self.root):
+                if entry.name.startswith(".staging-"):
+                    # Left by a store interrupted before its commit.
+                    os.remove(entry.path)
+            loose = dict(self._scan())
+            objects = {}
+            if os.path.isdir(os.path.join(self.root, OBJECTS_DIR)):
+                objects = {os.path.basename(n): st for n, st in self._scan(OBJECTS_DIR)}
+            removed = [
+                name
+                for name, meta in self.metadata.items()
+                if (meta["object"] not in objects if "object" in meta else name not in loose)
+            ]
+            for name in removed:
+                self._release(name, self._pop(name))
+            added = updated = 0
+            changed = []
+            for name, st in loose.items():
+                meta = self.metadata.get(name)
+                if meta is not None and "object" not in meta:
+                    if meta["size"] != st.st_size:
+                        self._size += st.st_size - meta["size"]
+                        meta["size"] = st.st_size
+                        meta.pop("checksum", None)
+                        updated += 1
+                        changed.append(name)
+                    continue
+                adopted = {"size": st.st_size, "last_access": st.st_mtime, "adopted": True}
+                if self.content_addressed:
+                    path = os.path.join(self.root, name)
+                    adopted["object"] = self._ingest_object(path, name, "move")
+                elif meta is not None:
+                    # Served from its object; the stray file is not ours to judge.
+                    continue
+                self._put(name, adopted)
+                added += 1
+                changed.append(name)
+            orphans = [obj for obj in objects if obj not in self._refs]
+            for obj in orphans:
+                os.remove(self._object_path(obj))
+            if added:
+                self.metadata = OrderedDict(
+                    sorted(self.metadata.items(), key=lambda item: item[1]["last_access"])
+                )
+            with self._conn:
+                self._conn.executemany("DELETE FROM files WHERE name=?", [(n,) for n in removed])
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [self._row(name) for name in changed],
+                )
+            return {
+                "added": added,
+                "removed": len(removed),
+                "updated": updated,
+                "orphans": len(orphans),
+            }
+
+    def _attach(self, name: str, meta: Dict) -> None:
+        obj = meta.get("object")
+        if obj is None:
+            self._size += meta["size"]
+        else:
+            refs = self._refs.get(obj, 0)
+            if not refs:
+                self._size += meta["size"]
+            self._refs[obj] = refs + 1
+        self.metadata[name] = meta
+        if self.policy is not None:
+            self.policy.insert(name, meta["size"])
+
+    def _pop(self, name: str) -> Optional[Dict]:
+        if self.policy is not None:
+            self.policy.remove(name)
+        return self.metadata.pop(name, None)
+
+    def _release(self, name: str, meta: Dict) -> None:
+        """Drop ``name``'s claim on its bytes, deleting them if unreferenced."""
+        obj = meta.get("object")
+        if obj is not None:
+            refs = self._refs[obj] - 1
+            if refs:
+                self._refs[obj] = refs
+                return
+            del self._refs[obj]
+            path = self._object_path(obj)
+        else:
+            path = os.path.join(self.root, name)
+        self._size -= meta["size"]
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def _put(self, name: str, meta: Dict) -> None:
+        previous = self.metadata.pop(name, None)
+        self._attach(name, meta)
+        for deferred in self._deferred.get(name, [])[:]:
+            if "object" not in deferred and "object" not in meta:
+                # Same path, already overwritten: nothing left to keep.
+                self._deferred[name].remove(deferred)
+                self._size -= deferred["size"]
+        if self._deferred.get(name) == []:
+            del self._deferred[name]
+        if previous is not None:
+            if "object" in previous or "object" in meta:
+                if name in self._pins:
+                    # A reader still holds the old bytes.
+                    self._deferred.setdefault(name, []).append(previous)
+                else:
+                    self._release(name, previous)
+            else:
+                # Same path, rewritten in place.
+                self._size -= previous["size"]
+
+    def _row(self, name: str) -> Tuple:
+        meta = self.metadata[name]
+        return (
+            name,
+            meta["size"],
+            meta["last_access"],
+            meta.get("adopted", False),
+            meta.get("object"),
+            meta.get("checksum"),
+            meta.get("checksum_mtime"),
+        )
+
+    def _record(self, name: str) -> None:
+        self._dirty.discard(name)
+        with self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?)", self._row(name)
+            )
+
+    def _flush_access(self) -> None:
+        """Write back the access times of dirty names; call with the connection open."""
+        rows = [(self.metadata[n]["last_access"], n) for n in self._dirty if n in self.metadata]
+        if rows:
+            self._conn.executemany("UPDATE files SET last_access=? WHERE name=?", rows)
+        self._dirty.clear()
+        self._last_flush = time.monotonic()
+
+    def _forget(self, name: str) -> None:
+        self._dirty.discard(name)
+        meta = self._pop(name)
+        if meta is not None:
+            if name in self._pins:
+                # Unlinked once the last reader unpins it.
+                self._deferred.setdefault(name, []).append(meta)
+            else:
+                self._release(name, meta)
+            with self._conn:
+                self._conn.execute("DELETE FROM files WHERE name=?", (name,))
 
     def _evict_if_needed(self) -> None:
-        while self.max_size and self._current_size() > self.max_size and self.metadata:
-            oldest, _ = self.metadata.popitem(last=False)
-            path = self.get_storage_path(oldest)
-            try:
-                os.remove(path)
-            except FileNotFoundError:
-                pass
+        evicted = []
+        pinned = []
+        while self.max_size and self._size > self.max_size and self.metadata:
+            if self.policy is None:
+                oldest = next((n for n in self.metadata if n not in self._pins), None)
+                if oldest is None:
+                    break
+            else:
+                oldest = self.policy.evict()
+                if oldest is None:
+                    break
+                if oldest not in self.metadata:
+                    continue
+                if oldest in self._pins:
+                    pinned.append(oldest)
+                    continue
+            meta = self.metadata.pop(oldest)
+            if self.on_evict is not None:
+                path = self._object_path(meta["object"]) if "object" in meta else None
+                self.on_evict(oldest, path or os.path.join(self.root, oldest))
+            self._release(oldest, meta)
+            evicted.append((oldest,))
+        for name in pinned:
+            self.policy.insert(name, self.metadata[name]["size"])
+        if evicted:
+            with self._conn:
+                self._conn.executemany("DELETE FROM files WHERE name=?", evicted)
+                self._flush_access()
+
+    def _ingest_object(self, source_path: str, name: str, mode: str) -> str:
+        """Place ``source_path`` in the object store unless already there."""
+        obj = _file_digest(source_path) + os.path.splitext(name)[1]
+        if obj in self._refs:
+            if mode == "move":
+                os.remove(source_path)
+        else:
+            path = self._object_path(obj)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            ingest_file(source_path, path, mode)
+        return obj
+
+    def _track(self, name: str, meta: Dict) -> str:
+        self._put(name, meta)
+        self._record(name)
+        self._evict_if_needed()
+        return self.get_storage_path(name)
+
+    @contextmanager
+    def _key_lock(self, name: str) -> Iterator[None]:
+        """Serialize writers of one name without holding the global lock."""
+        with self._lock:
+            entry = self._key_locks.setdefault(name, [threading.Lock(), 0])
+            entry[1] += 1
+        entry[0].acquire()
+        try:
+            yield
+        finally:
+            entry[0].release()
+            with self._lock:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self._key_locks[name]
 
-    def store_file(self, source_path: str, name: Optional[str] = None) -> str:
-        """Store a file and return its storage path."""
+    def _commit(self, name: str, staged: str, obj: Optional[str] = None) -> str:
+        """Rename a fully written ``staged`` file into place and index it."""
+        with self._lock:
+            if obj is None:
+                dest = os.path.join(self.root, name)
+                os.makedirs(os.path.dirname(dest), exist_ok=True)
+                os.replace(staged, dest)
+                meta = {"size": os.path.getsize(dest), "last_access": time.time()}
+                return self._track(name, meta)
+            path = self._object_path(obj)
+            if obj in self._refs:
+                os.remove(staged)
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.replace(staged, path)
+            meta = {"size": os.path.getsize(path), "last_access": time.time(), "object": obj}
+            return self._track(name, meta)
+
+    def store_file(self, source_path: str, name: Optional[str] = None, mode: str = "copy") -> str:
+        """Store a file and return its storage path.
+
+        ``mode`` is passed to ``ingest_file``: ``"move"`` takes ownership of
+        ``source_path``, which is the cheapest way to store a temp file.
+        """
         if name is None:
             name = os.path.basename(source_path)
-        dest = self.get_storage_path(name)
-        shutil.copy2(source_path, dest)
-        size = os.path.getsize(dest)
-        self.metadata[name] = {"size": size, "last_access": time.time()}
-        self.metadata.move_to_end(name, last=True)
-        self._evict_if_needed()
-        return dest
+        with self._key_lock(name):
+            obj = None
+            if self.content_addressed:
+                obj = _file_digest(source_path) + os.path.splitext(name)[1]
+                with self._lock:
+                    if obj in self._refs:
+                        # Already stored: just add the name.
+                        size = os.path.getsize(self._object_path(obj))
+                        meta = {"size": size, "last_access": time.time(), "object": obj}
+                        path = self._track(name, meta)
+                        if mode == "move":
+                            os.remove(source_path)
+                        return path
+            staged = os.path.join(self.root, f".staging-{uuid.uuid4().hex}")
+            try:
+                ingest_file(source_path, staged, mode)
+                return self._commit(name, staged, obj)
+            finally:
+                if os.path.exists(staged):
+                    os.remove(staged)
+
+    def track_file(self, name: str) -> str:
+        """Start tracking a file already written under ``root``.
+
+        A name that is already stored and has no new file written under it
+        is just marked as used (and no longer ``"adopted"``).
+        """
+        dest = os.path.join(self.root, name)
+        with self._key_lock(name):
+            with self._lock:
+                if "object" in self.metadata.get(name, {}) and not os.path.isfile(dest):
+                    meta = dict(self.metadata[name], last_access=time.time())
+                    meta.pop("adopted", None)
+                    return self._track(name, meta)
+                if not self.content_addressed:
+                    size = os.path.getsize(dest)
+                    return self._track(name, {"size": size, "last_access": time.time()})
+            return self._commit(name, dest, _file_digest(dest) + os.path.splitext(name)[1])
 
     def get_file(self, name: str) -> Optional[str]:
         """Retrieve a file path and update access time."""
-        path = self.get_storage_path(name)
-        if os.path.isfile(path):
-            if name in self.metadata:
-                self.metadata[name]["last_access"] = time.time()
-                self.metadata.move_to_end(name, last=True)
+        with self._lock:
+            path = self.get_storage_path(name)
+            live = name in self.metadata or name not in self._deferred
+            if live and os.path.isfile(path):
+                if name in self.metadata:
+                    self.metadata[name]["last_access"] = time.time()
+                    self.metadata.move_to_end(name, last=True)
+                    if self.policy is not None:
+                        self.policy.access(name)
+                    self._dirty.add(name)
+                    if (
+                        len(self._dirty) >= self.flush_batch
+                        or time.monotonic() - self._last_flush >= self.flush_interval
+                    ):
+                        with self._conn:
+                            self._flush_access()
+                return path
+            return None
+
+    def pin(self, name: str) -> Optional[str]:
+        """Protect ``name`` from eviction until ``unpin``; return its path.
+
+        Returns None (and pins nothing) if the file is not stored. Pins
+        nest. Deleting a pinned name removes it from the index at once but
+        keeps the file until it is unpinned.
+        """
+        with self._lock:
+            path = self.get_file(name)
+            if path is not None:
+                self._pins[name] = self._pins.get(name, 0) + 1
             return path
-        return None
+
+    def unpin(self, name: str) -> None:
+        with self._lock:
+            count = self._pins.get(name, 0) - 1
+            if count > 0:
+                self._pins[name] = count
+                return
+            self._pins.pop(name, None)
+            # Deletions and evictions deferred by the pin happen now.
+            for meta in self._deferred.pop(name, []):
+                self._release(name, meta)
+            self._evict_if_needed()
+
+    @contextmanager
+    def lease(self, name: str) -> Iterator[Optional[str]]:
+        """Pin ``name`` for the duration of a ``with`` block."""
+        path = self.pin(name)
+        try:
+            yield path
+        finally:
+            if path is not None:
+                self.unpin(name)
 
     def delete_file(self, name: str) -> None:
         """Delete a stored file."""
-        path = self.get_storage_path(name)
-        if os.path.isfile(path):
-            os.remove(path)
-        self.metadata.pop(name, None)
+        with self._key_lock(name), self._lock:
+            if name in self.metadata:
+                self._forget(name)
+                return
+            if name in self._deferred:
+                return
+            path = self.get_storage_path(name)
+            if os.path.isfile(path):
+                os.remove(path)
 
     def storage_size(self) -> int:
         """Return total size used by storage."""
-        return self._current_size()
+        return self._size
 
     def cleanup_old_files(self, max_age: float) -> None:
         """Remove files not accessed within max_age seconds."""
         cutoff = time.time() - max_age
-        for name in list(self.metadata.keys()):
-            if self.metadata[name]["last_access"] < cutoff:
-                self.delete_file(name)
+        with self._lock:
+            expired = [
+                name
+                for name, meta in self.metadata.items()
+                if meta["last_access"] < cutoff and name not in self._pins
+            ]
+        for name in expired:
+            self.delete_file(name)
 
     def stats(self) -> Dict[str, int]:
         """Return statistics about storage."""
-        return {"count": len(self.metadata), "size": self._current_size()}
+        with self._lock:
+            stats = {"count": len(self.metadata), "size": self._size}
+            if self.content_addressed:
+                stats["objects"] = len(self._refs)
+            return stats
+
+    def backup(self, dest_dir: str, workers: int = 4) -> dict:
+        """Incrementally back up to ``dest_dir``; see ``storage_backup``."""
+        from .storage_backup import backup
 
-    def backup(self, dest_dir: str) -> None:
-        """Backup stored files to another directory."""
-        os.makedirs(dest_dir, exist_ok=True)
-        for name in self.metadata:
-            shutil.copy2(self.get_storage_path(name), os.path.join(dest_dir, name))
+        return backup(self, dest_dir, workers)
 
     def detect_corruption(self) -> Dict[str, bool]:
         """Check that all metadata files exist on disk."""
-        status = {}
-        for name in list(self.metadata.keys()):
+        with self._lock:
+            status = {}
+            for name in list(self.metadata.keys()):
+                path = self.get_storage_path(name)
+                status[name] = os.path.isfile(path)
+                if not status[name]:
+                    self._forget(name)
+            return status
+
+    def expected_checksum(self, name: str) -> Optional[str]:
+        """Return the SHA-256 a stored file should have, if known.
+
+        Objects are named by their digest. Flat files have one only once
+        ``record_checksum`` has been called for the current file.
+        """
+        meta = self.metadata.get(name)
+        if meta is None:
+            return None
+        if "object" in meta:
+            return meta["object"][:64]
+        checksum = meta.get("checksum")
+        if checksum is None:
+            return None
+        try:
+            mtime_ns = os.stat(self.get_storage_path(name)).st_mtime_ns
+        except FileNotFoundError:
+            return None
+        # A rewritten file (new mtime) has to be checksummed afresh.
+        return checksum if meta.get("checksum_mtime") == mtime_ns else None
+
+    def record_checksum(self, name: str, checksum: str, mtime_ns: int) -> None:
+        """Remember the SHA-256 of a flat file as of ``mtime_ns``."""
+        with self._lock:
+            meta = self.metadata.get(name)
+            if meta is not None and "object" not in meta:
+                meta["checksum"] = checksum
+                meta["checksum_mtime"] = mtime_ns
+                self._record(name)
+
+    def quarantine(self, name: str) -> Optional[str]:
+        """Move a damaged file aside and forget every name stored in it.
+
+        Returns the quarantined path.
+        """
+        with self._lock:
+            meta = self.metadata.get(name)
+            if meta is None:
+                return None
             path = self.get_storage_path(name)
-            status[name] = os.path.isfile(path)
-            if not status[name]:
-                self.metadata.pop(name, None)
-        return status
+            if "object" in meta:
+                names = [n for n, m in self.metadata.items() if m.get("object") == meta["object"]]
+            else:
+                names = [name]
+            dest_dir = os.path.join(self.root, QUARANTINE_DIR)
+            os.makedirs(dest_dir, exist_ok=True)
+            dest = os.path.join(dest_dir, f"{int(time.time())}-{name.replace('/', '_')}")
+            try:
+                os.replace(path, dest)
+            except FileNotFoundError:
+                dest = None
+            for affected in names:
+                self._forget(affected)
+            return dest
+
+    def close(self) -> None:
+        """Write back pending access times and close the index."""
+        with self._lock:
+            with self._conn:
+                self._flush_access()
+            self._conn.close()
+
+
+class AsyncStorageManager:
+    """Awaitable facade over a ``StorageManager``.
+
+    Blocking file I/O runs in worker threads, so many ingests can proceed
+    concurrently without stalling the event loop.
+    """
+
+    def __init__(self, storage: StorageManager) -> None:
+        self.storage = storage
+
+    async def store_file(
+        self, source_path: str, name: Optional[str] = None, mode: str = "copy"
+    ) -> str:
+        return await asyncio.to_thread(self.storage.store_file, source_path, name, mode)
+
+    async def track_file(self, name: str) -> str:
+        return await asyncio.to_thread(self.storage.track_file, name)
+
+    async def get_file(self, name: str) -> Optional[str]:
+        return await asyncio.to_thread(self.storage.get_file, name)
+
+    async def delete_file(self, name: str) -> None:
+        await asyncio.to_thread(self.storage.delete_file, name)
+
+    @asynccontextmanager
+    async def lease(self, name: str) -> AsyncIterator[Optional[str]]:
+        """Async ``StorageManager.lease``."""
+        path = await asyncio.to_thread(self.storage.pin, name)
+        try:
+            yield path
+        finally:
+            if path is not None:
+                await asyncio.to_thread(self.storage.unpin, name)
+
+    def stats(self) -> Dict[str, int]:
+        return self.storage.stats()
@@ -0,0 +1,171 @@
+"""Rate-limited background integrity checks and expiry for ``StorageManager``."""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import os
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+from .storage_manager import StorageManager
+
+
+class StorageScrubber:
+    """Walk a store a slice at a time, expiring and verifying files.
+
+    Each ``tick`` visits at most ``max_files`` names from a cursor that
+    cycles through the store, so no call is a stop-the-world pass. Files
+    not accessed for ``max_age`` seconds are deleted. Other files are
+    hashed with reads throttled to ``bytes_per_second`` and compared with
+    their expected SHA-256 (the object name in content-addressed stores).
+    A flat file without one gets a baseline checksum on its first visit,
+    which catches silent corruption on later passes. Mismatches are
+    quarantined. An object shared by several names (content-addressed
+    stores) is hashed once per pass.
+    """
+
+    def __init__(
+        self,
+        storage: StorageManager,
+        bytes_per_second: int = 50 * 1024 * 1024,
+        max_files: int = 100,
+        max_age: Optional[float] = None,
+        block_size: int = 1024 * 1024,
+    ) -> None:
+        self.storage = storage
+        self.bytes_per_second = bytes_per_second
+        self.max_files = max_files
+        self.max_age = max_age
+        self.block_size = block_size
+        self._snapshot: List[str] = []
+        self._cursor = 0
+        self._seen: Set[str] = set()
+        self._allowance = 0.0
+        self._last = time.monotonic()
+        self.passes = 0
+        self.counts = {
+            "verified": 0,
+            "baselined": 0,
+            "corrupt": 0,
+            "missing": 0,
+            "expired": 0,
+            "shared": 0,
+            "bytes_read": 0,
+        }
+        self.quarantined: List[str] = []
+
+    def _throttle(self, nbytes: int) -> None:
+        if not self.bytes_per_second:
+            return
+        now = time.monotonic()
+        self._allowance = min(
+            float(self.bytes_per_second),
+            self._allowance + (now - self._last) * self.bytes_per_second,
+        )
+        self._last = now
+        self._allowance -= nbytes
+        if self._allowance < 0:
+            time.sleep(-self._allowance / self.bytes_per_second)
+
+    def _hash(self, path: str) -> Optional[str]:
+        """SHA-256 of ``path`` read under the I/O budget; None if it vanished."""
+        digest = hashlib.sha256()
+        try:
+            with open(path, "rb") as f:
+                while True:
+                    block = f.read(self.block_size)
+                    if not block:
+                        break
+                    digest.update(block)
+                    self.counts["bytes_read"] += len(block)
+                    self._throttle(len(block))
+        except FileNotFoundError:
+            return None
+        return digest.hexdigest()
+
+    def _next_slice(self, max_files: Optional[int]) -> List[str]:
+        if self._cursor >= len(self._snapshot):
+            # Files stored after the snapshot are picked up next pass.
+            self._snapshot = list(self.storage.metadata)
+            self._cursor = 0
+            self._seen.clear()
+        names = self._snapshot[self._cursor : self._cursor + (max_files or self.max_files)]
+        self._cursor += len(names)
+        if names and self._cursor >= len(self._snapshot):
+            self.passes += 1
+        return names
+
+    def _plan(self, name: str) -> Optional[Tuple[str, str, Optional[str], int]]:
+        """Expire or skip ``name``; otherwise return what to hash."""
+        meta = self.storage.metadata.get(name)
+        if meta is None:
+            return None
+        if self.max_age is not None and meta["last_access"] < time.time() - self.max_age:
+            self.storage.delete_file(name)
+            self.counts["expired"] += 1
+            return None
+        path = self.storage.get_storage_path(name)
+        if path in self._seen:
+            # Another name for an object already checked this pass.
+            self.counts["shared"] += 1
+            return None
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            self.storage.delete_file(name)
+            self.counts["missing"] += 1
+            return None
+        self._seen.add(path)
+        return name, path, self.storage.expected_checksum(name), mtime_ns
+
+    def _apply(
+        self, name: str, path: str, expected: Optional[str], mtime_ns: int, digest: Optional[str]
+    ) -> None:
+        if digest is None or self.storage.get_storage_path(name) != path:
+            return
+        try:
+            if os.stat(path).st_mtime_ns != mtime_ns:
+                return  # Rewritten while hashing; next pass checks it.
+        except FileNotFoundError:
+            return
+        if expected is None:
+            self.storage.record_checksum(name, digest, mtime_ns)
+            self.counts["baselined"] += 1
+        elif digest == expected:
+            self.counts["verified"] += 1
+        else:
+            self.counts["corrupt"] += 1
+            quarantined = self.storage.quarantine(name)
+            if quarantined:
+                self.quarantined.append(quarantined)
+
+    def tick(self, max_files: Optional[int] = None) -> Dict[str, int]:
+        """Process the next slice of the store and return ``progress()``."""
+        for name in self._next_slice(max_files):
+            plan = self._plan(name)
+            if plan is not None:
+                self._apply(*plan, self._hash(plan[1]))
+        return self.progress()
+
+    async def run(self, interval: float = 1.0, max_files: Optional[int] = None) -> None:
+        """Tick every ``interval`` seconds until cancelled.
+
+        Hashing runs in a worker thread; the store itself is only touched
+        from the event loop.
+        """
+        while True:
+            for name in self._next_slice(max_files):
+                plan = self._plan(name)
+                if plan is not None:
+                    digest = await asyncio.to_thread(self._hash, plan[1])
+                    self._apply(*plan, digest)
+            await asyncio.sleep(interval)
+
+    def progress(self) -> Dict[str, int]:
+        return {
+            "passes": self.passes,
+            "position": self._cursor,
+            "total": len(self._snapshot),
+            **self.counts,
+        }
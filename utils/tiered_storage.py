@@ -0,0 +1,322 @@
+"""Hot/cold tiered storage over two ``StorageManager`` instances."""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from typing import Deque, Dict, Iterator, List, Optional, Set, Tuple
+
+from .storage_manager import StorageManager, ingest_file
+
+
+class TieredStorage:
+    """Keep frequently read files on a fast tier and the rest on a slow one.
+
+    ``hot`` is a small store on fast disk whose ``max_size`` is the SSD
+    budget; ``cold`` is a large store on cheaper disk (or a network
+    mount). New files land in ``hot``. When ``hot`` evicts a file it is
+    demoted to ``cold`` instead of being deleted, and ``rebalance``
+    demotes hot files idle for ``demote_after`` seconds to keep headroom.
+
+    Reads are counted with exponential decay (``half_life`` seconds). A
+    cold file read ``promote_hits`` times recently is promoted in the
+    background; the read itself is served from the cold tier right away,
+    so a cold hit costs one slow-disk read and never waits for a copy.
+
+    The tier lock only guards this object's bookkeeping and is never held
+    while calling into ``hot`` or ``cold``. Writers of one name (stores,
+    deletes, moves) are ordered by a per-name lock instead, so reads are
+    never blocked by a transfer. A file evicted from ``hot`` is
+    hard-linked aside and queued by hot's ``on_evict``, which takes no
+    lock, and copied to ``cold`` later; until then ``get_file`` serves
+    the link.
+    """
+
+    def __init__(
+        self,
+        hot: StorageManager,
+        cold: StorageManager,
+        promote_hits: float = 2.0,
+        demote_after: float = 24 * 3600.0,
+        half_life: float = 3600.0,
+    ) -> None:
+        self.hot = hot
+        self.cold = cold
+        self.promote_hits = promote_hits
+        self.demote_after = demote_after
+        self.half_life = half_life
+        self._lock = threading.Lock()
+        self._key_locks: Dict[str, List] = {}
+        # (name, link) pairs queued by hot's eviction callback.
+        self._evicted: Deque[Tuple[str, str]] = deque()
+        self._demoting: Dict[str, str] = {}
+        self._copying: Set[str] = set()
+        self._hits: Dict[str, Tuple[float, float]] = {}
+        self._promoting: Set[str] = set()
+        self._tasks: Set[asyncio.Task] = set()
+        self.promoted = 0
+        self.demoted = 0
+        self.demote_errors = 0
+        self.hot.on_evict = self._demote_evicted
+        # Links left by a demotion or move interrupted by a crash.
+        for root in (self.hot.root, self.cold.root):
+            for entry in os.scandir(root):
+                if entry.name.startswith((".demote-", ".move-")):
+                    os.remove(entry.path)
+
+    def _record_hit(self, name: str) -> float:
+        now = time.time()
+        count, last = self._hits.get(name, (0.0, now))
+        count = count * 0.5 ** ((now - last) / self.half_life) + 1
+        self._hits[name] = (count, now)
+        return count
+
+    @contextmanager
+    def _key_lock(self, name: str) -> Iterator[None]:
+        """Serialize writers of one name without holding the tier lock."""
+        with self._lock:
+            entry = self._key_locks.setdefault(name, [threading.Lock(), 0])
+            entry[1] += 1
+        entry[0].acquire()
+        try:
+            yield
+        finally:
+            entry[0].release()
+            with self._lock:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self._key_locks[name]
+
+    def _demote_evicted(self, name: str, path: str) -> None:
+        # Called by ``hot`` under its lock, right before it deletes the file:
+        # keep a link to the data and queue it for ``cold``. Taking the tier
+        # lock here would invert the order used by ``get_file``.
+        staged = os.path.join(self.hot.root, f".demote-{uuid.uuid4().hex}")
+        try:
+            ingest_file(path, staged, "link")
+        except OSError:
+            self.demote_errors += 1
+            return
+        self._evicted.append((name, staged))
+
+    def _collect_evicted(self) -> None:
+        # Call with the tier lock held; a newer link replaces an older one.
+        while self._evicted:
+            name, staged = self._evicted.popleft()
+            self._discard_demotion(name)
+            self._demoting[name] = staged
+
+    def _discard_demotion(self, name: str) -> None:
+        staged = self._demoting.pop(name, None)
+        if staged is not None:
+            os.remove(staged)
+
+    def _finish_demotions(self) -> None:
+        """Copy files evicted from ``hot`` into ``cold``, outside the tier lock."""
+        while True:
+            with self._lock:
+                self._collect_evicted()
+                name = next((n for n in self._demoting if n not in self._copying), None)
+                if name is None:
+                    return
+                self._copying.add(name)
+            try:
+                with self._key_lock(name):
+                    self._finish_demotion(name)
+            finally:
+                with self._lock:
+                    self._copying.discard(name)
+
+    def _finish_demotion(self, name: str) -> None:
+        with self._lock:
+            # Deleted or stored again while we waited for the name.
+            staged = self._demoting.get(name)
+        if staged is None:
+            return
+        moved = os.path.join(self.cold.root, f".move-{uuid.uuid4().hex}")
+        try:
+            ingest_file(staged, moved, "link")
+            self.cold.store_file(moved, name=name, mode="move")
+            self.demoted += 1
+        except OSError:
+            self.demote_errors += 1
+        finally:
+            # Stored in ``cold`` before the link goes, so reads always find it.
+            with self._lock:
+                if self._demoting.get(name) == staged:
+                    del self._demoting[name]
+            for path in (moved, staged):
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def store_file(self, source_path: str, name: Optional[str] = None, mode: str = "copy") -> str:
+        """Store a new file in the hot tier, or in cold if it can never fit hot."""
+        name = name or os.path.basename(source_path)
+        with self._key_lock(name):
+            if self.hot.max_size and os.path.getsize(source_path) > self.hot.max_size:
+                self.hot.delete_file(name)
+                with self._lock:
+                    self._collect_evicted()
+                    self._discard_demotion(name)
+                return self.cold.store_file(source_path, name=name, mode=mode)
+            path = self.hot.store_file(source_path, name=name, mode=mode)
+            in_hot = name in self.hot.metadata
+            if in_hot:
+                # Any older copy, settled or still in transit, is stale.
+                self.cold.delete_file(name)
+                with self._lock:
+                    self._collect_evicted()
+                    self._discard_demotion(name)
+        self._finish_demotions()
+        return path if in_hot else self.cold.get_storage_path(name)
+
+    def tier_of(self, name: str) -> Optional[str]:
+        if name in self.hot.metadata:
+            return "hot"
+        with self._lock:
+            self._collect_evicted()
+            demoting = name in self._demoting
+        if demoting or name in self.cold.metadata:
+            return "cold"
+        return None
+
+    def get_file(self, name: str) -> Optional[str]:
+        """Return a path from whichever tier holds ``name``."""
+        with self._lock:
+            hits = self._record_hit(name)
+        path = self.hot.get_file(name)
+        if path is not None:
+            return path
+        # A demotion stores into ``cold`` before dropping its link, so
+        # checking the link first never misses a file in transit.
+        with self._lock:
+            self._collect_evicted()
+            path = self._demoting.get(name)
+        path = path or self.cold.get_file(name)
+        if path is not None and hits >= self.promote_hits:
+            self._schedule_promotion(name)
+        return path
+
+    def _schedule_promotion(self, name: str) -> None:
+        if name in self._promoting:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # No event loop: leave it to the next ``rebalance``.
+            return
+        self._promoting.add(name)
+        task = loop.create_task(asyncio.to_thread(self.promote, name))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        task.add_done_callback(lambda _: self._promoting.discard(name))
+
+    def _move(self, name: str, source: StorageManager, dest: StorageManager) -> bool:
+        with self._key_lock(name):
+            meta = source.metadata.get(name)
+            if meta is None or name in dest.metadata:
+                return False
+            source_path = source.get_storage_path(name)
+            staged = os.path.join(dest.root, f".move-{uuid.uuid4().hex}")
+            try:
+                ingest_file(source_path, staged, "link")
+                if source.metadata.get(name) is not meta:
+                    # Evicted while we copied.
+                    return False
+                dest.store_file(staged, name=name, mode="move")
+                if name in dest.metadata:
+                    source.delete_file(name)
+                if source is self.hot:
+                    # An eviction racing the move queued the same bytes.
+                    with self._lock:
+                        self._collect_evicted()
+                        self._discard_demotion(name)
+                return True
+            except OSError:
+                # The source was evicted or deleted mid-copy.
+                return False
+            finally:
+                if os.path.exists(staged):
+                    os.remove(staged)
+
+    def promote(self, name: str) -> bool:
+        """Move ``name`` from the cold to the hot tier."""
+        moved = self._move(name, self.cold, self.hot)
+        self.promoted += moved
+        # Making room in ``hot`` may have evicted other files.
+        self._finish_demotions()
+        return moved
+
+    def demote(self, name: str) -> bool:
+        """Move ``name`` from the hot to the cold tier."""
+        moved = self._move(name, self.hot, self.cold)
+        self.demoted += moved
+        return moved
+
+    def delete_file(self, name: str) -> None:
+        with self._key_lock(name):
+            self.hot.delete_file(name)
+            self.cold.delete_file(name)
+            with self._lock:
+                self._collect_evicted()
+                self._discard_demotion(name)
+                self._hits.pop(name, None)
+
+    def rebalance(self, max_moves: int = 100) -> Dict[str, int]:
+        """Demote idle hot files and promote popular cold ones.
+
+        At most ``max_moves`` files move per call so a pass never
+        monopolises the disks.
+        """
+        now = time.time()
+        cutoff = now - self.demote_after
+        idle = []
+        popular = []
+        # ``metadata`` is least recently used first.
+        for name in list(self.hot.metadata):
+            meta = self.hot.metadata.get(name)
+            if meta is None:
+                continue
+            if meta["last_access"] >= cutoff or len(idle) >= max_moves:
+                break
+            idle.append(name)
+        with self._lock:
+            for name, (count, last) in list(self._hits.items()):
+                count *= 0.5 ** ((now - last) / self.half_life)
+                if count < 0.01:
+                    del self._hits[name]
+                elif count >= self.promote_hits and name in self.cold.metadata:
+                    popular.append((count, name))
+        demoted = sum(self.demote(name) for name in idle)
+        popular.sort(reverse=True)
+        promoted = sum(
+            self.promote(name)
+            for _, name in popular[: max_moves - demoted]
+            if name not in self._promoting
+        )
+        return {"demoted": demoted, "promoted": promoted}
+
+    async def run(self, interval: float = 60.0, max_moves: int = 100) -> None:
+        """Rebalance every ``interval`` seconds until cancelled."""
+        while True:
+            await asyncio.to_thread(self.rebalance, max_moves)
+            await asyncio.sleep(interval)
+
+    async def drain(self) -> None:
+        """Wait for background promotions to finish."""
+        while self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "hot": self.hot.stats(),
+            "cold": self.cold.stats(),
+            "promoted": self.promoted,
+            "demoted": self.demoted,
+            "demote_errors": self.demote_errors,
+        }
@@ -0,0 +1,262 @@
+"""Bounded, prioritized transcoding job manager."""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import os
+import time
+import uuid
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from .video_processor import VideoProcessor
+
+# Lower values run first.
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 10
+PRIORITY_LOW = 20
+
+
+def default_workers(threads_per_job: int) -> int:
+    """Concurrent ffmpeg processes that fit the host, leaving one core free."""
+    cores = os.cpu_count() or 1
+    return max(1, (cores - 1) // max(1, threads_per_job))
+
+
+class TranscodeJob:
+    """State of one ``compress_video`` job."""
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+    SHED = "shed"
+
+    def __init__(
+        self,
+        input_path: str,
+        output_path: str,
+        target_bitrate: str,
+        priority: int,
+    ) -> None:
+        self.job_id = uuid.uuid4().hex
+        self.input_path = input_path
+        self.output_path = output_path
+        self.target_bitrate = target_bitrate
+        self.priority = priority
+        self.status = self.QUEUED
+        self.position = 0.0
+        self.duration = 0.0
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.result: asyncio.Future = asyncio.get_running_loop().create_future()
+        self.task: Optional[asyncio.Task] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status not in (self.QUEUED, self.RUNNING)
+
+    @property
+    def progress(self) -> float:
+        """Fraction of the input encoded so far."""
+        if self.status == self.DONE:
+            return 1.0
+        return min(1.0, self.position / self.duration) if self.duration else 0.0
+
+    def _finish(self, status: str, error: Optional[str] = None) -> None:
+        self.status = status
+        self.error = error
+        self.finished_at = time.time()
+        if not self.result.done():
+            self.result.set_result(status == self.DONE)
+
+    def as_dict(self) -> Dict[str, object]:
+        return {
+            "job_id": self.job_id,
+            "input_path": self.input_path,
+            "output_path": self.output_path,
+            "priority": self.priority,
+            "status": self.status,
+            "progress": self.progress,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class TranscodeManager:
+    """Run ``compress_video`` jobs on a fixed number of ffmpeg workers.
+
+    Jobs are taken from a priority queue (lower ``priority`` first, FIFO
+    within a priority). Each ffmpeg is started with ``-threads
+    threads_per_job`` so ``workers * threads_per_job`` bounds CPU use. When
+    ``max_queue`` jobs are waiting, a new job displaces the least urgent
+    queued job if it is more urgent, and is shed itself otherwise.
+    """
+
+    def __init__(
+        self,
+        video_processor: Optional[VideoProcessor] = None,
+        workers: Optional[int] = None,
+        threads_per_job: int = 2,
+        max_queue: int = 64,
+        timeout: Optional[float] = None,
+        history: int = 1000,
+    ) -> None:
+        self.video_processor = video_processor or VideoProcessor()
+        self.threads_per_job = threads_per_job
+        self.workers = workers or default_workers(threads_per_job)
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.history = history
+        self.jobs: Dict[str, TranscodeJob] = {}
+        # Outcomes of jobs trimmed from ``jobs``, so ``wait`` can still answer.
+        self._outcomes: "OrderedDict[str, bool]" = OrderedDict()
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._queued = 0
+        self._seq = itertools.count()
+        self._workers: list[asyncio.Task] = []
+        self.shed_count = 0
+
+    async def start(self) -> "TranscodeManager":
+        if not self._workers:
+            self._queue = asyncio.PriorityQueue()
+            self._workers = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        return self
+
+    async def stop(self) -> None:
+        """Cancel queued jobs, kill running ffmpeg processes and stop workers."""
+        for job in self.jobs.values():
+            if job.status == TranscodeJob.QUEUED:
+                self._drop(job, TranscodeJob.CANCELLED)
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    async def __aenter__(self) -> "TranscodeManager":
+        return await self.start()
+
+    async def __aexit__(self, *exc) -> None:
+        await self.stop()
+
+    def submit(
+        self,
+        input_path: str,
+        output_path: str,
+        target_bitrate: str,
+        priority: int = PRIORITY_NORMAL,
+    ) -> TranscodeJob:
+        """Queue a job; check ``job.status`` for ``SHED`` under overload."""
+        if self._queue is None:
+            raise RuntimeError("TranscodeManager is not started")
+        job = TranscodeJob(input_path, output_path, target_bitrate, priority)
+        self.jobs[job.job_id] = job
+        self._trim_history()
+        if self._queued >= self.max_queue:
+            victim = max(
+                (j for j in self.jobs.values() if j.status == TranscodeJob.QUEUED),
+                key=lambda j: (j.priority, j.created_at),
+                default=None,
+            )
+            if victim is None or victim.priority <= priority:
+                self.shed_count += 1
+                job._finish(TranscodeJob.SHED, "queue full")
+                return job
+            self._drop(victim, TranscodeJob.SHED, "displaced by a higher-priority job")
+            self.shed_count += 1
+        self._queued += 1
+        self._queue.put_nowait((priority, next(self._seq), job))
+        return job
+
+    def shed(self, min_priority: int = PRIORITY_LOW) -> int:
+        """Drop queued jobs with ``priority >= min_priority``; return the count."""
+        dropped = 0
+        for job in self.jobs.values():
+            if job.status == TranscodeJob.QUEUED and job.priority >= min_priority:
+                self._drop(job, TranscodeJob.SHED, "shed under load")
+                dropped += 1
+        self.shed_count += dropped
+        return dropped
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a queued job or kill a running one."""
+        job = self.jobs.get(job_id)
+        if job is None or job.finished:
+            return False
+        if job.status == TranscodeJob.QUEUED:
+            self._drop(job, TranscodeJob.CANCELLED)
+        elif job.task is not None:
+            job.task.cancel()
+        return True
+
+    def _drop(self, job: TranscodeJob, status: str, error: Optional[str] = None) -> None:
+        # The queue entry stays behind and is skipped by the worker.
+        self._queued -= 1
+        job._finish(status, error)
+
+    def _trim_history(self) -> None:
+        excess = len(self.jobs) - self.history
+        for job_id in [j for j, job in self.jobs.items() if job.finished][:max(0, excess)]:
+            self._outcomes[job_id] = self.jobs.pop(job_id).status == TranscodeJob.DONE
+        while len(self._outcomes) > self.history:
+            self._outcomes.popitem(last=False)
+
+    def status(self, job_id: str) -> Optional[Dict[str, object]]:
+        job = self.jobs.get(job_id)
+        return job.as_dict() if job else None
+
+    async def wait(self, job_id: str) -> bool:
+        """Wait for a job to finish; True if it succeeded."""
+        job = self.jobs.get(job_id)
+        if job is not None:
+            return await asyncio.shield(job.result)
+        if job_id in self._outcomes:
+            return self._outcomes[job_id]
+        raise KeyError(f"unknown or expired transcode job {job_id!r}")
+
+    async def _worker(self) -> None:
+        while True:
+            _, _, job = await self._queue.get()
+            if job.status != TranscodeJob.QUEUED:
+                continue
+            self._queued -= 1
+            job.status = TranscodeJob.RUNNING
+            job.started_at = time.time()
+            job.task = asyncio.create_task(self._run(job))
+            try:
+                await asyncio.shield(job.task)
+            except asyncio.CancelledError:
+                job.task.cancel()
+                await asyncio.gather(job.task, return_exceptions=True)
+                if not job.finished:
+                    job._finish(TranscodeJob.CANCELLED)
+                raise
+
+    async def _run(self, job: TranscodeJob) -> None:
+        try:
+            async for position, duration in self.video_processor.compress_video_progress(
+                job.input_path,
+                job.output_path,
+                job.target_bitrate,
+                timeout=self.timeout,
+                threads=self.threads_per_job,
+            ):
+                job.position, job.duration = position, duration
+        except asyncio.CancelledError:
+            job._finish(TranscodeJob.CANCELLED)
+        except Exception as e:
+            job._finish(TranscodeJob.FAILED, str(e) or type(e).__name__)
+        else:
+            job._finish(TranscodeJob.DONE)
+
+    def stats(self) -> Dict[str, int]:
+        counts = {"workers": self.workers, "shed_total": self.shed_count}
+        for job in self.jobs.values():
+            counts[job.status] = counts.get(job.status, 0) + 1
+        return counts
@@ -0,0 +1,98 @@
+"""Parallel SHA-256 tree hashing over memory-mapped files.
+
+The file is split into fixed-size chunks whose SHA-256 digests are
+computed in a thread pool (hashlib releases the GIL on large buffers) and
+combined into a root::
+
+    root = sha256(b"sha256-tree:<chunk_size>:<file_size>:" + d0 + d1 + ...)
+
+Chunk digests also let a partially written copy be checked or resumed
+chunk by chunk.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import mmap
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Sequence
+
+TREE_CHUNK_SIZE = 4 * 1024 * 1024
+
+
+def _default_workers() -> int:
+    return min(32, os.cpu_count() or 1)
+
+
+def chunk_digests(
+    file_path: str,
+    chunk_size: int = TREE_CHUNK_SIZE,
+    workers: Optional[int] = None,
+) -> List[bytes]:
+    """Return the SHA-256 digest of every ``chunk_size`` chunk of a file."""
+    with open(file_path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return []
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            with memoryview(mm) as view:
+                with ThreadPoolExecutor(workers or _default_workers()) as pool:
+                    return list(
+                        pool.map(
+                            lambda start: hashlib.sha256(view[start : start + chunk_size]).digest(),
+                            range(0, size, chunk_size),
+                        )
+                    )
+
+
+def tree_root(digests: Sequence[bytes], file_size: int, chunk_size: int = TREE_CHUNK_SIZE) -> str:
+    """Combine chunk digests into the hex root hash."""
+    root = hashlib.sha256(f"sha256-tree:{chunk_size}:{file_size}:".encode())
+    for digest in digests:
+        root.update(digest)
+    return root.hexdigest()
+
+
+def tree_hash(
+    file_path: str,
+    chunk_size: int = TREE_CHUNK_SIZE,
+    workers: Optional[int] = None,
+) -> str:
+    """Return the tree root hash of ``file_path``."""
+    digests = chunk_digests(file_path, chunk_size, workers)
+    return tree_root(digests, os.path.getsize(file_path), chunk_size)
+
+
+def verify_chunks(
+    file_path: str,
+    expected: Sequence[bytes],
+    chunk_size: int = TREE_CHUNK_SIZE,
+    workers: Optional[int] = None,
+) -> List[int]:
+    """Return indices of chunks that are missing or differ from ``expected``.
+
+    ``file_path`` may be a partial copy; chunks past its end count as
+    missing. An empty list means the file matches completely.
+    """
+    actual = chunk_digests(file_path, chunk_size, workers) if os.path.exists(file_path) else []
+    bad = [i for i, digest in enumerate(expected) if i >= len(actual) or actual[i] != digest]
+    # Trailing bytes beyond the expected chunks are damage too.
+    bad.extend(range(len(expected), len(actual)))
+    return bad
+
+
+def resume_offset(
+    file_path: str,
+    expected: Sequence[bytes],
+    chunk_size: int = TREE_CHUNK_SIZE,
+    workers: Optional[int] = None,
+) -> int:
+    """Return the byte offset from which a partial copy must be rewritten.
+
+    Everything before the offset is verified against ``expected``.
+    """
+    bad = verify_chunks(file_path, expected, chunk_size, workers)
+    if not bad:
+        return os.path.getsize(file_path) if os.path.exists(file_path) else 0
+    return bad[0] * chunk_size
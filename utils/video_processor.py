@@ -1,7 +1,27 @@
 """Video processing utilities."""
 
+from __future__ import annotations
+
+import asyncio
+import re
+from typing import AsyncIterator, Awaitable, Optional, Sequence, TypeVar
+
+from .metadata_cache import MetadataCache
+
+T = TypeVar("T")
+
+
 class VideoProcessor:
-    """Video processing helper class."""
+    """Video processing helper class.
+
+    With a ``MetadataCache``, probe results and thumbnails are reused for
+    files that have not changed, including across restarts. The ``*_async``
+    methods run ffmpeg/ffprobe via asyncio subprocesses so they never block
+    the event loop.
+    """
+
+    def __init__(self, cache: Optional[MetadataCache] = None) -> None:
+        self.cache = cache
 
     def validate_format(self, file_path: str, allowed_formats: list[str]) -> bool:
         """Check if file extension is in the allowed list."""
@@ -9,44 +29,59 @@ class VideoProcessor:
         return ext in [fmt.lower() for fmt in allowed_formats]
 
     def get_video_metadata(self, file_path: str) -> dict:
-        """Extract basic metadata from a video file using ffprobe."""
+        """Extract basic metadata from a video file.
+
+        MP4/MOV and Matroska/WebM headers are parsed directly; other
+        layouts fall back to ffprobe.
+        """
+        if self.cache is None:
+            return self._probe_metadata(file_path) or {}
+        return self.cache.get_or_compute(
+            file_path, "metadata", lambda: self._probe_metadata(file_path)
+        ) or {}
+
+    async def get_video_metadata_async(
+        self, file_path: str, timeout: Optional[float] = None
+    ) -> dict:
+        """Awaitable ``get_video_metadata``.
+
+        Raises ``asyncio.TimeoutError`` (after killing ffprobe) if the probe
+        takes longer than ``timeout`` seconds.
+        """
+        if self.cache is None:
+            return await self._probe_metadata_async(file_path, timeout) or {}
+        return await self.cache.get_or_compute_async(
+            file_path, "metadata", lambda: self._probe_metadata_async(file_path, timeout)
+        ) or {}
+
+    def _probe_metadata(self, file_path: str) -> Optional[dict]:
+        """Probe ``file_path``; ``None`` if it cannot be read."""
         import subprocess
         import json
+        from .media_probe import probe_container
 
-        cmd = [
-            "ffprobe",
-            "-v",
-            "error",
-            "-show_entries",
-            "format=duration:stream=width,height,codec_name",
-            "-of",
-            "json",
-            file_path,
-        ]
-
-        result = subprocess.run(cmd, capture_output=True, text=True)
-        if result.returncode != 0:
-            return {}
+        data = probe_container(file_path)
+        if data is None:
+            result = subprocess.run(_ffprobe_cmd(file_path), capture_output=True, text=True)
+            if result.returncode != 0:
+                return None
 
-        data = json.loads(result.stdout)
-        try:
-            duration = float(data.get("format", {}).get("duration", 0))
-        except (ValueError, TypeError):
-            duration = 0.0
-
-        streams = data.get("streams", [])
-        width = height = 0
-        codec = ""
-        if streams:
-            stream = streams[0]
-            width = int(stream.get("width", 0) or 0)
-            height = int(stream.get("height", 0) or 0)
-            codec = stream.get("codec_name", "")
-
-        data["duration"] = duration
-        data["resolution"] = f"{width}x{height}" if width and height else ""
-        data["codec"] = codec
-        return data
+            data = json.loads(result.stdout)
+        return _summarize_metadata(data)
+
+    async def _probe_metadata_async(
+        self, file_path: str, timeout: Optional[float]
+    ) -> Optional[dict]:
+        import json
+        from .media_probe import probe_container
+
+        data = probe_container(file_path)
+        if data is None:
+            returncode, stdout, _ = await run_command(_ffprobe_cmd(file_path), timeout)
+            if returncode != 0:
+                return None
+            data = json.loads(stdout)
+        return _summarize_metadata(data)
 
     def validate_video_file(
         self,
@@ -71,20 +106,12 @@ class VideoProcessor:
         output_path: str,
         target_bitrate: str,
         progress_callback=None,
+        threads: Optional[int] = None,
     ) -> bool:
-        """Compress a video using ffmpeg."""
+        """Compress a video using ffmpeg, optionally capped at ``threads``."""
         import subprocess
 
-        cmd = [
-            "ffmpeg",
-            "-y",
-            "-i",
-            input_path,
-            "-b:v",
-            str(target_bitrate),
-            output_path,
-        ]
-
+        cmd = _compress_cmd(input_path, output_path, target_bitrate, threads)
         process = subprocess.Popen(
             cmd, stderr=subprocess.PIPE, stdout=subprocess.PIPE, text=True
         )
@@ -94,47 +121,463 @@ class VideoProcessor:
                 line = process.stderr.readline()
                 if not line:
                     break
-                if "time=" in line:
-                    time_str = line.split("time=")[-1].split(" ")[0]
-                    h, m, s = 0, 0, 0.0
-                    try:
-                        hms = time_str.split(":")
-                        if len(hms) == 3:
-                            h, m, s = int(hms[0]), int(hms[1]), float(hms[2])
-                        current = h * 3600 + m * 60 + s
-                        progress_callback(min(current, duration), duration)
-                    except Exception:
-                        pass
+                current = _progress_seconds(line)
+                if current is not None:
+                    progress_callback(min(current, duration), duration)
 
         process.wait()
         return process.returncode == 0
 
+    async def compress_video_progress(
+        self,
+        input_path: str,
+        output_path: str,
+        target_bitrate: str,
+        timeout: Optional[float] = None,
+        threads: Optional[int] = None,
+    ) -> AsyncIterator[tuple[float, float]]:
+        """Run ffmpeg and yield ``(seconds_done, duration)`` as it encodes.
+
+        Raises ``RuntimeError`` if ffmpeg fails and ``asyncio.TimeoutError``
+        once ``timeout`` seconds have passed. Cancelling the consumer or
+        closing the iterator early kills ffmpeg.
+        """
+        duration = (await self.get_video_metadata_async(input_path)).get("duration", 0)
+        deadline = None if timeout is None else asyncio.get_running_loop().time() + timeout
+        process = await asyncio.create_subprocess_exec(
+            *_compress_cmd(input_path, output_path, target_bitrate, threads),
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        try:
+            async for line in _read_lines(process.stderr, deadline):
+                current = _progress_seconds(line)
+                if current is not None:
+                    yield (min(current, duration) if duration else current), duration
+            await _until(process.wait(), deadline)
+        finally:
+            await _kill(process)
+        if process.returncode != 0:
+            raise RuntimeError(f"ffmpeg exited with status {process.returncode}")
+
+    async def compress_video_async(
+        self,
+        input_path: str,
+        output_path: str,
+        target_bitrate: str,
+        progress_callback=None,
+        timeout: Optional[float] = None,
+        threads: Optional[int] = None,
+    ) -> bool:
+        """Awaitable ``compress_video``; see ``compress_video_progress``."""
+        try:
+            async for current, duration in self.compress_video_progress(
+                input_path, output_path, target_bitrate, timeout, threads
+            ):
+                if progress_callback:
+                    progress_callback(current, duration)
+        except RuntimeError:
+            return False
+        return True
+
     def extract_thumbnail(
         self, input_path: str, time_position: float, output_path: str
     ) -> bool:
         """Extract a thumbnail from a video at a given time."""
         import subprocess
 
-        cmd = [
-            "ffmpeg",
-            "-y",
-            "-ss",
-            str(time_position),
-            "-i",
-            input_path,
-            "-vframes",
-            "1",
-            output_path,
-        ]
+        identity, hit = self._cached_thumbnail(input_path, time_position, output_path)
+        if hit:
+            return True
+        cmd = _thumbnail_cmd(input_path, time_position, output_path)
         result = subprocess.run(cmd, capture_output=True)
-        return result.returncode == 0
+        if result.returncode != 0:
+            return False
+        self._remember_thumbnail(identity, time_position, output_path)
+        return True
 
-    def calculate_hash(self, file_path: str) -> str:
-        """Return SHA256 hash of the video file."""
+    async def extract_thumbnail_async(
+        self,
+        input_path: str,
+        time_position: float,
+        output_path: str,
+        timeout: Optional[float] = None,
+    ) -> bool:
+        """Awaitable ``extract_thumbnail``; ffmpeg is killed on timeout."""
+        identity, hit = self._cached_thumbnail(input_path, time_position, output_path)
+        if hit:
+            return True
+        cmd = _thumbnail_cmd(input_path, time_position, output_path)
+        returncode, _, _ = await run_command(cmd, timeout)
+        if returncode != 0:
+            return False
+        self._remember_thumbnail(identity, time_position, output_path)
+        return True
+
+    def _cached_thumbnail(
+        self, input_path: str, time_position: float, output_path: str
+    ) -> tuple[Optional[tuple], bool]:
+        """Return the input's cache identity and whether a cached thumbnail
+        was copied to ``output_path``."""
+        import os
+        import shutil
+
+        if self.cache is None:
+            return None, False
+        try:
+            identity = self.cache.identity(input_path)
+        except OSError:
+            return None, False
+        cached = self.cache.get(identity, f"thumbnail@{time_position}")
+        if not cached or not os.path.isfile(cached):
+            return identity, False
+        if os.path.abspath(cached) != os.path.abspath(output_path):
+            shutil.copyfile(cached, output_path)
+        return identity, True
+
+    def _remember_thumbnail(
+        self, identity: Optional[tuple], time_position: float, output_path: str
+    ) -> None:
+        import os
+
+        if identity is not None:
+            self.cache.put(identity, f"thumbnail@{time_position}", os.path.abspath(output_path))
+
+    def extract_frames(
+        self,
+        input_path: str,
+        timestamps: Optional[Sequence[float]] = None,
+        count: Optional[int] = None,
+        size: Optional[tuple[int, int]] = None,
+    ):
+        """Decode frames into a ``uint8`` array of shape ``(N, H, W, 3)``.
+
+        Pass either ``timestamps`` (seconds) or ``count`` to sample evenly
+        over the whole video. One ffmpeg process decodes every frame and
+        pipes RGB ``rawvideo`` straight into a preallocated array;
+        ``size=(width, height)`` downscales in the decoder. Frames come back
+        in timestamp order. Timestamps past the end, or closer together
+        than one frame, yield fewer than N frames.
+        """
+        import subprocess
+
+        meta = self.get_video_metadata(input_path)
+        cmd, frames = _plan_frames(input_path, meta, timestamps, count, size)
+        if not cmd:
+            return frames
+        view = memoryview(frames).cast("B")
+        process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        filled = 0
+        try:
+            while filled < len(view):
+                read = process.stdout.readinto(view[filled:])
+                if not read:
+                    break
+                filled += read
+        finally:
+            process.kill()
+            process.wait()
+        return frames[: filled // frames[0].nbytes]
+
+    async def extract_frames_async(
+        self,
+        input_path: str,
+        timestamps: Optional[Sequence[float]] = None,
+        count: Optional[int] = None,
+        size: Optional[tuple[int, int]] = None,
+        timeout: Optional[float] = None,
+    ):
+        """Awaitable ``extract_frames``; ffmpeg is killed on timeout or cancel."""
+        meta = await self.get_video_metadata_async(input_path)
+        cmd, frames = _plan_frames(input_path, meta, timestamps, count, size)
+        if not cmd:
+            return frames
+        view = memoryview(frames).cast("B")
+        deadline = None if timeout is None else asyncio.get_running_loop().time() + timeout
+        process = await asyncio.create_subprocess_exec(
+            *cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.DEVNULL
+        )
+        filled = 0
+        try:
+            while filled < len(view):
+                chunk = await _until(process.stdout.read(len(view) - filled), deadline)
+                if not chunk:
+                    break
+                view[filled : filled + len(chunk)] = chunk
+                filled += len(chunk)
+        finally:
+            await _kill(process)
+        return frames[: filled // frames[0].nbytes]
+
+    def fingerprint(self, input_path: str, frames: int = 16) -> list[int]:
+        """Return 64-bit dHashes of ``frames`` frames sampled evenly.
+
+        ffmpeg scales each frame straight to the 9x8 dHash grid, so this
+        costs one decode pass and no image work in Python. Re-encodes,
+        rescales and small edits keep most frame hashes within a few bits.
+        """
+        if self.cache is None:
+            return self._fingerprint(input_path, frames)
+        return self.cache.get_or_compute(
+            input_path, f"dhash@{frames}", lambda: self._fingerprint(input_path, frames)
+        )
+
+    async def fingerprint_async(
+        self, input_path: str, frames: int = 16, timeout: Optional[float] = None
+    ) -> list[int]:
+        """Awaitable ``fingerprint``."""
+
+        async def compute() -> list[int]:
+            sampled = await self.extract_frames_async(
+                input_path, count=frames, size=(DHASH_SIZE + 1, DHASH_SIZE), timeout=timeout
+            )
+            return dhash(sampled).tolist()
+
+        if self.cache is None:
+            return await compute()
+        return await self.cache.get_or_compute_async(input_path, f"dhash@{frames}", compute)
+
+    def _fingerprint(self, input_path: str, frames: int) -> list[int]:
+        sampled = self.extract_frames(
+            input_path, count=frames, size=(DHASH_SIZE + 1, DHASH_SIZE)
+        )
+        return dhash(sampled).tolist()
+
+    def calculate_hash(self, file_path: str, mode: str = "sha256") -> str:
+        """Return a hex digest of the video file.
+
+        ``mode="sha256"`` is the flat SHA-256 of the whole file.
+        ``mode="tree"`` hashes 4 MiB chunks of an mmap in parallel and
+        combines them (see ``utils.tree_hash``); it is much faster on large
+        files but yields a different value.
+        """
         import hashlib
 
+        if mode == "tree":
+            from .tree_hash import tree_hash
+
+            return tree_hash(file_path)
+        if mode != "sha256":
+            raise ValueError(f"Unknown hash mode: {mode}")
+
         sha256 = hashlib.sha256()
         with open(file_path, "rb") as f:
             for chunk in iter(lambda: f.read(1024 * 1024), b""):
                 sha256.update(chunk)
         return sha256.hexdigest()
+
+
+DHASH_SIZE = 8
+
+
+def dhash(frames):
+    """Return one 64-bit difference hash per frame of an ``(N, H, W, 3)`` array.
+
+    Each frame is reduced to a 9x8 grayscale grid by block averaging (a
+    no-op for frames already that size) and bit ``i`` records whether a cell
+    is brighter than its right-hand neighbour.
+    """
+    import numpy as np
+
+    gray = frames.astype(np.float32) @ np.array([0.299, 0.587, 0.114], dtype=np.float32)
+    n, height, width = gray.shape
+    if (height, width) != (DHASH_SIZE, DHASH_SIZE + 1):
+        if height < DHASH_SIZE or width < DHASH_SIZE + 1:
+            raise ValueError(f"Frames of {width}x{height} are too small to hash")
+        rows = np.linspace(0, height, DHASH_SIZE + 1).astype(int)
+        cols = np.linspace(0, width, DHASH_SIZE + 2).astype(int)
+        gray = np.add.reduceat(np.add.reduceat(gray, rows[:-1], axis=1), cols[:-1], axis=2)
+        gray /= np.outer(np.diff(rows), np.diff(cols))
+    bits = gray[:, :, 1:] > gray[:, :, :-1]
+    packed = np.packbits(bits.reshape(n, DHASH_SIZE * DHASH_SIZE), axis=1)
+    return packed.view(">u8").reshape(n).astype(np.uint64)
+
+
+def _summarize_metadata(data: dict) -> dict:
+    """Add ``duration``, ``resolution`` and ``codec`` to ffprobe output."""
+    try:
+        duration = float(data.get("format", {}).get("duration", 0))
+    except (ValueError, TypeError):
+        duration = 0.0
+
+    streams = data.get("streams", [])
+    width = height = 0
+    codec = ""
+    if streams:
+        stream = streams[0]
+        width = int(stream.get("width", 0) or 0)
+        height = int(stream.get("height", 0) or 0)
+        codec = stream.get("codec_name", "")
+
+    data["duration"] = duration
+    data["resolution"] = f"{width}x{height}" if width and height else ""
+    data["codec"] = codec
+    return data
+
+
+def _ffprobe_cmd(file_path: str) -> list[str]:
+    return [
+        "ffprobe",
+        "-v",
+        "error",
+        "-show_entries",
+        "format=duration:stream=width,height,codec_name",
+        "-of",
+        "json",
+        file_path,
+    ]
+
+
+def _compress_cmd(
+    input_path: str, output_path: str, target_bitrate: str, threads: Optional[int] = None
+) -> list[str]:
+    cmd = [
+        "ffmpeg",
+        "-y",
+        "-i",
+        input_path,
+        "-b:v",
+        str(target_bitrate),
+    ]
+    if threads:
+        cmd += ["-threads", str(threads)]
+    return cmd + [output_path]
+
+
+def _thumbnail_cmd(input_path: str, time_position: float, output_path: str) -> list[str]:
+    return [
+        "ffmpeg",
+        "-y",
+        "-ss",
+        str(time_position),
+        "-i",
+        input_path,
+        "-vframes",
+        "1",
+        output_path,
+    ]
+
+
+def _plan_frames(
+    input_path: str,
+    meta: dict,
+    timestamps: Optional[Sequence[float]],
+    count: Optional[int],
+    size: Optional[tuple[int, int]],
+):
+    """Return the ffmpeg command and an empty frame array for a sample."""
+    import numpy as np
+
+    if timestamps is None:
+        if not count:
+            raise ValueError("Pass timestamps or count")
+        duration = meta.get("duration", 0)
+        if not duration:
+            raise ValueError(f"Unknown duration for {input_path}")
+        timestamps = [duration * (i + 0.5) / count for i in range(count)]
+    timestamps = sorted({max(0.0, float(t)) for t in timestamps})
+    if size is None:
+        try:
+            width, height = (int(v) for v in meta.get("resolution", "").split("x"))
+        except ValueError:
+            raise ValueError(f"Unknown resolution for {input_path}") from None
+    else:
+        width, height = size
+    frames = np.empty((len(timestamps), height, width, 3), dtype=np.uint8)
+    if not timestamps:
+        return [], frames
+
+    # Seek the input to the first sample; timestamps in the filter are then
+    # relative to it. A frame is kept when it is the first at or after a
+    # requested time.
+    start = timestamps[0]
+    select = "+".join(
+        f"gte(t,{t - start:.6f})*(isnan(prev_t)+lt(prev_t,{t - start:.6f}))"
+        for t in timestamps
+    )
+    filters = f"select='{select}'"
+    if size is not None:
+        filters += f",scale={width}:{height}"
+    cmd = ["ffmpeg", "-v", "error"]
+    if start > 0:
+        cmd += ["-ss", f"{start:.6f}"]
+    cmd += [
+        "-i",
+        input_path,
+        "-an",
+        "-sn",
+        "-vf",
+        filters,
+        "-vsync",
+        "0",
+        "-frames:v",
+        str(len(timestamps)),
+        "-f",
+        "rawvideo",
+        "-pix_fmt",
+        "rgb24",
+        "pipe:1",
+    ]
+    return cmd, frames
+
+
+def _progress_seconds(line: str) -> Optional[float]:
+    """Parse the ``time=HH:MM:SS.ss`` field of an ffmpeg status line."""
+    if "time=" not in line:
+        return None
+    hms = line.split("time=")[-1].split(" ")[0].split(":")
+    try:
+        if len(hms) == 3:
+            return int(hms[0]) * 3600 + int(hms[1]) * 60 + float(hms[2])
+        return float(hms[0])
+    except ValueError:
+        return None
+
+
+async def _until(awaitable: Awaitable[T], deadline: Optional[float]) -> T:
+    """Await ``awaitable``, raising ``asyncio.TimeoutError`` at ``deadline``."""
+    if deadline is None:
+        return await awaitable
+    remaining = max(0.0, deadline - asyncio.get_running_loop().time())
+    return await asyncio.wait_for(awaitable, remaining)
+
+
+async def _kill(process: asyncio.subprocess.Process) -> None:
+    """Kill ``process`` if it is still running and reap it."""
+    if process.returncode is None:
+        try:
+            process.kill()
+        except ProcessLookupError:
+            pass
+        await process.wait()
+
+
+async def run_command(
+    cmd: list[str], timeout: Optional[float] = None
+) -> tuple[int, bytes, bytes]:
+    """Run ``cmd`` to completion; the child is killed on timeout or cancel."""
+    process = await asyncio.create_subprocess_exec(
+        *cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+    )
+    try:
+        stdout, stderr = await asyncio.wait_for(process.communicate(), timeout)
+    finally:
+        await _kill(process)
+    return process.returncode, stdout, stderr
+
+
+async def _read_lines(
+    stream: asyncio.StreamReader, deadline: Optional[float]
+) -> AsyncIterator[str]:
+    """Yield lines split on ``\\r`` or ``\\n`` (ffmpeg ends status lines with ``\\r``)."""
+    buffer = b""
+    while True:
+        chunk = await _until(stream.read(4096), deadline)
+        if not chunk:
+            break
+        *lines, buffer = re.split(rb"[\r\n]", buffer + chunk)
+        for line in lines:
+            if line:
+                yield line.decode(errors="replace")
+    if buffer:
+        yield buffer.decode(errors="replace")